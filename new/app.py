@@ -1,10 +1,8 @@
 import pandas as pd
 import numpy as np
 from flask import Flask, request, render_template
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
+from multihead_model import MultiHeadModel, build_preprocessor
+from forest_training import make_forest, grow_forest, N_TREES
 
 # Initialize the Flask application
 app = Flask(__name__)
@@ -47,31 +45,20 @@ X = df[all_features]
 y_survival = df['Outcome']       # Model 1 target
 y_disease = df['Disease']         # Model 2 target
 
-# 7. Preprocessor pipeline
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('num', StandardScaler(), numerical_features),
-        ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features)
-    ]
-)
-
-# 8. Train Survival Model
-print("Training Survival Model...")
-model_survival = Pipeline([
-    ('preprocessor', preprocessor),
-    ('classifier', RandomForestClassifier(n_estimators=100, random_state=42))
-])
-model_survival.fit(X, y_survival)
-print("Survival Model trained.")
-
-# 9. Train Disease Model
-print("Training Disease Model...")
-model_disease = Pipeline([
-    ('preprocessor', preprocessor),
-    ('classifier', RandomForestClassifier(n_estimators=100, random_state=42))
-])
-model_disease.fit(X, y_disease)
-print("Disease Model trained. App is ready!")
+# 7. Preprocessor pipeline (sparse CSR output)
+preprocessor = build_preprocessor(numerical_features, categorical_features)
+
+# 8. Train Survival + Disease Models on one shared preprocessing pass
+print("Training Survival and Disease Models...")
+chat_model = MultiHeadModel(preprocessor, {
+    'survival': make_forest(),
+    'disease': make_forest(),
+})
+chat_model.fit(X, {'survival': y_survival, 'disease': y_disease},
+               fit_head=lambda clf, X, y: grow_forest(clf, X, y, N_TREES))
+model_survival = chat_model.heads['survival']
+model_disease = chat_model.heads['disease']
+print("Survival and Disease Models trained. App is ready!")
 
 # ------------------- Flask Web Routes -------------------
 
@@ -112,13 +99,14 @@ def predict():
             species, breed, sex, health_status, symptom1, symptom2
         ]], columns=all_features)
 
-        # --- Make Predictions ---
-        prediction_survive = model_survival.predict(input_data)[0]
-        probabilities_survive = model_survival.predict_proba(input_data)[0]
+        # --- Make Predictions (input is transformed once for both models) ---
+        heads = chat_model.predict(input_data)
+        prediction_survive = heads['survival'][0][0]
+        probabilities_survive = heads['survival'][1][0]
         live_index = np.where(model_survival.classes_ == 'Will Live')[0][0]
         chance_of_living = round(probabilities_survive[live_index] * 100, 2)
 
-        prediction_disease = model_disease.predict(input_data)[0]
+        prediction_disease = heads['disease'][0][0]
 
         return render_template('index.html',
                                prediction_disease=f'Predicted Disease: {prediction_disease}',
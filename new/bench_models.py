@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Model benchmark harness (generalises "New folder/model_graph.py").
+
+Runs every registered model over k-fold splits of the animal CSV and
+records, per model:
+  - fit time
+  - single-row and batch predict latency (p50 / p95 / p99, in ms)
+  - peak RSS of the process that trained it
+  - accuracy and macro F1 (mean and std over folds)
+
+Each model runs in its own child process so peak RSS is not polluted by the
+models benchmarked before it. Results go to JSON plus a headless PNG.
+
+Usage:
+  python bench_models.py                                  # all models, health task
+  python bench_models.py --task disease --folds 5 --models rf extratrees logistic
+  python bench_models.py --max-p95-ms 5 --out bench/models   # pick the best model under 5 ms p95
+  python bench_models.py --plugin my_models --models rf mine  # my_models calls register_model()
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import KFold, StratifiedKFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from features import all_features, categorical_features, chat_frame, chat_targets, health_features, numerical_features
+from multihead_model import build_preprocessor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Animal_Health_Record_500.csv")
+
+
+# ---------------------------
+# Model registry
+# ---------------------------
+# name -> (factory, needs dense input). The spec is pickled to the child
+# process that benchmarks it, so factories are classes, module-level
+# functions or partials of those (no lambdas); a model registered at run
+# time still reaches a spawned child, which never sees this dict change.
+MODELS = {
+    "rf": (partial(RandomForestClassifier, n_estimators=100, n_jobs=-1, random_state=42), False),
+    "extratrees": (partial(ExtraTreesClassifier, n_estimators=100, n_jobs=-1, random_state=42), False),
+    "hgb": (partial(HistGradientBoostingClassifier, random_state=42), True),
+    "svc": (partial(SVC, random_state=42), False),
+    "logistic": (partial(LogisticRegression, max_iter=1000), False),
+}
+
+
+def register_model(name, factory, dense=False):
+    try:
+        pickle.dumps(factory)
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        raise ValueError(f"model factory for {name!r} can't be sent to a child process: {e}") from None
+    MODELS[name] = (factory, dense)
+
+
+# ---------------------------
+# Tasks: same features the app trains on
+# ---------------------------
+def load_task(csv_path, task):
+    df = pd.read_csv(csv_path)
+    if task == "health":
+        X, y = health_features(df)
+        return X, y.to_numpy(), None
+    df_chat = chat_frame(df)
+    y = chat_targets(df_chat)[task]
+    return df_chat[all_features], y.astype(str).to_numpy(), categorical_features
+
+
+def make_estimator(spec, categorical):
+    factory, dense = spec
+    if categorical is None:
+        pre = StandardScaler()
+    else:
+        pre = build_preprocessor(numerical_features, categorical, sparse_output=not dense)
+    return make_pipeline(pre, factory())
+
+
+def percentiles_ms(samples):
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {"p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3)}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+# ---------------------------
+# One model, all folds (runs in a child process)
+# ---------------------------
+def bench_one(name, csv_path, task, folds, single_rows, batch_repeats, seed, spec=None):
+    spec = spec or MODELS[name]
+    X, y, categorical = load_task(csv_path, task)
+    _, counts = np.unique(y, return_counts=True)
+    if counts.min() >= folds:
+        splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    else:
+        splitter = KFold(n_splits=folds, shuffle=True, random_state=seed)
+
+    fit_s, single, batch, acc, f1 = [], [], [], [], []
+    for train_idx, test_idx in splitter.split(X, y):
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        est = make_estimator(spec, categorical)
+
+        t0 = time.perf_counter()
+        est.fit(X_train, y[train_idx])
+        fit_s.append(time.perf_counter() - t0)
+
+        pred = est.predict(X_test)
+        acc.append(accuracy_score(y[test_idx], pred))
+        f1.append(f1_score(y[test_idx], pred, average="macro", zero_division=0))
+
+        for i in range(min(single_rows, len(test_idx))):
+            row = X_test.iloc[[i]]
+            t0 = time.perf_counter()
+            est.predict(row)
+            single.append(time.perf_counter() - t0)
+
+        for _ in range(batch_repeats):
+            t0 = time.perf_counter()
+            est.predict(X_test)
+            batch.append(time.perf_counter() - t0)
+
+    return {
+        "model": name,
+        "task": task,
+        "folds": folds,
+        "rows": int(len(y)),
+        "fit_s": {"mean": round(float(np.mean(fit_s)), 4), "max": round(float(np.max(fit_s)), 4)},
+        "single_row_ms": percentiles_ms(single),
+        "batch_ms": percentiles_ms(batch),
+        "batch_rows": int(len(y) // folds),
+        "peak_rss_mb": peak_rss_mb(),
+        "accuracy": {"mean": round(float(np.mean(acc)), 4), "std": round(float(np.std(acc)), 4)},
+        "f1_macro": {"mean": round(float(np.mean(f1)), 4), "std": round(float(np.std(f1)), 4)},
+    }
+
+
+def _child(queue, args):
+    try:
+        queue.put(bench_one(*args))
+    except Exception as e:
+        queue.put({"model": args[0], "error": repr(e)})
+
+
+def run_isolated(args, context=None):
+    # args end with the model's spec: the child doesn't look it up in MODELS
+    ctx = multiprocessing.get_context(context)
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(queue, args))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+# ---------------------------
+# Deployment pick + outputs
+# ---------------------------
+def pick_model(results, max_p95_ms=None, max_rss_mb=None):
+    """Best macro F1 among models within the latency / memory budget."""
+    ok = [r for r in results if "error" not in r]
+    if max_p95_ms is not None:
+        ok = [r for r in ok if r["single_row_ms"]["p95"] <= max_p95_ms]
+    if max_rss_mb is not None:
+        ok = [r for r in ok if r["peak_rss_mb"] is None or r["peak_rss_mb"] <= max_rss_mb]
+    if not ok:
+        return None
+    # ties (within one std) go to the cheaper model
+    best = max(r["f1_macro"]["mean"] for r in ok)
+    close = [r for r in ok if r["f1_macro"]["mean"] >= best - max(r["f1_macro"]["std"], 1e-9)]
+    return min(close, key=lambda r: r["single_row_ms"]["p95"])["model"]
+
+
+def write_png(results, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed - skipping", path)
+        return
+
+    ok = [r for r in results if "error" not in r]
+    names = [r["model"] for r in ok]
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
+    axes[0].bar(names, [r["f1_macro"]["mean"] for r in ok], yerr=[r["f1_macro"]["std"] for r in ok])
+    axes[0].set_title("Macro F1")
+    axes[1].bar(names, [r["single_row_ms"]["p95"] for r in ok])
+    axes[1].set_title("Single-row predict p95 (ms)")
+    axes[2].bar(names, [r["fit_s"]["mean"] for r in ok])
+    axes[2].set_title("Fit time (s)")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def load_plugins(argv=None):
+    """Import the --plugin modules, which register_model() at import time."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--plugin", action="append", default=[])
+    for module in parser.parse_known_args(argv)[0].plugin:
+        importlib.import_module(module)
+
+
+def build_parser():
+    # after load_plugins(): --models offers what is registered by then
+    parser = argparse.ArgumentParser(description="Benchmark candidate models on the animal CSV")
+    parser.add_argument("--plugin", action="append", default=[],
+                        help="module that registers more models (repeatable)")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--task", choices=["health", "survival", "disease"], default="health")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--single-rows", type=int, default=50, help="single-row predictions timed per fold")
+    parser.add_argument("--batch-repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-p95-ms", type=float, default=None)
+    parser.add_argument("--max-rss-mb", type=float, default=None)
+    parser.add_argument("--out", default="model_bench", help="output prefix for .json and .png")
+    return parser
+
+
+def main(argv=None):
+    load_plugins(argv)
+    args = build_parser().parse_args(argv)
+
+    results = []
+    for name in args.models:
+        print(f"Benchmarking {name} ...")
+        result = run_isolated((name, args.csv, args.task, args.folds,
+                               args.single_rows, args.batch_repeats, args.seed, MODELS[name]))
+        print(json.dumps(result))
+        results.append(result)
+
+    recommended = pick_model(results, args.max_p95_ms, args.max_rss_mb)
+    report = {
+        "csv": os.path.abspath(args.csv),
+        "task": args.task,
+        "seed": args.seed,
+        "budget": {"max_p95_ms": args.max_p95_ms, "max_rss_mb": args.max_rss_mb},
+        "recommended": recommended,
+        "results": results,
+    }
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+    write_png(results, args.out + ".png")
+    print("Recommended model:", recommended)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: pre-fork model sharing vs. loading in every worker.
+
+For each worker count it starts a small process group the way gunicorn
+would and serves a few requests in every worker:
+
+  prefork     the master imports rap.py (models + record index), freezes
+              the heap and forks the workers (gunicorn.conf.py setup)
+  per-worker  the master forks first and every worker loads its own models
+              (gunicorn without preload_app)
+
+then sums RSS and PSS over the master and its workers from
+/proc/<pid>/smaps_rollup (Linux only). RSS counts shared pages once per
+process; PSS splits them between the processes sharing them, so PSS is the
+real footprint. Pre-forking works when PSS grows sublinearly, i.e. each
+extra worker costs much less than the first one.
+
+Usage:
+  python bench_prefork.py --workers 1 2 4 8
+  VET_CSV_FILE=herd_100k.csv python bench_prefork.py --workers 1 4 --out prefork.json
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ["prefork", "per-worker"]
+
+
+def memory_kb(pid):
+    """{"rss": kB, "pss": kB, "private": kB} for one process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def exercise(app, csv_path, n_requests):
+    """Touch the models and the record index like real traffic would."""
+    import pandas as pd
+
+    ids = pd.read_csv(csv_path, usecols=["Animal ID"])["Animal ID"].astype(str).tolist()
+    client = app.test_client()
+    form = {"species": "Cow", "breed": "Gir", "sex": "Female", "bp": "120/80",
+            "heart_rate": "80", "health_status": "Sick", "symptom_1": "fever", "symptom_2": ""}
+    for i in range(n_requests):
+        client.get(f"/display?animal_id={ids[i * 7919 % len(ids)]}")
+        client.post("/predict", data=form)
+
+
+def run_group(mode, workers, n_requests):
+    """Runs inside a fresh interpreter; prints one JSON line."""
+    sys.path.insert(0, HERE)
+    os.environ["VET_WARMUP"] = "prefork"
+
+    started = time.time()
+    if mode == "prefork":
+        import rap
+        from prefork import freeze_heap
+        freeze_heap()
+
+    ready_r, ready_w = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                import gc
+                gc.enable()
+                import rap
+                exercise(rap.app, rap.CSV_FILE, n_requests)
+                os.write(ready_w, b"x")
+                signal.pause()
+            finally:
+                os._exit(0)
+        pids.append(pid)
+
+    for _ in range(workers):
+        os.read(ready_r, 1)
+    load_seconds = time.time() - started
+
+    master = memory_kb(os.getpid())
+    per_worker = [memory_kb(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+    print(json.dumps({
+        "mode": mode,
+        "workers": workers,
+        "seconds": round(load_seconds, 2),
+        "master_rss_mb": round(master["rss"] / 1024, 1),
+        "total_rss_mb": round((master["rss"] + sum(w["rss"] for w in per_worker)) / 1024, 1),
+        "total_pss_mb": round((master["pss"] + sum(w["pss"] for w in per_worker)) / 1024, 1),
+        "worker_private_mb": round(sum(w["private"] for w in per_worker) / len(per_worker) / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare worker memory with and without pre-fork loading")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--mode", choices=MODES, action="append", default=None)
+    parser.add_argument("--requests", type=int, default=20, help="requests served by each worker")
+    parser.add_argument("--out", default=None, help="write results as JSON")
+    parser.add_argument("--_group", nargs=2, metavar=("MODE", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._group:
+        run_group(args._group[0], int(args._group[1]), args.requests)
+        return
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("bench_prefork.py needs Linux (/proc/<pid>/smaps_rollup)")
+
+    results = []
+    print(f"{'mode':<12}{'workers':>8}{'RSS MB':>10}{'PSS MB':>10}{'private/worker':>16}{'load s':>8}")
+    for mode in args.mode or MODES:
+        for n in args.workers:
+            # a fresh interpreter per run so nothing is inherited between runs
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--_group", mode, str(n),
+                                  "--requests", str(args.requests)],
+                                 capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            results.append(r)
+            print(f"{mode:<12}{n:>8}{r['total_rss_mb']:>10}{r['total_pss_mb']:>10}"
+                  f"{r['worker_private_mb']:>16}{r['seconds']:>8}")
+
+    # marginal cost of one more worker, from the smallest to the largest group
+    print()
+    for mode in args.mode or MODES:
+        rows = sorted((r for r in results if r["mode"] == mode), key=lambda r: r["workers"])
+        if len(rows) > 1 and rows[-1]["workers"] > rows[0]["workers"]:
+            extra = (rows[-1]["total_pss_mb"] - rows[0]["total_pss_mb"]) / (rows[-1]["workers"] - rows[0]["workers"])
+            print(f"{mode}: {extra:.1f} MB PSS per extra worker "
+                  f"(first worker + master: {rows[0]['total_pss_mb']} MB)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
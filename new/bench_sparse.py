@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Dense vs sparse one-hot benchmark for the chatbot preprocessing + forest.
+
+Usage:
+  python bench_sparse.py                       # 10k, 100k and 1M rows
+  python bench_sparse.py --rows 10000 50000 --trees 20 --out sparse_bench.json
+
+For every row count a synthetic dataset with the same columns as the chat
+models (high-cardinality Breed / Symptom vocabularies) is built, then the
+preprocessor is fitted in dense mode (sparse_output=False) and sparse (CSR)
+mode. We record the transformed matrix size, the tracemalloc peak while
+transforming and the preprocessing + RandomForest fit times.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+
+from multihead_model import build_preprocessor
+
+numerical_features = ['Heart Rate (bpm)', 'BP_Systolic', 'BP_Diastolic']
+categorical_features = ['Species', 'Breed', 'Sex', 'Health Status', 'Symptom 1', 'Symptom 2']
+all_features = numerical_features + categorical_features
+
+
+# ---------------------------
+# Synthetic data
+# ---------------------------
+def make_dataset(n_rows, n_breeds=2000, n_symptoms=400, seed=42):
+    rng = np.random.default_rng(seed)
+    symptoms = np.array([f"symptom_{i}" for i in range(n_symptoms)])
+    df = pd.DataFrame({
+        'Heart Rate (bpm)': rng.normal(90, 25, n_rows).round(),
+        'BP_Systolic': rng.normal(130, 15, n_rows).round(),
+        'BP_Diastolic': rng.normal(80, 10, n_rows).round(),
+        'Species': rng.choice(['Cow', 'Dog', 'Cat', 'Goat', 'Sheep', 'Horse', 'Buffalo'], n_rows),
+        'Breed': np.char.add('breed_', rng.integers(0, n_breeds, n_rows).astype(str)),
+        'Sex': rng.choice(['Male', 'Female'], n_rows),
+        'Health Status': rng.choice(['Healthy', 'Sick', 'Critical', 'Cold'], n_rows),
+        'Symptom 1': rng.choice(symptoms, n_rows),
+        'Symptom 2': rng.choice(symptoms, n_rows),
+    })
+    y = rng.choice(['Will Live', 'Will Not Live'], n_rows, p=[0.85, 0.15])
+    return df[all_features], y
+
+
+def matrix_bytes(X):
+    if sparse.issparse(X):
+        X = X.tocsr()
+        return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+    return int(X.nbytes)
+
+
+# ---------------------------
+# One benchmark run
+# ---------------------------
+def run_mode(X, y, sparse_output, n_trees, n_jobs):
+    pre = build_preprocessor(numerical_features, categorical_features, sparse_output=sparse_output)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        Xt = pre.fit_transform(X)
+    except MemoryError:
+        tracemalloc.stop()
+        return {'mode': 'sparse' if sparse_output else 'dense', 'error': 'MemoryError'}
+    transform_s = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    clf = RandomForestClassifier(n_estimators=n_trees, n_jobs=n_jobs, random_state=42)
+    t0 = time.perf_counter()
+    clf.fit(Xt, y)
+    fit_s = time.perf_counter() - t0
+
+    return {
+        'mode': 'sparse' if sparse_output else 'dense',
+        'n_columns': int(Xt.shape[1]),
+        'matrix_mb': round(matrix_bytes(Xt) / 1e6, 2),
+        'transform_peak_mb': round(peak / 1e6, 2),
+        'transform_s': round(transform_s, 3),
+        'fit_s': round(fit_s, 3),
+    }
+
+
+def estimated_dense_gb(X):
+    n_columns = len(numerical_features) + sum(X[c].nunique() for c in categorical_features)
+    return len(X) * n_columns * 8 / 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dense vs sparse one-hot benchmark")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--trees', type=int, default=10)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--max-dense-gb', type=float, default=4.0,
+                        help="skip dense mode when the dense matrix would exceed this size")
+    parser.add_argument('--out', default=None, help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n_rows in args.rows:
+        X, y = make_dataset(n_rows)
+        for sparse_output in (False, True):
+            if not sparse_output and estimated_dense_gb(X) > args.max_dense_gb:
+                row = {'rows': n_rows, 'mode': 'dense', 'skipped': f"needs ~{estimated_dense_gb(X):.1f} GB"}
+                print(row)
+                results.append(row)
+                continue
+            row = {'rows': n_rows, **run_mode(X, y, sparse_output, args.trees, args.n_jobs)}
+            print(row)
+            results.append(row)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
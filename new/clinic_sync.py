@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Offline-first replication between clinic nodes and a hub.
+
+Every node (a clinic app, or the hub - any node can be a hub) keeps its own
+record store and a small SQLite file next to it (<csv>.sync.db) with:
+
+  journal    every change applied to the node's records, in order:
+             origin node, Animal ID, changed fields, a (time, node, edit
+             number) stamp per field and the record's version vector
+             after the change
+  records    per Animal ID: version vector {node: edits}, field stamps and
+             the local Version the sync state matches
+  peers      how far this node has pushed to / pulled from each hub
+  conflicts  concurrent edits of the same field (policy "flag")
+
+Local saves reach the journal through the store's commit hooks, inside the
+commit, so edits of a record are journaled in the order they were saved
+even with several worker processes (bulk imports through a scan of the
+records changed since the last scan). A sync pushes
+the node's own journal entries after the hub's cursor and pulls the hub's
+entries after its own cursor, a page at a time, so its cost follows the
+number of changes, not the herd size. With several workers only one of
+them runs the background sync (whichever holds <sync db>.lock). Received
+entries are applied by version vector:
+
+  - already seen (the local vector dominates): skipped
+  - strictly newer: applied
+  - concurrent: merged field by field; a field changed on both sides (the
+    sender hadn't seen our edit of it) goes to the later (time, node)
+    stamp ("lww", the default), or with VET_SYNC_POLICY=flag keeps the
+    local value and is listed under /api/sync/conflicts for a vet to settle
+
+Settings: VET_NODE_ID (default: host name), VET_SYNC_HUB (hub URL; the app
+then syncs every VET_SYNC_INTERVAL seconds and whenever /api/sync/run is
+called), VET_SYNC_TOKEN (shared secret; the sync routes answer 403
+without it), VET_SYNC_DB.
+
+Two nodes on one machine (each with its own copy of the CSV):
+  VET_NODE_ID=hub  VET_SYNC_TOKEN=s VET_CSV_FILE=hub.csv VET_PORT=5000 python rap.py
+  VET_NODE_ID=farm VET_SYNC_TOKEN=s VET_CSV_FILE=farm.csv VET_PORT=5001 \\
+      VET_SYNC_HUB=http://localhost:5000 python rap.py
+  python clinic_sync.py --csv farm.csv --node farm --hub http://localhost:5000   (one-off sync)
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from lazy_loading import LazyModule
+from record_store import FileLocks, RecordNotFound, UPDATED_COLUMN, VERSION_COLUMN
+
+pd = LazyModule("pandas")
+
+NODE_ID = os.environ.get("VET_NODE_ID") or socket.gethostname()
+SYNC_POLICY = os.environ.get("VET_SYNC_POLICY", "lww")
+SYNC_INTERVAL = float(os.environ.get("VET_SYNC_INTERVAL", "300"))
+PAGE_SIZE = 500
+# bookkeeping of the local store, never replicated
+LOCAL_COLUMNS = {VERSION_COLUMN, UPDATED_COLUMN}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (seq INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT, animal_id TEXT,
+                                    fields TEXT, stamps TEXT, vv TEXT);
+CREATE INDEX IF NOT EXISTS journal_origin ON journal (origin, seq);
+CREATE TABLE IF NOT EXISTS records (animal_id TEXT PRIMARY KEY, vv TEXT, stamps TEXT, version INTEGER);
+CREATE TABLE IF NOT EXISTS peers (hub TEXT PRIMARY KEY, pushed INTEGER DEFAULT 0, pulled INTEGER DEFAULT 0,
+                                  last_sync TEXT, last_error TEXT);
+CREATE TABLE IF NOT EXISTS conflicts (id INTEGER PRIMARY KEY AUTOINCREMENT, animal_id TEXT, field TEXT,
+                                      local TEXT, remote TEXT, remote_origin TEXT, at TEXT);
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+# slots of <sync db>.lock: applying received entries, a sync run, the
+# process that runs the background loop
+APPLY_SLOT, RUN_SLOT, LOOP_SLOT = 0, 1, 2
+
+
+class _NothingToWrite(Exception):
+    """Every received field was dropped; aborts the store update."""
+
+
+class SyncError(Exception):
+    pass
+
+
+class InvalidEntry(ValueError):
+    """A received journal entry doesn't have the shape entries_after() gives it."""
+
+
+def _count(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def check_entry(entry):
+    """Raise InvalidEntry unless entry can be applied (it comes off the network)."""
+    if not isinstance(entry, dict):
+        raise InvalidEntry(f"entry must be an object, not {type(entry).__name__}")
+    animal_id = entry.get("animal_id")
+    if isinstance(animal_id, bool) or not isinstance(animal_id, (str, int)) or not str(animal_id).strip():
+        raise InvalidEntry("entry needs an animal_id")
+    if not isinstance(entry.get("origin"), str) or not entry["origin"]:
+        raise InvalidEntry(f"entry for {animal_id} needs an origin node")
+    fields, stamps, vv = entry.get("fields"), entry.get("stamps"), entry.get("vv")
+    if not isinstance(fields, dict) or not isinstance(stamps, dict) or not isinstance(vv, dict):
+        raise InvalidEntry(f"entry for {animal_id} needs fields, stamps and vv objects")
+    for field, value in fields.items():
+        if field == "Animal ID" or field in LOCAL_COLUMNS:
+            raise InvalidEntry(f"entry for {animal_id} can't set {field}")
+        if value is not None and not isinstance(value, (str, int, float)):
+            raise InvalidEntry(f"entry for {animal_id}: {field} must be a plain value")
+    for field, stamp in stamps.items():
+        # [time, node, that node's counter], as _record_local() writes them
+        if not (isinstance(stamp, list) and len(stamp) == 3 and isinstance(stamp[0], str)
+                and isinstance(stamp[1], str) and _count(stamp[2])):
+            raise InvalidEntry(f"entry for {animal_id}: bad stamp for {field}")
+    if not all(isinstance(node, str) and _count(n) for node, n in vv.items()):
+        raise InvalidEntry(f"entry for {animal_id}: vv must map nodes to counts")
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="microseconds")
+
+
+def _plain(value):
+    """JSON-safe cell value (numpy scalars unwrapped, NaN -> None)."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def changed_fields(old, new):
+    changes = {}
+    for column, value in new.items():
+        if column in LOCAL_COLUMNS or column == "Animal ID":
+            continue
+        value = _plain(value)
+        before = _plain(old.get(column)) if old else None
+        if value != before and not (value in (None, "") and before in (None, "")):
+            changes[column] = value
+    return changes
+
+
+def dominates(a, b):
+    """True if vector a has seen every edit b has."""
+    return all(a.get(node, 0) >= count for node, count in b.items())
+
+
+def merge_vectors(a, b):
+    return {node: max(a.get(node, 0), b.get(node, 0)) for node in set(a) | set(b)}
+
+
+class SyncNode:
+    def __init__(self, store, node_id=NODE_ID, db_path=None, policy=SYNC_POLICY, token=None):
+        self.store = store
+        self.node_id = node_id
+        self.db_path = db_path or os.environ.get("VET_SYNC_DB") or store.csv_path + ".sync.db"
+        self.policy = policy
+        self.token = token if token is not None else os.environ.get("VET_SYNC_TOKEN", "")
+        self._applying = threading.local()
+        self.locks = FileLocks(self.db_path + ".lock", 3)
+        with self._db() as db:
+            db.executescript(SCHEMA)
+            if self._state(db, "capture_since") is None:
+                # records saved before the node existed are every node's starting copy
+                self._set_state(db, "capture_since", _now()[:19] + "+00:00")
+        store.commit_hooks.append(self._committed)
+
+    @contextlib.contextmanager
+    def _db(self, immediate=False):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with db:
+                if immediate:
+                    # take the write lock before reading what gets updated
+                    db.execute("BEGIN IMMEDIATE")
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _state(db, key):
+        row = db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(db, key, value):
+        db.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _meta(db, animal_id):
+        row = db.execute("SELECT vv, stamps, version FROM records WHERE animal_id = ?", (animal_id,)).fetchone()
+        if row is None:
+            return {}, {}, None
+        return json.loads(row[0]), json.loads(row[1]), row[2]
+
+    @staticmethod
+    def _journal(db, origin, animal_id, fields, stamps, vv):
+        db.execute("INSERT INTO journal (origin, animal_id, fields, stamps, vv) VALUES (?, ?, ?, ?, ?)",
+                   (origin, animal_id, json.dumps(fields), json.dumps(stamps), json.dumps(vv)))
+
+    def _save_meta(self, db, animal_id, vv, stamps, version):
+        db.execute("INSERT OR REPLACE INTO records (animal_id, vv, stamps, version) VALUES (?, ?, ?, ?)",
+                   (animal_id, json.dumps(vv), json.dumps(stamps), version))
+
+    # ---- local changes ----
+    def _committed(self, old, new):
+        # a commit hook: it runs while the save still holds the store lock, so
+        # entries get their counters in commit order across worker processes
+        journal = getattr(self._applying, "journal", None)
+        if journal is not None:
+            journal(new)  # this save applied received entries
+            return
+        if new is None:
+            # all records replaced (bulk import): picked up by capture_bulk()
+            with self._db() as db:
+                self._set_state(db, "bulk_pending", "1")
+            return
+        fields = changed_fields(old, new)
+        if fields:
+            self.record_local(str(new["Animal ID"]), fields, _plain(new.get(VERSION_COLUMN)))
+
+    def record_local(self, animal_id, fields, version):
+        with self._db(immediate=True) as db:
+            self._record_local(db, animal_id, fields, version)
+
+    def _record_local(self, db, animal_id, fields, version):
+        vv, stamps, _version = self._meta(db, animal_id)
+        vv[self.node_id] = vv.get(self.node_id, 0) + 1
+        stamp = [_now(), self.node_id, vv[self.node_id]]
+        for field in fields:
+            stamps[field] = stamp
+        self._journal(db, self.node_id, animal_id, fields, {f: stamp for f in fields}, vv)
+        self._save_meta(db, animal_id, vv, stamps, version)
+
+    def capture_bulk(self):
+        """Journal records changed by bulk saves (whole-record entries), in one transaction."""
+        from record_export import changed_frames, watermark
+
+        with self._db() as db:
+            if self._state(db, "bulk_pending") != "1":
+                return 0
+            since = self._state(db, "capture_since") or None
+            mark = watermark(self.store)
+            self._set_state(db, "bulk_pending", "0")
+        captured = 0
+        with self._db(immediate=True) as db:
+            for frame in changed_frames(self.store, since):
+                for record in frame.to_dict("records"):
+                    animal_id = str(_plain(record["Animal ID"]))
+                    version = _plain(record.get(VERSION_COLUMN))
+                    known = self._meta(db, animal_id)[2]
+                    if known is not None and known == version:
+                        continue  # already journaled (saved one by one, or received)
+                    self._record_local(db, animal_id, changed_fields(None, record), version)
+                    captured += 1
+            self._set_state(db, "capture_since", mark or since or "")
+        return captured
+
+    # ---- remote changes ----
+    def _resolve(self, entries, current_of):
+        """Decide what each entry changes, against the records as current_of(Animal ID) returns them.
+
+        Returns (outcome per entry, {Animal ID: fields to write}, [(entry,
+        fields taken, conflicts)] for the entries that weren't skipped).
+        """
+        outcomes, writes, plan = [], {}, []
+        metas = {}
+        with self._db() as db:
+            for entry in entries:
+                animal_id = str(entry["animal_id"])
+                if animal_id not in metas:
+                    metas[animal_id] = self._meta(db, animal_id)[:2]
+                local_vv, stamps = metas[animal_id]
+                remote_vv, remote_stamps, fields = entry["vv"], entry["stamps"], entry["fields"]
+                if dominates(local_vv, remote_vv):
+                    outcomes.append("skipped")
+                    continue
+
+                outcome = "applied"
+                take = dict(fields)
+                conflicts = []
+                if not dominates(remote_vv, local_vv):
+                    outcome = "merged"
+                    current = {**current_of(animal_id), **writes.get(animal_id, {})}
+                    for field, value in fields.items():
+                        mine, theirs = stamps.get(field), remote_stamps.get(field)
+                        if mine is None or theirs is None or remote_vv.get(mine[1], 0) >= mine[2]:
+                            continue  # the sender had seen our last edit of this field
+                        if _plain(current.get(field)) == value:
+                            continue
+                        if self.policy == "flag":
+                            del take[field]
+                            conflicts.append((field, _plain(current.get(field)), value))
+                        elif tuple(theirs[:2]) < tuple(mine[:2]):
+                            del take[field]  # our edit is the later one
+
+                stamps = {**stamps, **{f: remote_stamps[f] for f in take if f in remote_stamps}}
+                metas[animal_id] = (merge_vectors(local_vv, remote_vv), stamps)
+                if take:
+                    writes.setdefault(animal_id, {}).update(take)
+                plan.append((entry, take, conflicts))
+                outcomes.append(outcome)
+        writes = {a: {f: ("" if v is None else v) for f, v in fields.items()} for a, fields in writes.items()}
+        return outcomes, writes, plan
+
+    def _journal_applied(self, plan, versions):
+        with self._db(immediate=True) as db:
+            touched = {}
+            for entry, take, conflicts in plan:
+                animal_id = str(entry["animal_id"])
+                for field, local, remote in conflicts:
+                    db.execute("INSERT INTO conflicts (animal_id, field, local, remote, remote_origin, at) "
+                               "VALUES (?, ?, ?, ?, ?, ?)",
+                               (animal_id, field, json.dumps(local), json.dumps(remote), entry["origin"], _now()))
+                # relayed as received, so every node resolves it the same way
+                self._journal(db, entry["origin"], animal_id, entry["fields"], entry["stamps"], entry["vv"])
+                vv, stamps = touched.setdefault(animal_id, ({}, {}))
+                vv.update(merge_vectors(vv, entry["vv"]))
+                stamps.update({f: entry["stamps"][f] for f in take if f in entry["stamps"]})
+            for animal_id, (vv, stamps) in touched.items():
+                # merged into what is there now: a local save may have been journaled meanwhile
+                current_vv, current_stamps, version = self._meta(db, animal_id)
+                self._save_meta(db, animal_id, merge_vectors(current_vv, vv), {**current_stamps, **stamps},
+                                versions.get(animal_id, version))
+
+    def _apply_to(self, shard, entries):
+        """Resolve and write entries for animals of one single-file store.
+
+        Resolving happens inside the store write (under its locks) and the
+        journal is written by the write's commit hook, so no local save can
+        slip in between. One animal goes through store.update (views follow
+        it in place); more are one upsert_many commit.
+        """
+        state = {"versions": {}, "journaled": False}
+
+        def journal(record=None):
+            if record is not None:
+                state["versions"][str(record["Animal ID"])] = _plain(record.get(VERSION_COLUMN))
+            self._journal_applied(state["plan"], state["versions"])
+            state["journaled"] = True
+
+        def resolve(current_of):
+            state["outcomes"], writes, state["plan"] = self._resolve(entries, current_of)
+            return writes
+
+        def resolve_record(row):
+            writes = resolve(lambda animal_id: row)
+            if not writes:
+                raise _NothingToWrite
+            return next(iter(writes.values()))
+
+        def resolve_frame(frame):
+            first = pd.Series(range(len(frame)), index=frame["Animal ID"].astype(str))
+            first = first[~first.index.duplicated()]
+            writes = resolve(lambda animal_id: frame.iloc[first[animal_id]].to_dict() if animal_id in first else {})
+            for animal_id in writes:
+                # upsert_many gives updated records Version + 1, new ones 1
+                version = frame[VERSION_COLUMN].iat[first[animal_id]] if animal_id in first and VERSION_COLUMN in frame else 0
+                state["versions"][animal_id] = int(_plain(version) or 0) + 1
+            return pd.DataFrame([{"Animal ID": a, **fields} for a, fields in writes.items()], columns=None
+                                if writes else ["Animal ID"])
+
+        animals = {str(entry["animal_id"]) for entry in entries}
+        self._applying.journal = journal
+        try:
+            written = False
+            if len(animals) == 1:
+                try:
+                    shard.update(next(iter(animals)), resolve_record)
+                    written = True
+                except _NothingToWrite:
+                    written = True
+                except RecordNotFound:
+                    pass
+            if not written:
+                shard.upsert_many(resolve_frame, blanks=True)
+        finally:
+            self._applying.journal = None
+        if not state["journaled"]:
+            journal()  # nothing to write; the entries still go into the journal
+        return state["outcomes"]
+
+    def apply_many(self, entries):
+        """Apply journal entries from other nodes in order; "applied", "merged" or "skipped" per entry."""
+        outcomes = [None] * len(entries)
+        by_shard = {}
+        for i, entry in enumerate(entries):
+            by_shard.setdefault(self.store.shard_for(str(entry["animal_id"])), []).append(i)
+        with self.locks.hold(APPLY_SLOT):
+            for shard, indexes in by_shard.items():
+                results = self._apply_to(shard, [entries[i] for i in indexes])
+                for i, outcome in zip(indexes, results):
+                    outcomes[i] = outcome
+        return outcomes
+
+    def apply_remote(self, entry):
+        """Apply one journal entry from another node; returns "applied", "merged" or "skipped"."""
+        return self.apply_many([entry])[0]
+
+    def receive(self, entries):
+        """Hub side of a push: apply entries, return counts per outcome.
+
+        Nothing is applied if any entry is malformed (InvalidEntry).
+        """
+        if not isinstance(entries, list):
+            raise InvalidEntry("entries must be a list")
+        for entry in entries:
+            check_entry(entry)
+        counts = {"applied": 0, "merged": 0, "skipped": 0}
+        for outcome in self.apply_many(entries):
+            counts[outcome] += 1
+        return counts
+
+    def entries_after(self, seq, origin=None, exclude_origin=None, limit=PAGE_SIZE):
+        with self._db() as db:
+            return self._entries_after(db, seq, origin, exclude_origin, limit)
+
+    @staticmethod
+    def _entries_after(db, seq, origin=None, exclude_origin=None, limit=PAGE_SIZE):
+        query = "SELECT seq, origin, animal_id, fields, stamps, vv FROM journal WHERE seq > ?"
+        args = [seq]
+        if origin is not None:
+            query += " AND origin = ?"
+            args.append(origin)
+        if exclude_origin is not None:
+            query += " AND origin != ?"
+            args.append(exclude_origin)
+        query += " ORDER BY seq LIMIT ?"
+        args.append(limit)
+        rows = db.execute(query, args).fetchall()
+        return [{"seq": seq, "origin": origin, "animal_id": animal_id, "fields": json.loads(fields),
+                 "stamps": json.loads(stamps), "vv": json.loads(vv)}
+                for seq, origin, animal_id, fields, stamps, vv in rows]
+
+    def pull_page(self, node, since, limit=PAGE_SIZE):
+        """Hub side of a pull: entries after since that didn't come from node.
+
+        The page and the end of the journal are read in one transaction: an
+        entry journaled in between would otherwise be skipped by "next".
+        """
+        with self._db() as db:
+            db.execute("BEGIN")
+            entries = self._entries_after(db, since, exclude_origin=node, limit=limit)
+            last = db.execute("SELECT COALESCE(MAX(seq), 0) FROM journal").fetchone()[0]
+        more = len(entries) == limit
+        # a short page saw everything up to last (the rest came from node)
+        following = entries[-1]["seq"] if more else last
+        return {"entries": entries, "next": following, "more": more}
+
+    # ---- client side ----
+    def _request(self, url, payload=None, timeout=30):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json",
+                                                                  "X-Sync-Token": self.token})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise SyncError(f"{url}: {e}") from e
+
+    def _peer(self, hub):
+        with self._db() as db:
+            db.execute("INSERT OR IGNORE INTO peers (hub) VALUES (?)", (hub,))
+            return db.execute("SELECT pushed, pulled FROM peers WHERE hub = ?", (hub,)).fetchone()
+
+    def sync_with(self, hub):
+        """Push local changes to hub, then pull everyone else's; returns a summary."""
+        hub = hub.rstrip("/")
+        summary = {"pushed": 0, "pulled": 0, "applied": 0, "merged": 0, "skipped": 0}
+        try:
+            self.capture_bulk()
+            pushed, pulled = self._peer(hub)
+            while True:
+                entries = self.entries_after(pushed, origin=self.node_id)
+                if not entries:
+                    break
+                self._request(f"{hub}/api/sync/push", {"node": self.node_id, "entries": entries})
+                pushed = entries[-1]["seq"]
+                summary["pushed"] += len(entries)
+                with self._db() as db:
+                    db.execute("UPDATE peers SET pushed = ? WHERE hub = ?", (pushed, hub))
+            while True:
+                query = urllib.parse.urlencode({"node": self.node_id, "since": pulled, "limit": PAGE_SIZE})
+                page = self._request(f"{hub}/api/sync/pull?{query}")
+                for outcome in self.apply_many(page["entries"]):
+                    summary[outcome] += 1
+                summary["pulled"] += len(page["entries"])
+                pulled = page["next"]
+                with self._db() as db:
+                    db.execute("UPDATE peers SET pulled = ? WHERE hub = ?", (pulled, hub))
+                if not page["more"]:
+                    break
+        except SyncError as e:
+            with self._db() as db:
+                db.execute("UPDATE peers SET last_error = ? WHERE hub = ?", (str(e), hub))
+            raise
+        with self._db() as db:
+            db.execute("UPDATE peers SET last_sync = ?, last_error = NULL WHERE hub = ?", (_now(), hub))
+        return summary
+
+    def status(self):
+        with self._db() as db:
+            journal = db.execute("SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM journal").fetchone()
+            peers = db.execute("SELECT hub, pushed, pulled, last_sync, last_error FROM peers").fetchall()
+            open_conflicts = db.execute("SELECT COUNT(*) FROM conflicts").fetchone()[0]
+        return {"node": self.node_id, "policy": self.policy, "journal": journal[0], "last_seq": journal[1],
+                "conflicts": open_conflicts,
+                "peers": [dict(zip(("hub", "pushed", "pulled", "last_sync", "last_error"), p)) for p in peers]}
+
+    def conflicts(self, limit=100):
+        with self._db() as db:
+            rows = db.execute("SELECT id, animal_id, field, local, remote, remote_origin, at FROM conflicts "
+                              "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [{"id": i, "Animal ID": a, "field": f, "local": json.loads(l), "remote": json.loads(r),
+                 "remote_origin": o, "at": at} for i, a, f, l, r, o, at in rows]
+
+
+class SyncLoop:
+    """Background sync with the hub every interval seconds; offline periods are retried.
+
+    Every worker process may start one: only the process holding the loop
+    lock syncs, the others wait on it and take over if that process exits.
+    """
+
+    def __init__(self, node, hub, interval=SYNC_INTERVAL, on_synced=None):
+        self.node = node
+        self.hub = hub
+        self.interval = interval
+        self.on_synced = on_synced
+        self.last_error = None
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="clinic-sync", daemon=True)
+            self._thread.start()
+        return self
+
+    def run_once(self):
+        with self.node.locks.hold(RUN_SLOT):
+            try:
+                summary = self.node.sync_with(self.hub)
+            except SyncError as e:
+                self.last_error = str(e)
+                raise
+            self.last_error = None
+        if self.on_synced is not None:
+            self.on_synced(summary)
+        return summary
+
+    def _run(self):
+        with self.node.locks.hold(LOOP_SLOT):
+            while True:
+                try:
+                    self.run_once()
+                except SyncError as e:
+                    print("Sync skipped (offline?):", e)
+                except Exception as e:  # keep the loop alive
+                    print("Sync failed:", e)
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+
+def main():
+    from record_store import RecordStore
+
+    parser = argparse.ArgumentParser(description="Sync this node's records with a hub once")
+    parser.add_argument("--hub", default=os.environ.get("VET_SYNC_HUB"), required=not os.environ.get("VET_SYNC_HUB"))
+    parser.add_argument("--csv", default=os.environ.get("VET_CSV_FILE", "Animal_Health_Record_500.csv"))
+    parser.add_argument("--node", default=NODE_ID)
+    parser.add_argument("--policy", choices=["lww", "flag"], default=SYNC_POLICY)
+    args = parser.parse_args()
+
+    node = SyncNode(RecordStore(args.csv), args.node, policy=args.policy)
+    started = time.perf_counter()
+    try:
+        summary = node.sync_with(args.hub)
+    except SyncError as e:
+        raise SystemExit(f"Sync failed: {e}")
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Feature extraction shared by the app, training and benchmark scripts.
+
+health_*: the 3-feature Health Status model (BP systolic, heart rate, age).
+chat_*:   the chatbot survival / disease models.
+holdout_*: the fixed set of animals models are scored on but never trained on.
+"""
+
+import os
+
+from lazy_loading import LazyModule
+
+pd = LazyModule("pandas")
+
+
+# ---------------------------
+# Health status model
+# ---------------------------
+health_feature_names = ["BP_num", "Heart Rate (bpm)", "Age (years)"]
+
+
+def health_features(df_local):
+    df_local = df_local.copy()
+    df_local["BP_num"] = df_local["BP"].astype(str).str.split("/").str[0].astype(float)
+    df_local["Heart Rate (bpm)"] = pd.to_numeric(df_local["Heart Rate (bpm)"], errors="ignore").fillna(0)
+    df_local["Age (years)"] = pd.to_numeric(df_local["Age (years)"], errors="ignore").fillna(0)
+
+    X = df_local[health_feature_names]
+    y = df_local["Health Status"].astype(str)
+    return X, y
+
+
+def health_row(data):
+    bp_value = float(str(data.get("BP", "0")).split("/")[0])
+    hr = float(data.get("Heart Rate (bpm)", 0) or data.get("Heart Rate", 0) or 0)
+    age = float(data.get("Age (years)", 0) or data.get("Age", 0) or 0)
+    return [bp_value, hr, age]
+
+
+# ---------------------------
+# Chatbot models
+# ---------------------------
+fatal_diseases_list = ['Rabies', 'Anthrax', 'PPR (Peste des petits ruminants)']
+
+numerical_features = ['Heart Rate (bpm)', 'BP_Systolic', 'BP_Diastolic']
+categorical_features = ['Species', 'Breed', 'Sex', 'Health Status', 'Symptom 1', 'Symptom 2']
+all_features = numerical_features + categorical_features
+
+# raw record columns the health and chat models are trained from (plus the
+# Animal ID, which decides the holdout)
+training_columns = ['Animal ID', 'BP', 'Heart Rate (bpm)', 'Age (years)', 'Species', 'Breed',
+                    'Sex', 'Health Status', 'Symptom 1', 'Symptom 2', 'Disease']
+
+
+def chat_frame(df_chat):
+    df_chat = df_chat.copy()
+
+    # ensure columns
+    if 'Disease' not in df_chat.columns:
+        df_chat['Disease'] = 'Unknown'
+    if 'Symptom 1' not in df_chat.columns:
+        df_chat['Symptom 1'] = 'None'
+    if 'Symptom 2' not in df_chat.columns:
+        df_chat['Symptom 2'] = 'None'
+
+    df_chat['Outcome'] = df_chat['Disease'].apply(lambda x: 'Will Not Live' if x in fatal_diseases_list else 'Will Live')
+
+    bp_split = df_chat['BP'].astype(str).str.split('/', expand=True)
+    df_chat['BP_Systolic'] = pd.to_numeric(bp_split[0], errors='coerce').fillna(0)
+    df_chat['BP_Diastolic'] = pd.to_numeric(bp_split[1], errors='coerce').fillna(0)
+    df_chat['Heart Rate (bpm)'] = pd.to_numeric(df_chat['Heart Rate (bpm)'], errors='coerce').fillna(0)
+
+    for c in categorical_features:
+        if c not in df_chat.columns:
+            df_chat[c] = 'Unknown'
+    return df_chat
+
+
+def chat_targets(df_chat):
+    return {'survival': df_chat['Outcome'], 'disease': df_chat['Disease']}
+
+
+def chat_defaults(df_chat):
+    # fallbacks used by /predict when heart rate or BP can't be parsed
+    return {
+        'Heart Rate (bpm)': int(df_chat['Heart Rate (bpm)'].median()),
+        'BP_Systolic': int(df_chat['BP_Systolic'].median()),
+        'BP_Diastolic': int(df_chat['BP_Diastolic'].median()),
+    }
+
+
+# ---------------------------
+# Fixed holdout
+# ---------------------------
+# Share of animals (VET_HOLDOUT_FRACTION) that no model trains on. Membership
+# is a hash of the Animal ID, so an animal stays on the same side as the
+# herd grows, in every process and across restarts, and a retrained
+# candidate and the live model are compared on rows neither has seen.
+HOLDOUT_FRACTION = float(os.environ.get("VET_HOLDOUT_FRACTION", "0.2"))
+HOLDOUT_BUCKETS = 10_000
+
+
+def in_holdout(animal_ids, fraction=HOLDOUT_FRACTION):
+    """Boolean array: True for the Animal IDs that belong to the holdout."""
+    ids = pd.Series(animal_ids, dtype=object).astype(str).str.strip()
+    # hash_pandas_object uses a fixed key, unlike hash(), so it is stable
+    buckets = pd.util.hash_pandas_object(ids, index=False).to_numpy() % HOLDOUT_BUCKETS
+    return buckets < round(fraction * HOLDOUT_BUCKETS)
+
+
+def holdout_split(df, fraction=HOLDOUT_FRACTION):
+    """(training rows, holdout rows) of a records frame.
+
+    A herd too small to have animals on both sides is used whole for both,
+    so the model still trains; its score is then an in-sample one.
+    """
+    mask = in_holdout(df['Animal ID'], fraction)
+    if mask.all() or not mask.any():
+        return df, df
+    return df[~mask], df[mask]
@@ -0,0 +1,191 @@
+"""
+Memory-mapped random forests.
+
+export_forest() writes every tree of a fitted RandomForestClassifier into one
+flat binary file: the node arrays of all trees concatenated (children,
+split feature, threshold) plus the class probabilities of the leaves.
+MappedForest opens that file with a single read-only np.memmap, so loading
+is zero-copy and all processes that open the same file share one copy of
+it in the OS page cache - startup time and resident memory no longer grow
+with the number of workers.
+
+MappedForest predicts like the sklearn forest it was exported from (same
+float32 input, same averaged leaf probabilities), walking all trees at once
+with vectorised NumPy steps. It has no estimators_, so forest_training's
+refresh_forest() retrains it with a full fit rather than a warm start.
+
+File layout:
+  8 bytes   magic b"VETFRST1"
+  8 bytes   header length (little-endian uint64)
+  header    JSON: counts, classes and {array: [dtype, shape, offset]}
+  arrays    each starting on a 64-byte boundary
+"""
+
+import json
+import os
+
+import numpy as np
+
+MAGIC = b"VETFRST1"
+ALIGN = 64
+# nodes x trees held at once while predicting; bounds the temporary arrays
+PREDICT_BLOCK = 1 << 20
+
+
+def _align(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def export_forest(forest, path):
+    """Write a fitted RandomForestClassifier to path (atomically)."""
+    trees = [est.tree_ for est in forest.estimators_]
+    if forest.n_outputs_ != 1:
+        raise ValueError("Only single-output forests can be exported")
+
+    sizes = np.array([t.node_count for t in trees], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    n_nodes = int(sizes.sum())
+    if n_nodes >= 2**31:
+        raise ValueError("Forest too large for 32-bit node ids")
+
+    left = np.empty(n_nodes, dtype=np.int32)
+    right = np.empty(n_nodes, dtype=np.int32)
+    feature = np.empty(n_nodes, dtype=np.int32)
+    threshold = np.empty(n_nodes, dtype=np.float64)
+    leaf_slot = np.full(n_nodes, -1, dtype=np.int32)
+    values = []
+    n_leaves = 0
+    for t, off in zip(trees, offsets):
+        ids = np.arange(t.node_count) + off
+        leaf = t.children_left == -1
+        # leaves point at themselves and always "go left", so every sample
+        # can take the same number of steps regardless of the tree depth
+        left[ids] = np.where(leaf, ids, t.children_left + off)
+        right[ids] = np.where(leaf, ids, t.children_right + off)
+        feature[ids] = np.where(leaf, 0, t.feature)
+        threshold[ids] = np.where(leaf, np.inf, t.threshold)
+
+        value = t.value[leaf, 0, :].astype(np.float64)
+        value /= np.maximum(value.sum(axis=1, keepdims=True), 1e-300)
+        leaf_slot[ids[leaf]] = np.arange(n_leaves, n_leaves + len(value))
+        n_leaves += len(value)
+        values.append(value)
+
+    arrays = {
+        "roots": offsets.astype(np.int32),
+        "left": left,
+        "right": right,
+        "feature": feature,
+        "threshold": threshold,
+        "leaf_slot": leaf_slot,
+        "value": np.concatenate(values),
+    }
+    classes = np.asarray(forest.classes_)
+    header = {
+        "n_trees": len(trees),
+        "n_nodes": n_nodes,
+        "n_features": int(forest.n_features_in_),
+        "max_depth": int(max(t.max_depth for t in trees)),
+        "classes": classes.tolist(),
+        "classes_dtype": classes.dtype.str if classes.dtype != object else "object",
+        "arrays": {},
+    }
+
+    # offsets are relative to the end of the header block, which is padded
+    # to ALIGN, so the header can be written after the layout is known
+    pos = 0
+    for name, a in arrays.items():
+        header["arrays"][name] = [a.dtype.str, list(a.shape), pos]
+        pos = _align(pos + a.nbytes)
+    header_bytes = json.dumps(header).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, a in arrays.items():
+            f.seek(data_start + header["arrays"][name][2])
+            f.write(np.ascontiguousarray(a).tobytes())
+        f.truncate(data_start + pos)
+    os.replace(tmp, path)
+    return path
+
+
+class MappedForest:
+    """Read-only forest backed by a file written with export_forest()."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an exported forest")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len))
+        data_start = _align(len(MAGIC) + 8 + header_len)
+
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        for name, (dtype, shape, offset) in header["arrays"].items():
+            dtype = np.dtype(dtype)
+            start = data_start + offset
+            count = int(np.prod(shape))
+            setattr(self, "_" + name, buf[start:start + count * dtype.itemsize].view(dtype).reshape(shape))
+
+        classes_dtype = header["classes_dtype"]
+        self.classes_ = np.array(header["classes"], dtype=object if classes_dtype == "object" else classes_dtype)
+        self.n_classes_ = len(self.classes_)
+        self.n_features_in_ = header["n_features"]
+        self.n_estimators = header["n_trees"]
+        self.max_depth = header["max_depth"]
+
+    def __reduce__(self):
+        # pickles carry only the path, never the arrays
+        return MappedForest, (self.path,)
+
+    def __deepcopy__(self, memo):
+        # read-only, so a copy can share it; reopening the path would fail
+        # once the process that wrote the file has replaced it
+        return self
+
+    def __repr__(self):
+        return f"MappedForest({self.path!r}, n_estimators={self.n_estimators})"
+
+    def _leaf_proba(self, X):
+        n_trees = self.n_estimators
+        nodes = np.repeat(self._roots[:, None], len(X), axis=1)
+        rows = np.arange(len(X))[None, :]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self._feature[nodes]] <= self._threshold[nodes]
+            nodes = np.where(go_left, self._left[nodes], self._right[nodes])
+        return self._value[self._leaf_slot[nodes]].sum(axis=0) / n_trees
+
+    def predict_proba(self, X):
+        # sparse input stays sparse; only one block at a time is densified
+        sparse = hasattr(X, "toarray")
+        if not sparse:
+            X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, forest expects {self.n_features_in_}")
+
+        block = max(1, PREDICT_BLOCK // max(self.n_estimators, 1))
+        n_rows = X.shape[0]
+        out = np.empty((n_rows, self.n_classes_), dtype=np.float64)
+        for start in range(0, n_rows, block):
+            rows = X[start:start + block]
+            if sparse:
+                rows = rows.toarray()
+            # sklearn trees compare float32 features against float64 thresholds
+            out[start:start + block] = self._leaf_proba(np.asarray(rows, dtype=np.float32))
+        return out
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+
+def map_forest(forest, path):
+    """Export forest to path and return the memory-mapped replacement."""
+    return MappedForest(export_forest(forest, path))
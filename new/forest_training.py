@@ -0,0 +1,96 @@
+"""
+RandomForest training helpers: parallel fitting, warm-start tree growth and
+a wall-clock budget.
+
+Settings (environment variables, all optional):
+  VET_N_JOBS         cores used while fitting (default -1 = all cores)
+  VET_N_TREES        trees in a freshly trained forest (default 100)
+  VET_ADD_TREES      trees added when retraining after new records (default 20)
+  VET_MAX_TREES      forest size at which a retrain refits from scratch (default 300)
+  VET_TRAIN_BUDGET   wall-clock seconds allowed per fit, 0 = no limit (default 0)
+"""
+
+import os
+import time
+
+from sklearn.ensemble import RandomForestClassifier
+
+N_JOBS = int(os.environ.get("VET_N_JOBS", "-1"))
+N_TREES = int(os.environ.get("VET_N_TREES", "100"))
+ADD_TREES = int(os.environ.get("VET_ADD_TREES", "20"))
+MAX_TREES = int(os.environ.get("VET_MAX_TREES", "300"))
+TIME_BUDGET = float(os.environ.get("VET_TRAIN_BUDGET", "0")) or None
+
+# trees grown per warm-start step when a time budget is set
+TREE_BATCH = 10
+
+# Single-row predictions are faster without the joblib thread pool, so
+# fitted forests are switched back to this after training.
+PREDICT_N_JOBS = 1
+
+
+def make_forest(n_jobs=N_JOBS, random_state=42):
+    return RandomForestClassifier(n_estimators=N_TREES, warm_start=True,
+                                  n_jobs=n_jobs, random_state=random_state)
+
+
+def n_trees(forest):
+    return len(getattr(forest, "estimators_", []))
+
+
+def grow_forest(forest, X, y, add_trees, n_jobs=N_JOBS, time_budget=TIME_BUDGET):
+    """Add up to add_trees trees to forest (warm start), fitting in parallel.
+
+    With a time_budget the trees are added TREE_BATCH at a time and growth
+    stops before a batch that would run past the budget. At least one batch
+    is always grown, so an unfitted forest always ends up usable.
+    """
+    forest.warm_start = True
+    forest.n_jobs = n_jobs
+    target = n_trees(forest) + add_trees
+    step = add_trees if time_budget is None else min(TREE_BATCH, add_trees)
+
+    start = time.perf_counter()
+    last_batch = 0.0
+    while n_trees(forest) < target:
+        elapsed = time.perf_counter() - start
+        if time_budget is not None and n_trees(forest) and elapsed + last_batch > time_budget:
+            break
+        t0 = time.perf_counter()
+        forest.n_estimators = min(n_trees(forest) + step, target)
+        forest.fit(X, y)
+        last_batch = time.perf_counter() - t0
+
+    forest.n_jobs = PREDICT_N_JOBS
+    return forest
+
+
+def fit_forest(X, y, n_estimators=N_TREES, n_jobs=N_JOBS, time_budget=TIME_BUDGET, random_state=42):
+    """Train a new forest of up to n_estimators trees."""
+    forest = make_forest(n_jobs=n_jobs, random_state=random_state)
+    return grow_forest(forest, X, y, n_estimators, n_jobs=n_jobs, time_budget=time_budget)
+
+
+def _can_warm_start(forest, X, y):
+    if not n_trees(forest):
+        return False
+    if getattr(forest, "n_features_in_", None) != X.shape[1]:
+        return False
+    # old trees vote by class index, so the label set must not change
+    return set(forest.classes_) == set(y)
+
+
+def refresh_forest(forest, X, y, add_trees=ADD_TREES, max_trees=MAX_TREES,
+                   n_jobs=N_JOBS, time_budget=TIME_BUDGET):
+    """Retrain after new records arrive.
+
+    Adds add_trees trees fitted on the new data to the existing forest. Falls
+    back to a full parallel refit when the features or label set changed, or
+    when the forest would grow past max_trees (so stale trees get dropped).
+    Returns the updated forest, which may be a new object. Warm start
+    modifies forest in place - pass a copy if it is still serving requests.
+    """
+    if _can_warm_start(forest, X, y) and n_trees(forest) + add_trees <= max_trees:
+        return grow_forest(forest, X, y, add_trees, n_jobs=n_jobs, time_budget=time_budget)
+    return fit_forest(X, y, n_jobs=n_jobs, time_budget=time_budget,
+                      random_state=getattr(forest, "random_state", 42))
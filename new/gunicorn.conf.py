@@ -0,0 +1,49 @@
+"""
+gunicorn settings for running rap.py with several workers:
+
+    gunicorn -c gunicorn.conf.py
+
+The app is preloaded in the master with VET_WARMUP=prefork, so the models
+and the record index are built once and shared copy-on-write by all
+workers (see prefork.py). Measure it with bench_prefork.py.
+
+Environment:
+  VET_BIND              address to listen on (default 0.0.0.0:5000)
+  VET_WORKERS           worker processes (default: CPU count)
+  VET_PREFORK_RETRAIN   1 = run the background retrainer in every worker.
+                        Off by default: a retrain gives that worker private
+                        copies of the models. Restart gunicorn to pick up
+                        models trained on new data instead.
+"""
+
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault("VET_WARMUP", "prefork")
+
+wsgi_app = "rap:app"
+bind = os.environ.get("VET_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("VET_WORKERS", multiprocessing.cpu_count()))
+preload_app = True
+timeout = 120
+
+# no collections while the master loads the models; the heap is frozen
+# before forking and collection is turned back on in each worker
+gc.disable()
+
+
+def when_ready(server):
+    from prefork import freeze_heap
+
+    freeze_heap()
+    server.log.info("Models loaded in master, heap frozen; forking %s workers", workers)
+
+
+def post_fork(server, worker):
+    import sys
+
+    gc.enable()
+    app_module = sys.modules.get("rap")
+    if app_module is not None:
+        app_module.after_fork()
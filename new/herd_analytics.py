@@ -0,0 +1,239 @@
+"""
+Herd analytics kept as running aggregates (/analytics, /api/analytics).
+
+Built once from the record store with vectorised groupbys, then every
+saved record is applied in O(1): its old values are taken out of the
+aggregates and the new ones put in. What is kept:
+
+  - animals per species, per Health Status
+  - disease counts per species (prevalence = count / species size)
+  - special-care and vaccinated counts per species (vaccination coverage)
+  - for each vital sign: count / mean / variance (Welford, with removal)
+    over the herd and per species, plus a fixed-bin histogram
+
+Kept current by record_store.StoreView like the search index.
+"""
+
+import collections
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+# name -> (record column, histogram low, high, bin width)
+VITALS = {
+    "heart_rate": ("Heart Rate (bpm)", 0, 300, 10),
+    "bp_systolic": ("BP", 0, 250, 10),
+    "bp_diastolic": ("BP", 0, 200, 10),
+    "oxygen": ("Oxygen Saturation (%)", 50, 100, 2),
+    "age": ("Age (years)", 0, 30, 1),
+    "weight": ("Weight (kg)", 0, 1000, 25),
+}
+ANALYTICS_COLUMNS = ["Species", "Disease", "Health Status", "Special Care", "Vaccination 1",
+                     "BP", "Heart Rate (bpm)", "Oxygen Saturation (%)", "Age (years)", "Weight (kg)"]
+
+
+class RunningStats:
+    """Welford mean/variance that also supports removing a value."""
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x):
+        if self.n <= 1:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 -= delta * (x - self.mean)
+
+    @property
+    def std(self):
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1)) if self.n > 1 else 0.0
+
+    def as_dict(self):
+        return {"n": self.n, "mean": round(self.mean, 2), "std": round(self.std, 2)}
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value).strip()
+
+
+def _number(value):
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(x) else x
+
+
+def _bp(value, part):
+    pieces = _text(value).split("/")
+    return _number(pieces[part]) if len(pieces) > part else None
+
+
+def contribution(record):
+    """What one record adds to the aggregates."""
+    vitals = {}
+    for name, (column, *_bins) in VITALS.items():
+        if name == "bp_systolic":
+            vitals[name] = _bp(record.get(column), 0)
+        elif name == "bp_diastolic":
+            vitals[name] = _bp(record.get(column), 1)
+        else:
+            vitals[name] = _number(record.get(column))
+    vaccination = _text(record.get("Vaccination 1"))
+    return {
+        "species": _text(record.get("Species")) or "Unknown",
+        "disease": _text(record.get("Disease")) or "Unknown",
+        "status": _text(record.get("Health Status")) or "Unknown",
+        "special": _text(record.get("Special Care")).lower() == "yes",
+        "vaccinated": bool(vaccination) and vaccination.lower() != "nan",
+        "vitals": vitals,
+    }
+
+
+def _bin(name, x):
+    _column, low, high, width = VITALS[name]
+    n_bins = int((high - low) / width)
+    return min(max(int((x - low) // width), 0), n_bins - 1)
+
+
+class HerdAnalytics:
+    def __init__(self, source=None):
+        self.source = source
+        self.total = 0
+        self.species = collections.Counter()
+        self.status = collections.Counter()
+        self.disease = collections.Counter()  # (species, disease)
+        self.special = collections.Counter()  # species
+        self.vaccinated = collections.Counter()  # species
+        self.stats = {name: RunningStats() for name in VITALS}
+        self.species_stats = {name: collections.defaultdict(RunningStats) for name in VITALS}
+        self.histograms = {name: np.zeros(int((high - low) / width), dtype=np.int64)
+                           for name, (_c, low, high, width) in VITALS.items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store):
+        frame, source = store.read(ANALYTICS_COLUMNS, with_source=True)
+        return cls.from_frame(frame, source)
+
+    @classmethod
+    def from_frame(cls, frame, source=None):
+        """Vectorised build; same result as applying every record in turn."""
+        self = cls(source)
+        n = len(frame)
+
+        def distinct(column, fn):
+            # fn runs once per distinct value, not once per row
+            if column not in frame:
+                return pd.Series([fn(None)] * n, index=frame.index)
+            codes, uniques = pd.factorize(frame[column], use_na_sentinel=False)
+            return pd.Series(np.asarray([fn(v) for v in uniques], dtype=object)[codes], index=frame.index)
+
+        def text(column):
+            return distinct(column, _text)
+
+        species = text("Species").replace("", "Unknown")
+        self.total = n
+        self.species.update(species.value_counts().to_dict())
+        self.status.update(text("Health Status").replace("", "Unknown").value_counts().to_dict())
+        disease = text("Disease").replace("", "Unknown")
+        self.disease.update(pd.DataFrame({"s": species, "d": disease}).groupby(["s", "d"]).size().to_dict())
+        self.special.update(species[text("Special Care").str.lower() == "yes"].value_counts().to_dict())
+        vaccination = text("Vaccination 1")
+        vaccinated = (vaccination != "") & (vaccination.str.lower() != "nan")
+        self.vaccinated.update(species[vaccinated].value_counts().to_dict())
+
+        for name, (column, low, high, width) in VITALS.items():
+            if name == "bp_systolic":
+                values = distinct(column, lambda v: _bp(v, 0)).astype(float)
+            elif name == "bp_diastolic":
+                values = distinct(column, lambda v: _bp(v, 1)).astype(float)
+            else:
+                values = pd.to_numeric(frame[column], errors="coerce") if column in frame else pd.Series(np.nan, index=frame.index)
+            values = values.astype(float)
+            ok = values.notna().to_numpy()
+            x = values.to_numpy()[ok]
+            if len(x):
+                self.stats[name] = RunningStats(len(x), float(x.mean()), float(((x - x.mean()) ** 2).sum()))
+                bins = np.clip(((x - low) // width).astype(int), 0, len(self.histograms[name]) - 1)
+                self.histograms[name] += np.bincount(bins, minlength=len(self.histograms[name]))
+            grouped = values[ok].groupby(species[ok].to_numpy())
+            per_species = pd.DataFrame({"n": grouped.size(), "mean": grouped.mean(), "var": grouped.var(ddof=0)})
+            for sp, row in per_species.iterrows():
+                self.species_stats[name][sp] = RunningStats(int(row["n"]), float(row["mean"]), float(row["var"] * row["n"]))
+        return self
+
+    # ---- incremental ----
+    def _add(self, c, sign):
+        sp = c["species"]
+        self.total += sign
+        self.species[sp] += sign
+        self.status[c["status"]] += sign
+        self.disease[(sp, c["disease"])] += sign
+        self.special[sp] += sign * c["special"]
+        self.vaccinated[sp] += sign * c["vaccinated"]
+        for name, x in c["vitals"].items():
+            if x is None:
+                continue
+            if sign > 0:
+                self.stats[name].add(x)
+                self.species_stats[name][sp].add(x)
+            else:
+                self.stats[name].remove(x)
+                self.species_stats[name][sp].remove(x)
+            self.histograms[name][_bin(name, x)] += sign
+
+    def apply(self, old, new):
+        with self._lock:
+            if old is not None:
+                self._add(contribution(old), -1)
+            if new is not None:
+                self._add(contribution(new), +1)
+
+    # ---- output ----
+    def summary(self):
+        with self._lock:
+            species = {}
+            for sp, count in sorted(self.species.items()):
+                if count <= 0:
+                    continue
+                diseases = {d: {"count": n, "prevalence": round(n / count, 4)}
+                            for (s, d), n in sorted(self.disease.items(), key=lambda kv: -kv[1])
+                            if s == sp and n > 0}
+                species[sp] = {
+                    "count": count,
+                    "special_care": self.special[sp],
+                    "vaccinated": self.vaccinated[sp],
+                    "vaccination_coverage": round(self.vaccinated[sp] / count, 4),
+                    "diseases": diseases,
+                }
+            vitals = {}
+            for name, (_column, low, high, width) in VITALS.items():
+                vitals[name] = {
+                    **self.stats[name].as_dict(),
+                    "by_species": {sp: st.as_dict() for sp, st in sorted(self.species_stats[name].items()) if st.n},
+                    "histogram": {"low": low, "width": width, "counts": self.histograms[name].tolist()},
+                }
+            return {
+                "total": self.total,
+                "special_care": sum(v for v in self.special.values() if v > 0),
+                "vaccination_coverage": round(sum(self.vaccinated.values()) / self.total, 4) if self.total else 0.0,
+                "health_status": {k: v for k, v in self.status.most_common() if v > 0},
+                "species": species,
+                "vitals": vitals,
+            }
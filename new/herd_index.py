@@ -0,0 +1,396 @@
+"""
+In-memory secondary indexes for herd search (/api/animals).
+
+Each filterable attribute keeps one packed bitmap per value (bit r set =
+row r has that value), so a query is a few ANDs/ORs over n/8 bytes instead
+of a DataFrame scan. Age and weight keep a sorted array of (value, row) for
+range filters. Rows are numbered in CSV order and never move, so a cursor
+is simply the last row a page returned.
+
+Autocomplete (/api/suggest) uses sorted arrays of lower-cased Animal IDs
+and names: a prefix is one bisect range. Added or renamed animals go into
+a small sorted side list that is merged into the arrays once it grows past
+DELTA_MERGE entries, so updates stay cheap and lookups stay O(log n).
+
+The index is built once from the record store and kept current through
+record_store.StoreView, which applies each save made by this process and
+rebuilds the index after any change it didn't see.
+"""
+
+import bisect
+import heapq
+import threading
+
+import numpy as np
+
+from prefork import RecordIndex
+from vaccination import HISTORY_COLUMN, history
+
+# query parameter -> record column
+ATTRIBUTES = {
+    "species": "Species",
+    "breed": "Breed",
+    "sex": "Sex",
+    "health_status": "Health Status",
+    "disease": "Disease",
+    "special_care": "Special Care",
+    "vaccinated": "Vaccination 1",
+}
+# vaccinated means any recorded dose, wherever the record keeps it
+VACCINATED_COLUMNS = ["Vaccination 1", "Vaccination 2", HISTORY_COLUMN]
+RANGES = {"age": "Age (years)", "weight": "Weight (kg)"}
+INDEX_COLUMNS = (["Animal ID", "Name"] + list(ATTRIBUTES.values()) + VACCINATED_COLUMNS[1:]
+                 + list(RANGES.values()))
+
+PAGE_BLOCK = 1 << 16  # bitmap bytes unpacked at a time while paging
+DELTA_MERGE = 4096
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return str(value).strip()
+
+
+def attribute_value(param, value):
+    """The value an attribute is indexed under (special care is yes/no)."""
+    value = _text(value)
+    if param == "special_care":
+        return "Yes" if value.lower() == "yes" else "No"
+    return value
+
+
+def vaccinated(record):
+    """"Yes" if the record has any dose (vaccination.history reads all columns)."""
+    return "Yes" if history(record) else "No"
+
+
+def record_attribute(param, record):
+    if param == "vaccinated":
+        return vaccinated(record)
+    return attribute_value(param, record.get(ATTRIBUTES[param]))
+
+
+def _bytes_for(rows):
+    return max(1, (rows + 7) // 8)
+
+
+def _grow(a, size, fill=0):
+    if len(a) >= size:
+        return a
+    out = np.full(max(size, 2 * len(a)), fill, dtype=a.dtype)
+    out[:len(a)] = a
+    return out
+
+
+def _set_bit(bits, row):
+    bits[row >> 3] |= np.uint8(1 << (row & 7))
+
+
+def _clear_bit(bits, row):
+    bits[row >> 3] &= np.uint8(~(1 << (row & 7)) & 0xFF)
+
+
+class _Attribute:
+    """Per-value bitmaps for one categorical attribute."""
+
+    def __init__(self, values, capacity):
+        codes, labels = _factorize(values)
+        self.labels = list(labels)
+        self.lookup = {}
+        for code, label in enumerate(self.labels):
+            self.lookup.setdefault(label.lower(), []).append(code)
+        self.codes = _grow(codes.astype(np.int32), capacity, -1)
+        nbytes = _bytes_for(len(self.codes))
+        self.bitmaps = [_grow(np.packbits(codes == c, bitorder="little"), nbytes)
+                        for c in range(len(self.labels))]
+
+    def grow(self, capacity):
+        self.codes = _grow(self.codes, capacity, -1)
+        nbytes = _bytes_for(len(self.codes))
+        self.bitmaps = [_grow(b, nbytes) for b in self.bitmaps]
+
+    def set(self, row, label):
+        old = self.codes[row]
+        if old >= 0:
+            _clear_bit(self.bitmaps[old], row)
+        codes = [c for c in self.lookup.get(label.lower(), []) if self.labels[c] == label]
+        if codes:
+            code = codes[0]
+        else:
+            code = len(self.labels)
+            self.labels.append(label)
+            self.lookup.setdefault(label.lower(), []).append(code)
+            self.bitmaps.append(np.zeros(_bytes_for(len(self.codes)), dtype=np.uint8))
+        self.codes[row] = code
+        _set_bit(self.bitmaps[code], row)
+
+    def match(self, wanted):
+        """Bitmap of rows whose value is any of wanted (case-insensitive)."""
+        bits = np.zeros(_bytes_for(len(self.codes)), dtype=np.uint8)
+        for value in wanted:
+            for code in self.lookup.get(value.lower(), []):
+                bits |= self.bitmaps[code]
+        return bits
+
+    def label(self, row):
+        code = self.codes[row]
+        return self.labels[code] if code >= 0 else ""
+
+
+class _Range:
+    """Sorted (value, row) pairs for range filters; NaNs are left out."""
+
+    def __init__(self, values, capacity):
+        values = np.asarray(values, dtype=np.float64)
+        self.values = _grow(values.copy(), capacity, np.nan)
+        rows = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[rows], kind="stable")
+        self.sorted_values = values[rows][order]
+        self.sorted_rows = rows[order]
+
+    def grow(self, capacity):
+        self.values = _grow(self.values, capacity, np.nan)
+
+    def set(self, row, value):
+        old = self.values[row]
+        if not np.isnan(old):
+            lo = np.searchsorted(self.sorted_values, old, "left")
+            hi = np.searchsorted(self.sorted_values, old, "right")
+            at = lo + int(np.flatnonzero(self.sorted_rows[lo:hi] == row)[0])
+            self.sorted_values = np.delete(self.sorted_values, at)
+            self.sorted_rows = np.delete(self.sorted_rows, at)
+        self.values[row] = value
+        if not np.isnan(value):
+            at = np.searchsorted(self.sorted_values, value, "right")
+            self.sorted_values = np.insert(self.sorted_values, at, value)
+            self.sorted_rows = np.insert(self.sorted_rows, at, row)
+
+    def between(self, lo, hi, n_rows):
+        start = 0 if lo is None else np.searchsorted(self.sorted_values, lo, "left")
+        stop = len(self.sorted_values) if hi is None else np.searchsorted(self.sorted_values, hi, "right")
+        hits = np.zeros(_bytes_for(n_rows) * 8, dtype=bool)
+        hits[self.sorted_rows[start:stop]] = True
+        return np.packbits(hits, bitorder="little")
+
+
+class PrefixIndex:
+    """Sorted (key, row) pairs answering "keys starting with p" by bisection."""
+
+    def __init__(self, keys, rows):
+        keys = np.asarray(keys, dtype=str)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.rows = np.asarray(rows, dtype=np.int64)[order]
+        self.delta = []  # sorted [(key, row)] added since the arrays were built
+        self.deleted = set()  # (key, row) pairs removed from the arrays
+
+    def add(self, key, row):
+        if (key, row) in self.deleted:
+            self.deleted.discard((key, row))
+        else:
+            bisect.insort(self.delta, (key, row))
+        if len(self.delta) + len(self.deleted) > DELTA_MERGE:
+            self._merge()
+
+    def remove(self, key, row):
+        i = bisect.bisect_left(self.delta, (key, row))
+        if i < len(self.delta) and self.delta[i] == (key, row):
+            del self.delta[i]
+        else:
+            self.deleted.add((key, row))
+
+    def _merge(self):
+        pairs = [(k, int(r)) for k, r in zip(self.keys.tolist(), self.rows.tolist())
+                 if (k, r) not in self.deleted] if self.deleted else None
+        if pairs is None:
+            keys = np.concatenate([self.keys, np.array([k for k, _ in self.delta], dtype=str)])
+            rows = np.concatenate([self.rows, np.array([r for _, r in self.delta], dtype=np.int64)])
+        else:
+            pairs += self.delta
+            keys = np.array([k for k, _ in pairs], dtype=str)
+            rows = np.array([r for _, r in pairs], dtype=np.int64)
+        self.__init__(keys, rows)
+
+    def prefix(self, p, limit):
+        """Up to limit (key, row) pairs whose key starts with p, in key order."""
+        # keys longer than the array's fixed width would make NumPy copy
+        # the whole array to a wider dtype, so stay within it
+        width = self.keys.dtype.itemsize // 4
+        if len(p) > width:
+            lo = hi = 0
+        elif len(p) == width:
+            lo = int(np.searchsorted(self.keys, p, "left"))
+            hi = int(np.searchsorted(self.keys, p, "right"))
+        else:
+            lo = int(np.searchsorted(self.keys, p, "left"))
+            hi = int(np.searchsorted(self.keys, p + "\U0010ffff", "left"))
+        hi = min(hi, lo + limit + len(self.deleted))
+        base = ((k, int(r)) for k, r in zip(self.keys[lo:hi].tolist(), self.rows[lo:hi].tolist())
+                if (k, r) not in self.deleted)
+        i = bisect.bisect_left(self.delta, (p,))
+        extra = []
+        while i < len(self.delta) and self.delta[i][0].startswith(p) and len(extra) < limit:
+            extra.append(self.delta[i])
+            i += 1
+        out = []
+        for pair in heapq.merge(base, extra):
+            out.append(pair)
+            if len(out) == limit:
+                break
+        return out
+
+
+def _factorize(values):
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    return np.asarray(codes), [str(u) for u in uniques]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class HerdIndex:
+    def __init__(self, frame, source=None):
+        n = len(frame)
+        capacity = max(n, 1)
+        self.n_rows = n
+        self.source = source
+        self._lock = threading.Lock()
+
+        ids = frame["Animal ID"].astype(str).to_numpy()
+        self.ids = _grow(ids.astype(str), capacity, "")
+        self._by_id = RecordIndex(ids)
+        self._added = {}  # Animal ID -> row for rows appended after the build
+
+        self.names = _Attribute([_text(v) for v in frame.get("Name", [""] * n)], capacity)
+        self.attributes = {}
+        for param, column in ATTRIBUTES.items():
+            if param == "vaccinated":
+                doses = [frame[c] if c in frame else [""] * n for c in VACCINATED_COLUMNS]
+                values = [vaccinated(dict(zip(VACCINATED_COLUMNS, row))) for row in zip(*doses)]
+            else:
+                raw = frame[column] if column in frame else [""] * n
+                values = [attribute_value(param, v) for v in raw]
+            self.attributes[param] = _Attribute(values, capacity)
+        self.ranges = {}
+        for param, column in RANGES.items():
+            raw = frame[column] if column in frame else [np.nan] * n
+            self.ranges[param] = _Range([_to_float(v) for v in raw], capacity)
+
+        self._all = np.packbits(np.arange(_bytes_for(capacity) * 8) < n, bitorder="little")
+
+        rows = np.arange(n)
+        self.id_prefix = PrefixIndex(np.char.lower(ids.astype(str)), rows)
+        name_keys = np.array([label.lower() for label in self.names.labels] or [""], dtype=str)
+        self.name_prefix = PrefixIndex(name_keys[self.names.codes[:n]], rows)
+
+    @classmethod
+    def from_store(cls, store):
+        frame, source = store.read(INDEX_COLUMNS, with_source=True)
+        return cls(frame, source)
+
+    # ---- maintenance ----
+    def _row_of(self, animal_id):
+        row = self._by_id.lookup(animal_id)
+        return row if row is not None else self._added.get(str(animal_id))
+
+    def upsert(self, record):
+        animal_id = _text(record.get("Animal ID"))
+        row = self._row_of(animal_id)
+        if row is None:
+            row = self.n_rows
+            self.n_rows += 1
+            capacity = len(self.ids)
+            if row >= capacity:
+                capacity *= 2
+                self.ids = _grow(self.ids, capacity, "")
+                self.names.grow(capacity)
+                for index in [*self.attributes.values(), *self.ranges.values()]:
+                    index.grow(capacity)
+                self._all = _grow(self._all, _bytes_for(capacity))
+            if len(animal_id) > self.ids.dtype.itemsize // 4:
+                self.ids = self.ids.astype(f"<U{len(animal_id)}")
+            self.ids[row] = animal_id
+            self._added[animal_id] = row
+            _set_bit(self._all, row)
+            self.id_prefix.add(animal_id.lower(), row)
+        else:
+            self.name_prefix.remove(self.names.label(row).lower(), row)
+
+        self.names.set(row, _text(record.get("Name")))
+        self.name_prefix.add(self.names.label(row).lower(), row)
+        for param in ATTRIBUTES:
+            self.attributes[param].set(row, record_attribute(param, record))
+        for param, column in RANGES.items():
+            self.ranges[param].set(row, _to_float(record.get(column)))
+
+    def apply(self, old, new):
+        with self._lock:
+            self.upsert(new)
+
+    # ---- queries ----
+    def search(self, filters=None, ranges=None, cursor=-1, limit=50):
+        """Rows matching every filter, after row `cursor`, in CSV order.
+
+        filters: {param: [values]} (any value matches), ranges: {param: (lo, hi)}.
+        Returns (total matches, rows of this page, cursor for the next page or None).
+        cursor is -1 for the first page; anything below raises ValueError.
+        """
+        if cursor < -1:
+            raise ValueError(f"cursor must be -1 or a next_cursor from an earlier page, not {cursor}")
+        with self._lock:
+            n_bytes = _bytes_for(self.n_rows)
+            bits = self._all[:n_bytes].copy()
+            for param, wanted in (filters or {}).items():
+                bits &= self.attributes[param].match(wanted)[:n_bytes]
+            for param, (lo, hi) in (ranges or {}).items():
+                bits &= self.ranges[param].between(lo, hi, self.n_rows)[:n_bytes]
+
+            total = int(_POPCOUNT[bits].sum(dtype=np.int64))
+            rows = []
+            start = cursor + 1
+            block = start >> 3
+            while block < n_bytes and len(rows) <= limit:
+                chunk = np.unpackbits(bits[block:block + PAGE_BLOCK], bitorder="little")
+                hits = np.flatnonzero(chunk) + block * 8
+                rows.extend(hits[hits >= start][:limit + 1 - len(rows)].tolist())
+                block += PAGE_BLOCK
+            next_cursor = rows[limit - 1] if len(rows) > limit else None
+            rows = rows[:limit]
+            return total, [self.describe(r) for r in rows], next_cursor
+
+    def suggest(self, text, limit=10):
+        """Animals whose ID or name starts with text: exact matches first,
+        then IDs before names, each in alphabetical order."""
+        p = text.strip().lower()
+        if not p:
+            return []
+        with self._lock:
+            candidates = {}
+            for kind, index in (("id", self.id_prefix), ("name", self.name_prefix)):
+                for key, row in index.prefix(p, limit):
+                    rank = (key != p, kind != "id", key, row)
+                    if row not in candidates or rank < candidates[row][0]:
+                        candidates[row] = (rank, kind)
+            best = sorted(candidates.items(), key=lambda item: item[1][0])[:limit]
+            return [{"Animal ID": str(self.ids[row]), "Name": self.names.label(row),
+                     "Species": self.attributes["species"].label(row), "match": kind}
+                    for row, (_, kind) in best]
+
+    def describe(self, row):
+        out = {"Animal ID": str(self.ids[row]), "Name": self.names.label(row)}
+        for param, column in ATTRIBUTES.items():
+            if param != "vaccinated":
+                out[column] = self.attributes[param].label(row)
+        out["Vaccinated"] = self.attributes["vaccinated"].label(row)
+        for param, column in RANGES.items():
+            value = self.ranges[param].values[row]
+            out[column] = None if np.isnan(value) else float(value)
+        return out
@@ -0,0 +1,118 @@
+"""
+Lazy imports and background warm-up for fast worker startup.
+
+LazyModule stands in for a heavy module (pandas, numpy, ...) and imports it
+on first attribute access, so `pd = LazyModule("pandas")` at the top of a
+file costs nothing until pd.read_csv() is actually called.
+
+WarmUp runs a loader (import heavy modules, train/load models) once on a
+background thread. Requests that need its result wait for it; requests that
+don't (static pages, /healthz) are served immediately. If the loader fails,
+the next start() after a backoff (VET_WARMUP_RETRY seconds, doubling up to
+VET_WARMUP_RETRY_MAX) runs it again.
+"""
+
+import importlib
+import os
+import threading
+import time
+import traceback
+
+RETRY_AFTER = float(os.environ.get("VET_WARMUP_RETRY", "5"))
+RETRY_MAX = float(os.environ.get("VET_WARMUP_RETRY_MAX", "300"))
+
+
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            # the import system's own lock makes concurrent first use safe
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<LazyModule {self.__dict__['_name']} ({state})>"
+
+
+class WarmUp:
+    """Run load_fn once, in the background, and report readiness; retried after a failure."""
+
+    def __init__(self, load_fn, retry_after=RETRY_AFTER, retry_max=RETRY_MAX):
+        self.load_fn = load_fn
+        self.retry_after = retry_after
+        self.retry_max = retry_max
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.failures = 0
+        self._retry_at = None
+        self._done = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    def _due(self):
+        # not started yet, or failed and the backoff is over
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        if self._done.is_set():
+            return self.error is not None and time.time() >= self._retry_at
+        return self._thread is None
+
+    def start(self):
+        """Start loading in a background thread (no-op once loaded or while loading)."""
+        if not self._due():
+            return
+        with self._start_lock:
+            if self._due():
+                self._thread = threading.Thread(target=self.run, name="warm-up", daemon=True)
+                self._done.clear()  # waiters wait for this attempt
+                self._thread.start()
+
+    def run(self):
+        """Load synchronously in the calling thread."""
+        self.started_at = time.time()
+        self.finished_at = None
+        self._done.clear()
+        try:
+            self.load_fn()
+        except Exception as e:
+            traceback.print_exc()
+            self.error = repr(e)
+            self.failures += 1
+            self._retry_at = time.time() + min(self.retry_after * 2 ** (self.failures - 1), self.retry_max)
+        else:
+            self.error = None
+            self.failures = 0
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def wait(self, timeout=None):
+        """Block until loading finished; True if it succeeded."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        took = None
+        if self.started_at and self.finished_at:
+            took = round(self.finished_at - self.started_at, 3)
+        return {
+            "ready": self.ready,
+            "loading": self.started_at is not None and not self._done.is_set(),
+            "error": self.error,
+            "failures": self.failures,
+            "warmup_seconds": took,
+        }
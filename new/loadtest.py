@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the vet app with per-route latency SLOs.
+
+Simulates --users concurrent doctors, each looping over a weighted mix of
+requests with a short think time, against either
+  - the Flask app in-process (default, uses app.test_client()), or
+  - a running server (--url http://localhost:5000).
+
+Reports throughput and p50/p95/p99 latency per route. With SLOs configured
+the exit code is 1 when any route breaks its limits, so it can gate CI.
+
+Usage:
+  python loadtest.py --mix read-heavy --users 8 --duration 30
+  python loadtest.py --url http://localhost:5000 --mix report-burst --slo slo.json
+  python loadtest.py --slo-rule /display:p95=150 --slo-rule /generate_pdf:p99=2000
+
+SLO file format (ms; "*" applies to every route, route entries override it):
+  {"/display": {"p95": 150, "p99": 400}, "*": {"p99": 3000, "error_rate": 0.01}}
+
+In-process runs save to a throwaway copy of the herd in a temporary
+directory: a copy of VET_CSV_FILE (or the bundled sample), or with
+--synth-rows N a synthetic herd of N records (synth_records.py). Clinic
+sync to a hub is switched off for that copy. Pass --live-csv to load test
+the app's real CSV instead; save requests then change real records.
+
+Requests are only timed once /healthz reports the app ready (the model
+warm-up would otherwise land in the first requests' latencies); apps
+without /healthz are load tested right away.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Animal_Health_Record_500.csv")
+
+# route -> weight; "save" is a POST to /display
+MIXES = {
+    "read-heavy": {"/display": 70, "/scan": 5, "/predict": 15, "save": 4, "/add_vaccine": 2, "/generate_pdf": 4},
+    "balanced": {"/display": 40, "/scan": 5, "/predict": 20, "save": 15, "/add_vaccine": 10, "/generate_pdf": 10},
+    "report-burst": {"/display": 30, "/predict": 5, "save": 5, "/generate_pdf": 60},
+}
+
+SYMPTOMS = ["fever", "cough", "diarrhea", "vomiting", "weakness", "loss of appetite", ""]
+SPECIES = [("Cow", "Gir"), ("Dog", "Labrador"), ("Cat", "Siamese"), ("Goat", "Jamunapari")]
+
+
+# ---------------------------
+# Request builders
+# ---------------------------
+def build_request(kind, animal_id, rng):
+    """Return (route label, method, path, form data)."""
+    if kind == "/display":
+        return kind, "GET", f"/display?animal_id={animal_id}", None
+    if kind == "/scan":
+        return kind, "GET", "/scan", None
+    if kind == "/generate_pdf":
+        return kind, "GET", f"/generate_pdf?animal_id={animal_id}", None
+    if kind == "save":
+        form = {"Symptom1": rng.choice(SYMPTOMS), "Symptom2": rng.choice(SYMPTOMS),
+                "suggestion": "load test", "special_care": rng.choice(["Yes", ""])}
+        return "/display [POST]", "POST", f"/display?animal_id={animal_id}", form
+    if kind == "/add_vaccine":
+        form = {"animal_id": animal_id, "new_vaccine": rng.choice(["FMD", "HS", "Rabies"]),
+                "vaccine_date": time.strftime("%Y-%m-%d")}
+        return kind, "POST", "/add_vaccine", form
+    if kind == "/predict":
+        species, breed = rng.choice(SPECIES)
+        form = {"species": species, "breed": breed, "sex": rng.choice(["Male", "Female"]),
+                "bp": f"{rng.randint(100, 150)}/{rng.randint(60, 95)}",
+                "heart_rate": str(rng.randint(50, 140)), "health_status": "Sick",
+                "symptom_1": rng.choice(SYMPTOMS), "symptom_2": rng.choice(SYMPTOMS)}
+        return kind, "POST", "/predict", form
+    raise ValueError(f"Unknown request kind: {kind}")
+
+
+# ---------------------------
+# Transports
+# ---------------------------
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, form):
+        if method == "GET":
+            resp = self.client.get(path)
+        else:
+            resp = self.client.post(path, data=form)
+        resp.get_data()
+        return resp.status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def send(self, method, path, form):
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            # redirects after a save are expected; they are not followed
+            return e.code
+
+
+def wait_ready(client, timeout, interval=0.2):
+    """Poll /healthz until it answers 200; False if it doesn't within timeout.
+
+    A 404 means the app has no readiness check, which counts as ready.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status = client.send("GET", "/healthz", None)
+        except OSError:
+            status = None  # server not listening yet
+        if status in (200, 404):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def scratch_herd(directory, synth_rows=0, source=None):
+    """Write the herd an in-process run saves to into directory; returns its path."""
+    source = source or os.environ.get("VET_CSV_FILE") or DEFAULT_CSV
+    path = os.path.join(directory, "herd.csv")
+    if synth_rows:
+        from synth_records import stream_records, write_csv
+
+        for _ in write_csv(stream_records(DEFAULT_CSV, synth_rows), path):
+            pass
+    else:
+        shutil.copyfile(source, path)
+    return path
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def run_load(make_client, animal_ids, mix, users, duration, max_requests, think_ms, seed):
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    samples = {}  # route -> list of (seconds, ok)
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    issued = [0]
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        client = make_client()
+        local = {}
+        while time.perf_counter() < stop_at:
+            if max_requests:
+                with lock:
+                    if issued[0] >= max_requests:
+                        break
+                    issued[0] += 1
+            kind = rng.choices(kinds, weights)[0]
+            route, method, path, form = build_request(kind, rng.choice(animal_ids), rng)
+            t0 = time.perf_counter()
+            try:
+                status = client.send(method, path, form)
+                ok = status < 400
+            except Exception:
+                ok = False
+            local.setdefault(route, []).append((time.perf_counter() - t0, ok))
+            if think_ms:
+                time.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+        with lock:
+            for route, rows in local.items():
+                samples.setdefault(route, []).extend(rows)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - started
+
+
+def summarise(samples, elapsed):
+    report = {"elapsed_s": round(elapsed, 2), "routes": {}}
+    total = 0
+    for route, rows in sorted(samples.items()):
+        lat = np.array([r[0] for r in rows]) * 1000
+        errors = sum(1 for r in rows if not r[1])
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        report["routes"][route] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 2),
+            "error_rate": round(errors / len(rows), 4),
+            "p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2),
+            "max": round(lat.max(), 2),
+        }
+        total += len(rows)
+    report["total_requests"] = total
+    report["total_rps"] = round(total / elapsed, 2) if elapsed else 0.0
+    return report
+
+
+# ---------------------------
+# SLO gate
+# ---------------------------
+def parse_slo_rules(rules):
+    """["/display:p95=150", ...] -> {"/display": {"p95": 150.0}}"""
+    slo = {}
+    for rule in rules:
+        route, _, limits = rule.rpartition(":")
+        for limit in limits.split(","):
+            key, _, value = limit.partition("=")
+            slo.setdefault(route, {})[key.strip()] = float(value)
+    return slo
+
+
+def check_slo(report, slo):
+    failures = []
+    for route, stats in report["routes"].items():
+        limits = {**slo.get("*", {}), **slo.get(route.split(" ")[0], {}), **slo.get(route, {})}
+        for key, limit in limits.items():
+            if key in stats and stats[key] > limit:
+                failures.append(f"{route}: {key}={stats[key]} > {limit}")
+    return failures
+
+
+def print_report(report):
+    print(f"\n{'route':<18}{'reqs':>7}{'rps':>9}{'err%':>7}{'p50':>9}{'p95':>9}{'p99':>9}   (ms)")
+    for route, s in report["routes"].items():
+        print(f"{route:<18}{s['requests']:>7}{s['rps']:>9}{s['error_rate'] * 100:>7.1f}"
+              f"{s['p50']:>9}{s['p95']:>9}{s['p99']:>9}")
+    print(f"\ntotal: {report['total_requests']} requests in {report['elapsed_s']} s "
+          f"= {report['total_rps']} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the vet app")
+    parser.add_argument("--url", default=None, help="base URL of a running server (default: in-process)")
+    parser.add_argument("--app", default="rap", help="module with the Flask app for in-process runs")
+    parser.add_argument("--csv", default=None, help="CSV to draw Animal IDs from (default: the app's CSV_FILE)")
+    parser.add_argument("--mix", choices=list(MIXES), default="read-heavy")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0 = no limit)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean think time between requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--slo", default=None, help="JSON file with per-route limits")
+    parser.add_argument("--slo-rule", action="append", default=[], help="e.g. /display:p95=150,p99=400")
+    parser.add_argument("--out", default=None, help="write the report as JSON")
+    parser.add_argument("--synth-rows", type=int, default=0,
+                        help="in-process: save to a synthetic herd of this many records")
+    parser.add_argument("--live-csv", action="store_true",
+                        help="in-process: save to the app's real CSV instead of a temporary copy")
+    parser.add_argument("--ready-timeout", type=float, default=120.0,
+                        help="seconds to wait for /healthz before the first timed request")
+    args = parser.parse_args()
+
+    scratch = None
+    try:
+        if args.url:
+            csv_path = args.csv or DEFAULT_CSV
+            make_client = lambda: HttpClient(args.url)
+        else:
+            if not args.live_csv:
+                if os.environ.get("VET_SHARD_MAP"):
+                    parser.error("a sharded herd can't be copied; unset VET_SHARD_MAP or pass --live-csv")
+                scratch = tempfile.mkdtemp(prefix="vet-loadtest-")
+                os.environ["VET_CSV_FILE"] = scratch_herd(scratch, args.synth_rows)
+                for name in ("VET_SNAPSHOT_FILE", "VET_SYNC_HUB", "VET_SYNC_DB"):
+                    os.environ.pop(name, None)
+                print("Saving to a temporary copy:", os.environ["VET_CSV_FILE"])
+            sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+            module = importlib.import_module(args.app)
+            csv_path = args.csv or module.CSV_FILE
+            make_client = lambda: InProcessClient(module.app)
+
+        if not wait_ready(make_client(), args.ready_timeout):
+            sys.exit(f"{args.url or args.app} not ready after {args.ready_timeout:g}s (see /healthz)")
+
+        import pandas as pd
+        animal_ids = pd.read_csv(csv_path, usecols=["Animal ID"])["Animal ID"].astype(str).tolist()
+
+        print(f"Running {args.mix} mix with {args.users} users for {args.duration}s "
+              f"against {args.url or 'in-process ' + args.app} ...")
+        samples, elapsed = run_load(make_client, animal_ids, MIXES[args.mix], args.users,
+                                    args.duration, args.requests, args.think_ms, args.seed)
+        report = summarise(samples, elapsed)
+        print_report(report)
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    slo = {}
+    if args.slo:
+        with open(args.slo) as f:
+            slo.update(json.load(f))
+    for route, limits in parse_slo_rules(args.slo_rule).items():
+        slo.setdefault(route, {}).update(limits)
+    failures = check_slo(report, slo) if slo else []
+    report["slo"] = slo
+    report["slo_failures"] = failures
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if failures:
+        print("\nSLO FAILED:")
+        for failure in failures:
+            print(" -", failure)
+        sys.exit(1)
+    if slo:
+        print("\nSLO passed.")
+
+
+if __name__ == "__main__":
+    main()
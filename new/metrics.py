@@ -0,0 +1,129 @@
+"""
+Lightweight hot-path timing for the Flask routes, exported in Prometheus
+text format at /metrics.
+
+    with span("csv_load"):
+        df = pd.read_csv(CSV_FILE)
+
+    @span("pdf_build")
+    def build(...): ...
+
+Histograms are sharded per thread: observe() only touches the calling
+thread's own counters, so recording never takes a lock. A shard is keyed by
+thread ident, and an ident belongs to one live thread at a time, so the
+number of shards stays bounded by peak concurrency even when the server
+starts a new thread per request. Scrapes merge the shards.
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+
+# seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._shards = {}
+        self._new_shard_lock = threading.Lock()
+
+    def _shard(self):
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._new_shard_lock:
+                shard = self._shards.setdefault(ident, {})
+        return shard
+
+    def observe(self, label_value, seconds):
+        shard = self._shard()
+        row = shard.get(label_value)
+        if row is None:
+            # one count per bucket, +Inf, then the running sum
+            row = shard[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect.bisect_left(self.buckets, seconds)] += 1
+        row[-1] += seconds
+
+    def collect(self):
+        """{label value: (per-bucket counts, sum)} merged over all shards."""
+        merged = {}
+        for shard in list(self._shards.values()):
+            for label_value, row in list(shard.items()):
+                row = list(row)
+                total = merged.setdefault(label_value, [0] * (len(self.buckets) + 1) + [0.0])
+                for i, v in enumerate(row):
+                    total[i] += v
+        return {k: (v[:-1], v[-1]) for k, v in merged.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total) in sorted(self.collect().items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for upper, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{upper}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_SECONDS = Histogram("vet_stage_seconds", "Time spent in one stage of a request.", "stage")
+REQUEST_SECONDS = Histogram("vet_request_seconds", "Total request handling time per route.", "route")
+HISTOGRAMS = [STAGE_SECONDS, REQUEST_SECONDS]
+
+
+class span(contextlib.ContextDecorator):
+    """Time a block (or a decorated function) into vet_stage_seconds{stage=...}."""
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # a fresh timer per call, so a decorated function is thread-safe
+        return span(self.stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(self.stage, time.perf_counter() - self._start)
+        return False
+
+
+def render_metrics():
+    return "\n".join(h.render() for h in HISTOGRAMS) + "\n"
+
+
+def instrument_app(app):
+    """Record REQUEST_SECONDS for every route and serve GET /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _stop_timer(response):
+        start = getattr(g, "_metrics_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            REQUEST_SECONDS.observe(f"{request.method} {route}", time.perf_counter() - start)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    return app
@@ -0,0 +1,100 @@
+"""
+Multi-head model: one shared preprocessor feeding several classifiers.
+
+The survival and disease models are trained on exactly the same feature
+columns, so the ColumnTransformer is fitted once and every row is
+transformed once - both at training time and at prediction time.
+"""
+
+import copy
+
+import numpy as np
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+
+def _as_csr(X):
+    # RandomForest converts sparse input to CSR for predict anyway;
+    # doing it once here avoids one conversion per head.
+    if sparse.issparse(X):
+        return X.tocsr()
+    return X
+
+
+def build_preprocessor(numerical_features, categorical_features, sparse_output=True):
+    """Scale the numeric columns and one-hot encode the categorical ones.
+
+    With sparse_output=True (the default) the one-hot block stays sparse and
+    sparse_threshold=1.0 makes the ColumnTransformer always return CSR, so the
+    Species x Breed x ... x Symptom vocabulary is never materialised densely.
+    """
+    return ColumnTransformer([
+        ('num', StandardScaler(), numerical_features),
+        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=sparse_output), categorical_features)
+    ], sparse_threshold=1.0 if sparse_output else 0.0)
+
+
+class MultiHeadModel:
+    """Fit one preprocessor and several classifier "heads" on its output.
+
+    heads is a dict {name: classifier}. fit() takes a dict {name: y}.
+    """
+
+    def __init__(self, preprocessor, heads):
+        self.preprocessor = preprocessor
+        self.heads = dict(heads)
+
+    def fit(self, X, targets, fit_head=None):
+        """Fit the preprocessor once, then every head on its output.
+
+        fit_head(clf, Xt, y) -> fitted clf can replace the plain clf.fit call,
+        e.g. to grow forests under a time budget.
+        """
+        Xt = _as_csr(self.preprocessor.fit_transform(X))
+        for name, clf in self.heads.items():
+            if fit_head is None:
+                clf.fit(Xt, targets[name])
+            else:
+                self.heads[name] = fit_head(clf, Xt, targets[name])
+        return self
+
+    def refreshed(self, X, targets, refresh_head):
+        """Return a retrained copy, leaving self untouched (it may be serving).
+
+        The copy keeps the already fitted preprocessor so existing trees stay
+        valid; refresh_head(clf, Xt, y) -> clf updates each head, e.g. by
+        adding warm-start trees.
+        """
+        model = copy.deepcopy(self)
+        Xt = model.transform(X)
+        for name, clf in model.heads.items():
+            model.heads[name] = refresh_head(clf, Xt, targets[name])
+        return model
+
+    def score(self, X, targets):
+        """Accuracy of every head on X, from a single transform."""
+        results = self.predict(X)
+        return {name: float(np.mean(labels == np.asarray(targets[name])))
+                for name, (labels, _) in results.items()}
+
+    def transform(self, X):
+        return _as_csr(self.preprocessor.transform(X))
+
+    def predict(self, X):
+        """Return {head: (labels, probabilities)} from a single transform of X."""
+        Xt = self.transform(X)
+        results = {}
+        for name, clf in self.heads.items():
+            proba = clf.predict_proba(Xt)
+            # same rule RandomForestClassifier.predict uses, without a 2nd pass
+            labels = clf.classes_.take(np.argmax(proba, axis=1), axis=0)
+            results[name] = (labels, proba)
+        return results
+
+    def predict_proba(self, X, name):
+        """Probabilities of one head only."""
+        return self.heads[name].predict_proba(self.transform(X))
+
+    def classes(self, name):
+        return self.heads[name].classes_
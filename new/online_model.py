@@ -0,0 +1,132 @@
+"""
+Online (incremental) health status model.
+
+Alternative to the RandomForest from train_health_model(): a partial_fit
+estimator that learns each saved record in O(1) instead of refitting on the
+whole CSV. Accuracy is tracked prequentially ("test then train"): every
+incoming record is first predicted, scored, and only then learned, with a
+fading factor so the number follows recent performance.
+
+Estimators:
+  "nb"   GaussianNB (default, no scaling needed)
+  "sgd"  SGDClassifier(loss="log_loss") on running-standardised features
+"""
+
+import threading
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+
+FADING_FACTOR = 0.999
+BOOTSTRAP_BATCH = 256
+
+
+class RunningScaler:
+    """Streaming mean/variance standardisation (batched Welford update)."""
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        # Chan et al. merge of the batch statistics into the running ones
+        n_b = len(X)
+        if not n_b:
+            return
+        mean_b = X.mean(axis=0)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0)
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+    def transform(self, X):
+        if self.n < 2:
+            return X - self.mean
+        std = np.sqrt(self.m2 / (self.n - 1))
+        std[std == 0] = 1.0
+        return (X - self.mean) / std
+
+
+class OnlineHealthModel:
+    """partial_fit health model with prequential accuracy.
+
+    classes must list every Health Status label up front (partial_fit needs
+    them on the first call). Records with an unknown label are counted in
+    skipped but not learned; the next full retrain picks them up.
+    """
+
+    def __init__(self, classes, estimator="nb", n_features=3, fading=FADING_FACTOR):
+        self.classes_ = np.array(sorted(set(classes)))
+        self.kind = estimator
+        if estimator == "sgd":
+            self.estimator = SGDClassifier(loss="log_loss", random_state=42)
+            self.scaler = RunningScaler(n_features)
+        elif estimator == "nb":
+            self.estimator = GaussianNB()
+            self.scaler = None
+        else:
+            raise ValueError(f"Unknown online estimator: {estimator}")
+
+        self.fading = fading
+        self.correct = 0.0
+        self.seen = 0.0
+        self.learned = 0
+        self.skipped = 0
+        self._fitted = False
+        # predict/learn are O(1); the lock keeps a request from reading
+        # half-updated estimator arrays while a save is being learned
+        self._lock = threading.Lock()
+
+    @property
+    def prequential_accuracy(self):
+        return self.correct / self.seen if self.seen else 0.0
+
+    def _features(self, X):
+        X = np.asarray(X, dtype=float)
+        if self.scaler is not None:
+            return self.scaler.transform(X)
+        return X
+
+    def _learn(self, X, y):
+        known = np.isin(y, self.classes_)
+        self.skipped += int((~known).sum())
+        X, y = X[known], y[known]
+        if not len(y):
+            return
+
+        # test ...
+        if self._fitted:
+            hits = self.estimator.predict(self._features(X)) == y
+            for hit in hits:
+                self.correct = self.fading * self.correct + float(hit)
+                self.seen = self.fading * self.seen + 1.0
+
+        # ... then train
+        if self.scaler is not None:
+            self.scaler.update(X)
+        self.estimator.partial_fit(self._features(X), y, classes=self.classes_)
+        self._fitted = True
+        self.learned += len(y)
+
+    def learn_one(self, x, label):
+        with self._lock:
+            self._learn(np.asarray([x], dtype=float), np.asarray([str(label)]))
+
+    def learn_many(self, X, y, batch=BOOTSTRAP_BATCH):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y).astype(str)
+        with self._lock:
+            for start in range(0, len(y), batch):
+                self._learn(X[start:start + batch], y[start:start + batch])
+        return self
+
+    def predict(self, X):
+        with self._lock:
+            return self.estimator.predict(self._features(X))
+
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y).astype(str)))
@@ -0,0 +1,104 @@
+"""
+Pre-fork loading for multi-worker deployments (gunicorn, see gunicorn.conf.py).
+
+The master process imports the app with VET_WARMUP=prefork, which trains the
+models and builds the record index once, before any worker is forked. The
+workers then share those pages copy-on-write instead of each holding its own
+copy. Two things keep the pages shared:
+
+  - the bulky data lives in NumPy buffers (the forests' node arrays, the
+    read-only RecordIndex arrays below) that request handling only reads;
+  - freeze_heap() runs gc.freeze() right before forking, so the garbage
+    collector in a worker never walks (and so never writes to) the objects
+    inherited from the master.
+
+A worker that retrains or rebuilds the index gets private copies of what it
+replaced; everything else stays shared.
+"""
+
+import gc
+import os
+import re
+
+from lazy_loading import LazyModule
+
+np = LazyModule("numpy")
+
+
+def freeze_array(a):
+    a = np.ascontiguousarray(a)
+    a.setflags(write=False)
+    return a
+
+
+def freeze_heap():
+    """Collect once, then move every surviving object out of the GC's reach."""
+    gc.collect()
+    gc.freeze()
+
+
+# "001", "+1" and 1.0 (an ID column with blanks reads as floats) are all 1
+_WHOLE_NUMBER = re.compile(r"[+-]?\d+(\.0*)?")
+
+
+def id_key(animal_id):
+    """Animal ID as the index compares it, whether it was read as text or parsed.
+
+    pd.read_csv turns "001" into 1 unless told dtype=str, so numeric IDs lose
+    their leading zeros (and blanks become NaN, here ""). Every constructor
+    and lookup goes through this, so they all agree.
+    """
+    if animal_id is None or animal_id != animal_id:  # NaN
+        return ""
+    text = str(animal_id).strip()
+    if _WHOLE_NUMBER.fullmatch(text):
+        return str(int(text.split(".")[0]))
+    return text
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class RecordIndex:
+    """Animal ID -> row position in the CSV, as two read-only sorted arrays.
+
+    The IDs are kept as a fixed-width unicode array rather than a dict of
+    Python strings, so the index is one flat buffer that forked workers can
+    share without touching a refcount per entry.
+    """
+
+    def __init__(self, ids, fingerprint=None):
+        ids = np.asarray([id_key(i) for i in ids], dtype=str)
+        order = np.argsort(ids, kind="stable")
+        self.ids = freeze_array(ids[order])
+        self.rows = freeze_array(order.astype(np.int64))
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_frame(cls, df, fingerprint=None):
+        return cls(df["Animal ID"].to_numpy(), fingerprint)
+
+    @classmethod
+    def from_csv(cls, path):
+        import pandas as pd
+
+        fingerprint = file_fingerprint(path)
+        ids = pd.read_csv(path, usecols=["Animal ID"], dtype=str)["Animal ID"]
+        return cls(ids.to_numpy(), fingerprint)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lookup(self, animal_id):
+        """Row position of the first record with this ID, or None."""
+        key = id_key(animal_id)
+        if len(key) > self.ids.dtype.itemsize // 4:
+            # longer than every stored ID; searching would also make NumPy
+            # widen (copy) the whole array to the key's width
+            return None
+        i = int(np.searchsorted(self.ids, key))
+        if i < len(self.ids) and self.ids[i] == key:
+            return int(self.rows[i])
+        return None
@@ -2,36 +2,64 @@
 """
 CLEAN FIXED FULL FLASK APP
 SCAN ROUTE ADDED + DUPLICATES REMOVED
+
+Startup is lazy: pandas/numpy load on first use, and sklearn, reportlab and
+the models load in a background warm-up (see lazy_loading.py), so /scan,
+/dashboard and /healthz answer right away. VET_WARMUP=eager loads
+everything at import instead.
 """
 
-from flask import Flask, render_template_string, render_template, request, redirect, url_for, send_file
-import pandas as pd
-import numpy as np
+from flask import Flask, render_template_string, render_template, request, redirect, url_for, send_file, abort, jsonify
+import datetime
+import math
 import os
 import re
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
+import copy
+import uuid
+from collections import namedtuple
+
+from lazy_loading import LazyModule, WarmUp
+from prefork import RecordIndex
+from record_store import RecordStore, StoreView, RecordNotFound, VersionConflict
+from vaccination import HISTORY_COLUMN, history, recommendations, with_dose
+from retrainer import ModelRegistry, BackgroundRetrainer
+from metrics import span, instrument_app
+from sampler import register_profiler_routes
+from features import (health_features, health_row, all_features, numerical_features,
+                      categorical_features, training_columns, chat_frame, chat_targets, chat_defaults,
+                      holdout_split)
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
 
 app = Flask(__name__)
+instrument_app(app)  # per-route timings + GET /metrics (Prometheus text)
+register_profiler_routes(app)  # /admin/profile/*, needs VET_ADMIN_TOKEN
 
 # ---------------------------
 # CSV location
 # ---------------------------
-CSV_FILE = r"c:/Users/hp/OneDrive/Desktop/new/Animal_Health_Record_500.csv"
+# VET_CSV_FILE lets load tests point the app at a synthetic herd
+CSV_FILE = os.environ.get("VET_CSV_FILE", r"c:/Users/hp/OneDrive/Desktop/new/Animal_Health_Record_500.csv")
 FALLBACK_CSV = "/mnt/data/Animal_Health_Record_500.csv"
+# VET_SHARD_MAP splits the records into per-clinic shard files routed by
+# Animal ID prefix (sharded_store.py); CSV_FILE is then the default shard
+SHARD_MAP = os.environ.get("VET_SHARD_MAP")
 
-if not os.path.exists(CSV_FILE):
+if not SHARD_MAP and not os.path.exists(CSV_FILE):
     if os.path.exists(FALLBACK_CSV):
         CSV_FILE = FALLBACK_CSV
     else:
         raise FileNotFoundError("CSV NOT FOUND — FIX CSV_FILE PATH")
 
+# typed Parquet snapshot of the CSV for read paths (see record_store.py)
+if SHARD_MAP:
+    from sharded_store import ShardedStore
+    records = ShardedStore(SHARD_MAP)
+    CSV_FILE = records.csv_path
+else:
+    records = RecordStore(CSV_FILE, os.environ.get("VET_SNAPSHOT_FILE"))
+
 @app.route("/")
 def home_redirect():
     return redirect("/dashboard")
@@ -39,22 +67,50 @@ def home_redirect():
 # ---------------------------
 # Train basic health model
 # ---------------------------
-def train_health_model(csv_path):
-    df_local = pd.read_csv(csv_path)
-    df_local["BP_num"] = df_local["BP"].astype(str).str.split("/").str[0].astype(float)
-    df_local["Heart Rate (bpm)"] = pd.to_numeric(df_local["Heart Rate (bpm)"], errors="ignore").fillna(0)
-    df_local["Age (years)"] = pd.to_numeric(df_local["Age (years)"], errors="ignore").fillna(0)
+# "forest" = RandomForest refit on retrain, "online" = partial_fit model that
+# learns every changed record: saves, imports and sync (see online_model.py)
+HEALTH_MODEL_MODE = os.environ.get("VET_HEALTH_MODEL", "forest")
+ONLINE_ESTIMATOR = os.environ.get("VET_ONLINE_ESTIMATOR", "nb")
+# "memory" = load the training columns at once; "stream" = read the record
+# source in chunks (VET_STREAM_CHUNK rows), forests get a reservoir sample
+# of VET_STREAM_SAMPLE rows and the online model learns every row
+# (stream_training.py)
+TRAIN_MODE = os.environ.get("VET_TRAIN_MODE", "memory")
+# .csv or .parquet; defaults to the app's own CSV
+TRAIN_SOURCE = os.environ.get("VET_TRAIN_SOURCE", CSV_FILE)
+if TRAIN_MODE == "stream" and SHARD_MAP and "VET_TRAIN_SOURCE" not in os.environ:
+    raise ValueError("Streaming training reads one file: with VET_SHARD_MAP set VET_TRAIN_SOURCE "
+                     "(e.g. a Parquet export of all shards)")
+
+def train_health_model(df):
+    from forest_training import fit_forest
+
+    train, holdout = holdout_split(df)
+    clf = fit_forest(*health_features(train))
+    acc = clf.score(*health_features(holdout))
+    return clf, acc
 
-    X = df_local[["BP_num", "Heart Rate (bpm)", "Age (years)"]]
-    y = df_local["Health Status"].astype(str)
+def train_online_health_model(df):
+    from online_model import OnlineHealthModel
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    clf = RandomForestClassifier(random_state=42)
-    clf.fit(X_train, y_train)
-    acc = clf.score(X_test, y_test)
-    return clf, acc
+    X, y = health_features(df)
+    clf = OnlineHealthModel(y.unique(), estimator=ONLINE_ESTIMATOR).learn_many(X, y)
+    return clf, clf.prequential_accuracy
 
-model, accuracy = train_health_model(CSV_FILE)
+def stream_online_health_model(source):
+    from online_model import OnlineHealthModel
+    from stream_training import iter_chunks, column_values, learn_chunks
+
+    clf = OnlineHealthModel(column_values(source, "Health Status"), estimator=ONLINE_ESTIMATOR)
+    learn_chunks(clf, iter_chunks(source, training_columns), health_features)
+    return clf, clf.prequential_accuracy
+
+def training_frame(store):
+    """Records the forests train on: all of them, or a bounded sample when streaming."""
+    if TRAIN_MODE == "stream":
+        from stream_training import iter_chunks, reservoir_sample
+        return reservoir_sample(iter_chunks(TRAIN_SOURCE, training_columns))
+    return store.read(training_columns)
 
 # ---------------------------
 # Quick symptom map
@@ -135,8 +191,10 @@ def dashboard():
       <h1>Animal Health Prediction Dashboard</h1>
 
       <form action="/display" method="get">
-        <input type="text" name="animal_id" placeholder="Enter Animal ID" required
+        <input type="text" name="animal_id" placeholder="Enter Animal ID or name" required
+               id="animalSearch" list="animalSuggestions" autocomplete="off"
                style="padding:10px; width:250px;">
+        <datalist id="animalSuggestions"></datalist>
         <br><br>
         <button type="submit" style="padding:10px 20px; background:#0077b6; color:white;
                  border:none; border-radius:8px;">View Record</button>
@@ -151,6 +209,36 @@ def dashboard():
 
       <br><br>
       <a href="/chat" style="font-size:18px; color:#004c70;">💬 Try Health Chatbot</a>
+      <br><br>
+      <a href="/analytics" style="font-size:18px; color:#004c70;">📊 Herd Analytics</a>
+      <br><br>
+      <a href="/vaccinations" style="font-size:18px; color:#004c70;">💉 Vaccinations Due</a>
+      <br><br>
+      <a href="/worklist" style="font-size:18px; color:#004c70;">🚑 Triage Worklist</a>
+      <br><br>
+      <a href="/import" style="font-size:18px; color:#004c70;">📥 Bulk Import</a>
+
+      <script>
+        // suggest IDs / names while typing; picking one fills in the Animal ID
+        const box = document.getElementById("animalSearch");
+        const list = document.getElementById("animalSuggestions");
+        let latest = 0;
+        box.addEventListener("input", async () => {
+          const q = box.value.trim();
+          const ticket = ++latest;
+          if (!q) { list.innerHTML = ""; return; }
+          const resp = await fetch("/api/suggest?q=" + encodeURIComponent(q));
+          if (!resp.ok || ticket !== latest) return;
+          const data = await resp.json();
+          list.innerHTML = "";
+          for (const a of data.suggestions) {
+            const opt = document.createElement("option");
+            opt.value = a["Animal ID"];
+            opt.label = a["Name"] + " (" + a["Species"] + ")";
+            list.appendChild(opt);
+          }
+        });
+      </script>
     </body>
     """
 
@@ -208,54 +296,62 @@ def scan():
 # ---------------------------
 # Display & update record
 # ---------------------------
+def conflict_page(animal_id):
+    return (f"<h3>Animal {animal_id} was updated by someone else while you were editing. "
+            f"Your changes were not saved.</h3>"
+            f"<a href='/display?animal_id={animal_id}'>Reload the record</a> and apply them again.")
+
 @app.route('/display', methods=['GET', 'POST'])
 def display():
     animal_id = request.args.get('animal_id') or request.form.get('animal_id')
     if not animal_id:
         return "<h3>No Animal ID provided!</h3><a href='/dashboard'>Back</a>"
 
-    # read CSV fresh each request
-    df = pd.read_csv(CSV_FILE)
+    # Handle POST from update form (not vaccine)
+    if request.method == "POST" and request.form.get("new_vaccine") is None:
+        changes = {
+            "Symptom 1": request.form.get("Symptom1", "").strip(),
+            "Symptom 2": request.form.get("Symptom2", "").strip(),
+            "Doctor Suggestion": request.form.get("suggestion", "").strip(),
+            "Special Care": "Yes" if request.form.get("special_care") else "No",
+        }
+        try:
+            with span("csv_save"):
+                record = records.update(animal_id, lambda row: changes, request.form.get("version"))
+        except RecordNotFound:
+            return f"<h3>No record found for Animal ID: {animal_id}</h3><a href='/dashboard'>Back</a>"
+        except VersionConflict:
+            return conflict_page(animal_id), 409
+        record_saved(record)
+        return redirect(url_for('display', animal_id=animal_id))
 
-    # ensure optional columns exist
-    for col in ["Doctor Suggestion", "Vaccination 1", "Vaccination 2", "Special Care", "Detected Disease"]:
-        if col not in df.columns:
-            df[col] = ""
+    # the CSV as last parsed, re-read only after it changed (only the
+    # animal's shard when sharded); shared, so it isn't modified here
+    with span("csv_load"):
+        store = records.shard_for(animal_id)
+        df, fingerprint = store.cached_csv()
 
     # find record
-    record_index = df.index[df["Animal ID"].astype(str) == str(animal_id)]
-    if record_index.empty:
+    with span("record_lookup"):
+        idx = record_position(df, animal_id, fingerprint, store.csv_path)
+    if idx is None:
         return f"<h3>No record found for Animal ID: {animal_id}</h3><a href='/dashboard'>Back</a>"
 
-    idx = record_index[0]
-
-    # Handle POST from update form (not vaccine)
-    if request.method == "POST" and request.form.get("new_vaccine") is None:
-        new_symptom1 = request.form.get("Symptom1", "").strip()
-        new_symptom2 = request.form.get("Symptom2", "").strip()
-        suggestion = request.form.get("suggestion", "").strip()
-        special_checked = request.form.get("special_care")
-        df.at[idx, "Symptom 1"] = new_symptom1
-        df.at[idx, "Symptom 2"] = new_symptom2
-        df.at[idx, "Doctor Suggestion"] = suggestion
-        df.at[idx, "Special Care"] = "Yes" if special_checked else "No"
-        df = df.replace({np.nan: ""})
-        df.to_csv(CSV_FILE, index=False)
-        return redirect(url_for('display', animal_id=animal_id))
-
-    # prepare data for display
-    data = df.iloc[idx].to_dict()
+    # prepare data for display; optional columns may be missing
+    data = dict.fromkeys(["Doctor Suggestion", "Vaccination 1", "Vaccination 2", HISTORY_COLUMN,
+                          "Special Care", "Detected Disease"], "")
+    data.update(df.iloc[idx].to_dict())
     for k, v in list(data.items()):
         if pd.isna(v) or str(v).lower() == "nan":
             data[k] = ""
         else:
             data[k] = v
 
+    # one bundle for the whole request, even if a retrain swaps it meanwhile
+    bundle = loaded_models()
+
     # disease prediction: try symptom map first, else health model
     try:
-        bp_value = float(str(data.get("BP", "0")).split("/")[0])
-        hr = float(data.get("Heart Rate (bpm)", 0) or data.get("Heart Rate", 0) or 0)
-        age = float(data.get("Age (years)", 0) or data.get("Age", 0) or 0)
         sym1 = str(data.get("Symptom 1", "")).lower()
         sym2 = str(data.get("Symptom 2", "")).lower()
         disease = None
@@ -266,13 +362,18 @@ def display():
         if disease:
             prediction = f"{disease} 🔴"
         else:
-            prediction = f"{model.predict([[bp_value, hr, age]])[0]} 🟢"
+            with span("feature_encoding"):
+                row = [health_row(data)]
+            with span("inference"):
+                label = bundle.model.predict(row)[0]
+            prediction = f"{label} 🟢"
     except Exception as e:
         print("Prediction error:", e)
         prediction = "Healthy 🟢"
 
     # render a simple but functional HTML page for the record (keeps layout minimal to avoid template mismatch)
-    return render_template_string("""
+    with span("template_render"):
+        return render_template_string("""
     <!doctype html>
     <html>
     <head><meta charset="utf-8"><title>Animal Record</title>
@@ -285,12 +386,30 @@ def display():
       <p><b>Detected Disease:</b> {{ prediction }} &nbsp; <span style="color:#666">Model Acc: {{ accuracy }}%</span></p>
       <hr>
       <h4>Vaccination History</h4>
-      <p>1) {{ data.get('Vaccination 1','—') }}</p>
-      <p>2) {{ data.get('Vaccination 2','—') }}</p>
+      {% for dose in doses|reverse %}
+        <p>{{ loop.index }}) {{ dose.vaccine }}{% if dose.date %} ({{ dose.date }}){% endif %}</p>
+      {% else %}
+        <p>—</p>
+      {% endfor %}
+
+      <h4>📌 Recommended Vaccines</h4>
+      {% if due %}
+      <table style="border-collapse:collapse">
+        <tr><th align="left">Vaccine</th><th align="left">Last dose</th><th align="left">Next due</th><th></th></tr>
+        {% for row in due %}
+        <tr><td style="padding-right:14px">{{ row.vaccine }}</td><td style="padding-right:14px">{{ row.last or '—' }}</td>
+            <td style="padding-right:14px">{{ row.due or 'now' }}</td>
+            <td style="color:{{ {'overdue':'#c00','due this week':'#d97706','not given':'#666'}.get(row.status,'#2a9d8f') }}">{{ row.status }}</td></tr>
+        {% endfor %}
+      </table>
+      {% else %}
+        <p style="color:#666">No schedule for {{ data.get('Species','this species') }}.</p>
+      {% endif %}
 
       <button onclick="document.getElementById('vaccineForm').style.display='block'">+ Add Vaccination</button>
       <form id="vaccineForm" method="POST" action="{{ url_for('add_vaccine') }}" style="display:none;margin-top:8px;">
         <input type="hidden" name="animal_id" value="{{ data['Animal ID'] }}">
+        <input type="hidden" name="version" value="{{ data.get('Version') or 0 }}">
         <input name="new_vaccine" placeholder="Vaccine name" required>
         <input name="vaccine_date" type="date" required>
         <button type="submit">Save Vaccine</button>
@@ -298,6 +417,7 @@ def display():
 
       <hr>
       <form method="POST">
+        <input type="hidden" name="version" value="{{ data.get('Version') or 0 }}">
         <input type="text" name="Symptom1" placeholder="Symptom 1" value="{{ data.get('Symptom 1','') }}">
         <input type="text" name="Symptom2" placeholder="Symptom 2" value="{{ data.get('Symptom 2','') }}"><br><br>
         <input type="text" name="suggestion" placeholder="Doctor Suggestion" style="width:80%" value="{{ data.get('Doctor Suggestion','') }}"><br><br>
@@ -315,7 +435,8 @@ def display():
     </div>
     </body>
     </html>
-    """, data=data, prediction=prediction, accuracy=round(accuracy*100,2))
+    """, data=data, prediction=prediction, accuracy=round(current_accuracy(bundle)*100,2),
+        doses=history(data), due=recommendations(data))
 
 
 # ---------------------------
@@ -328,37 +449,444 @@ def add_vaccine():
     vaccine_date = request.form.get('vaccine_date', '').strip()
     if not animal_id or not new_vaccine or not vaccine_date:
         return "Missing data", 400
+    try:
+        datetime.date.fromisoformat(vaccine_date)
+    except ValueError:
+        return "Invalid vaccine date", 400
 
-    df = pd.read_csv(CSV_FILE)
-    if "Vaccination 1" not in df.columns:
-        df["Vaccination 1"] = ""
-    if "Vaccination 2" not in df.columns:
-        df["Vaccination 2"] = ""
-
-    record_index = df.index[df["Animal ID"].astype(str) == str(animal_id)]
-    if record_index.empty:
+    try:
+        with span("csv_save"):
+            record = records.update(animal_id, lambda row: with_dose(row, new_vaccine, vaccine_date),
+                                    request.form.get("version"))
+    except RecordNotFound:
         return f"No record found for Animal ID {animal_id}", 404
-
-    idx = record_index[0]
-    previous_v1 = df.at[idx, "Vaccination 1"] if pd.notna(df.at[idx, "Vaccination 1"]) else ""
-    df.at[idx, "Vaccination 2"] = previous_v1
-    df.at[idx, "Vaccination 1"] = f"{new_vaccine} ({vaccine_date})"
-    df = df.replace({np.nan: ""})
-    df.to_csv(CSV_FILE, index=False)
+    except VersionConflict:
+        return conflict_page(animal_id), 409
+    record_saved(record)
     return redirect(url_for('display', animal_id=animal_id))
 
 
+# ---------------------------
+# Bulk import
+# ---------------------------
+# CSV/XLSX upload validated and upserted in one commit (record_import.py);
+# /api/import returns the same report as JSON
+def run_import():
+    from record_import import import_records, ImportFileError
+    from sharded_store import PartialCommitError
+
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return None, "Choose a CSV or Excel file to import."
+    try:
+        with span("bulk_import"):
+            report = import_records(records, upload.stream, upload.filename,
+                                    dry_run=bool(request.form.get("dry_run")))
+    except ImportFileError as e:
+        return None, str(e)
+    except PartialCommitError as e:
+        # the shards before the failing one keep their rows
+        retrainer.record_changed(sum(i + u for i, u in e.committed.values()))
+        return None, str(e)
+    if report["inserted"] or report["updated"]:
+        retrainer.record_changed(report["inserted"] + report["updated"])
+    return report, None
+
+@app.route('/api/import', methods=['POST'])
+def api_import():
+    report, error = run_import()
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(report)
+
+@app.route('/import', methods=['GET', 'POST'])
+def import_page():
+    report, error = run_import() if request.method == "POST" else (None, None)
+    return render_template_string("""
+    <!doctype html>
+    <html>
+    <head><meta charset="utf-8"><title>Bulk Import</title>
+    <style>body{font-family:Arial;padding:18px;background:#f4fbf6} .card{max-width:900px;margin:auto;background:#fff;padding:18px;border-radius:10px;box-shadow:0 6px 18px rgba(0,0,0,0.06)}
+    table{border-collapse:collapse;width:100%} td,th{padding:6px 8px;border-bottom:1px solid #eee;text-align:left}</style>
+    </head><body>
+    <div class="card">
+      <h2>📥 Bulk Import</h2>
+      <p>Upload a CSV or Excel (.xlsx) file with the same columns as the records. Animal ID and Species are required;
+         existing animals are updated with the non-empty cells, new ones are added.</p>
+      <form method="POST" enctype="multipart/form-data">
+        <input type="file" name="file" accept=".csv,.xlsx" required>
+        <label><input type="checkbox" name="dry_run" value="1"> Only check the file</label>
+        <button type="submit">Import</button>
+      </form>
+      {% if error %}<p style="color:#c00"><b>{{ error }}</b></p>{% endif %}
+      {% if report %}
+        <hr>
+        <p><b>{{ report.rows }}</b> rows read, <b>{{ report.valid }}</b> valid
+           {% if report.dry_run %}(nothing saved){% else %}— {{ report.inserted }} added, {{ report.updated }} updated{% endif %},
+           <b style="color:{{ '#c00' if report.error_count else '#2a9d8f' }}">{{ report.error_count }}</b> rejected.</p>
+        {% if report.ignored_columns %}<p style="color:#666">Ignored columns: {{ report.ignored_columns|join(', ') }}</p>{% endif %}
+        {% if report.errors %}
+        <table><tr><th>Row</th><th>Animal ID</th><th>Problems</th></tr>
+        {% for e in report.errors %}<tr><td>{{ e.row }}</td><td>{{ e['Animal ID'] }}</td><td>{{ e.errors|join('; ') }}</td></tr>{% endfor %}
+        </table>
+        {% if report.error_count > report.errors|length %}<p style="color:#666">First {{ report.errors|length }} problems shown.</p>{% endif %}
+        {% endif %}
+      {% endif %}
+      <p style="text-align:center"><a href="/dashboard">⬅ Back</a></p>
+    </div>
+    </body></html>
+    """, report=report, error=error)
+
+
+# ---------------------------
+# Record export
+# ---------------------------
+# /api/export?format=csv|jsonl|parquet[&since=<Updated At>][&columns=a,b]
+# streams the records (record_export.py); X-Export-Watermark is the since=
+# for the next delta
+@app.route('/api/export')
+def api_export():
+    from flask import Response, stream_with_context
+    from record_export import FORMATS, export, parse_since, watermark
+
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in FORMATS:
+        abort(400, f"format must be one of {', '.join(FORMATS)}")
+    try:
+        since = parse_since(request.args.get("since"))
+    except ValueError:
+        abort(400, "since must be an ISO timestamp, e.g. 2026-10-01T00:00:00+00:00")
+    columns = [c.strip() for c in request.args.get("columns", "").split(",") if c.strip()] or None
+
+    mark = watermark(records) or ""
+    mimetype, ext = FORMATS[fmt]
+    name = "records" + ("-since-" + since[:10] if since else "") + ext
+    return Response(stream_with_context(export(records, fmt, since, columns)), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={name}",
+                             "X-Export-Watermark": mark})
+
+
+# ---------------------------
+# Clinic sync
+# ---------------------------
+# every node journals its record changes; clinics push/pull deltas to the
+# hub at VET_SYNC_HUB (clinic_sync.py). Routes need VET_SYNC_TOKEN.
+SYNC_TOKEN = os.environ.get("VET_SYNC_TOKEN", "")
+SYNC_HUB = os.environ.get("VET_SYNC_HUB", "")
+sync_node = None
+sync_loop = None
+
+if SYNC_TOKEN:
+    from clinic_sync import SyncNode, SyncLoop, SyncError, InvalidEntry
+    sync_node = SyncNode(records, token=SYNC_TOKEN)
+    if SYNC_HUB:
+        sync_loop = SyncLoop(sync_node, SYNC_HUB,
+                             on_synced=lambda summary: retrainer.record_changed(summary["applied"] + summary["merged"]))
+
+def require_sync_token():
+    import hmac
+    given = request.headers.get("X-Sync-Token", "")
+    if sync_node is None or not hmac.compare_digest(given, SYNC_TOKEN):
+        abort(403)
+
+@app.route('/api/sync/push', methods=['POST'])
+def api_sync_push():
+    require_sync_token()
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error="expected a JSON object with entries"), 400
+    with span("sync_push"):
+        try:
+            counts = sync_node.receive(payload.get("entries", []))
+        except InvalidEntry as e:
+            return jsonify(error=str(e)), 400
+    retrainer.record_changed(counts["applied"] + counts["merged"])
+    return jsonify(counts)
+
+@app.route('/api/sync/pull')
+def api_sync_pull():
+    require_sync_token()
+    try:
+        since = int(request.args.get("since", 0))
+        limit = max(1, min(int(request.args.get("limit", 500)), 5000))
+    except ValueError:
+        abort(400, "since and limit must be integers")
+    with span("sync_pull"):
+        return jsonify(sync_node.pull_page(request.args.get("node", ""), since, limit))
+
+@app.route('/api/sync/status')
+def api_sync_status():
+    require_sync_token()
+    status = sync_node.status()
+    status["hub"] = SYNC_HUB or None
+    return jsonify(status)
+
+@app.route('/api/sync/conflicts')
+def api_sync_conflicts():
+    require_sync_token()
+    return jsonify(sync_node.conflicts())
+
+@app.route('/api/sync/run', methods=['POST'])
+def api_sync_run():
+    require_sync_token()
+    if sync_loop is None:
+        abort(400, "No hub configured (VET_SYNC_HUB)")
+    try:
+        return jsonify(sync_loop.run_once())
+    except SyncError as e:
+        return jsonify({"error": str(e)}), 502
+
+
+# ---------------------------
+# Herd search API
+# ---------------------------
+# /api/animals?species=Cow,Buffalo&health_status=Sick&age_min=2&vaccinated=no&limit=50
+# answers from bitmap indexes (herd_index.py); pass next_cursor back as
+# ?cursor= for the next page. /api/suggest?q=bra autocompletes IDs and names.
+def build_herd_index(store):
+    from herd_index import HerdIndex
+    return HerdIndex.from_store(store)
+
+herd = StoreView(records, build_herd_index)
+
+@app.route('/api/animals')
+def api_animals():
+    from herd_index import ATTRIBUTES, RANGES
+
+    filters = {}
+    for param in ATTRIBUTES:
+        wanted = [v.strip() for v in request.args.get(param, "").split(",") if v.strip()]
+        if wanted:
+            filters[param] = wanted
+    ranges = {}
+    for param in RANGES:
+        bounds = []
+        for bound in (f"{param}_min", f"{param}_max"):
+            raw = request.args.get(bound, "").strip()
+            try:
+                value = float(raw) if raw else None
+            except ValueError:
+                value = math.nan
+            if value is not None and not math.isfinite(value):
+                return jsonify(error=f"{bound} must be a number"), 400
+            bounds.append(value)
+        if bounds != [None, None]:
+            ranges[param] = tuple(bounds)
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 500))
+        cursor = int(request.args.get("cursor", -1))
+    except ValueError:
+        return jsonify(error="limit and cursor must be integers"), 400
+
+    with span("herd_search"):
+        try:
+            total, animals, next_cursor = herd.get().search(filters, ranges, cursor, limit)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+    return jsonify(count=total, animals=animals, next_cursor=next_cursor)
+
+
+@app.route('/api/suggest')
+def api_suggest():
+    limit = max(1, min(request.args.get("limit", default=8, type=int), 50))
+    with span("suggest"):
+        suggestions = herd.get().suggest(request.args.get("q", ""), limit)
+    return jsonify(suggestions=suggestions)
+
+
+# ---------------------------
+# Vaccinations due
+# ---------------------------
+# /api/vaccinations/due?days=7 -> boosters due from today to 7 days ahead;
+# overdue=yes includes everything due before today (vaccination.py)
+def build_due_index(store):
+    from vaccination import DueIndex
+    return DueIndex.from_store(store)
+
+vaccinations_due = StoreView(records, build_due_index)
+
+def due_query():
+    today = datetime.date.today()
+    try:
+        days = int(request.args.get("days", 7))
+        limit = min(int(request.args.get("limit", 100)), 1000)
+    except ValueError:
+        abort(400, "days and limit must be integers")
+    start = None if request.args.get("overdue", "").lower() in ("1", "yes", "true") else today
+    with span("vaccinations_due"):
+        found = vaccinations_due.get().due(start, today + datetime.timedelta(days=days), limit)
+    return found, days
+
+@app.route('/api/vaccinations/due')
+def api_vaccinations_due():
+    found, _days = due_query()
+    return jsonify(found)
+
+@app.route('/vaccinations')
+def vaccinations_page():
+    found, days = due_query()
+    return render_template_string("""
+    <!doctype html>
+    <html>
+    <head><meta charset="utf-8"><title>Vaccinations Due</title>
+    <style>body{font-family:Arial;padding:18px;background:#f4fbf6} .card{max-width:900px;margin:auto;background:#fff;padding:18px;border-radius:10px;box-shadow:0 6px 18px rgba(0,0,0,0.06)}
+    table{border-collapse:collapse;width:100%} td,th{padding:6px 8px;border-bottom:1px solid #eee;text-align:left}</style>
+    </head><body>
+    <div class="card">
+      <h2>💉 Vaccinations due in the next {{ days }} days</h2>
+      <p>{{ found.total }} booster(s) due. <a href="?days={{ days }}&overdue=yes">Include overdue</a></p>
+      <table><tr><th>Due</th><th>Animal ID</th><th>Name</th><th>Species</th><th>Vaccine</th></tr>
+      {% for row in found.results %}
+        <tr><td>{{ row.due }}</td><td><a href="/display?animal_id={{ row['Animal ID'] }}">{{ row['Animal ID'] }}</a></td>
+            <td>{{ row.Name }}</td><td>{{ row.Species }}</td><td>{{ row.vaccine }}</td></tr>
+      {% endfor %}
+      </table>
+      <p style="text-align:center"><a href="/dashboard">⬅ Back</a></p>
+    </div>
+    </body></html>
+    """, found=found, days=days)
+
+
+# ---------------------------
+# Triage worklist
+# ---------------------------
+# special-care and high-risk animals by priority (worklist.py); rebuilt
+# when the store changes outside this process or the models are retrained
+def chance_of_living(frame, bundle):
+    proba = bundle.chat_model.predict_proba(chat_frame(frame)[all_features], 'survival')
+    classes = list(bundle.chat_model.classes('survival'))
+    return proba[:, classes.index("Will Live") if "Will Live" in classes else 0]
+
+def build_worklist(store):
+    from functools import partial
+    from worklist import Worklist
+    bundle = loaded_models()
+    return Worklist.from_store(store, partial(chance_of_living, bundle=bundle), bundle.version)
+
+worklist = StoreView(records, build_worklist)
+
+def worklist_top():
+    try:
+        n = min(int(request.args.get("n", 20)), 500)
+    except ValueError:
+        abort(400, "n must be an integer")
+    with span("worklist"):
+        view = worklist.get()
+        if view.model_version != loaded_models().version:
+            worklist.invalidate()
+            view = worklist.get()
+        return view.top(n), len(view)
+
+@app.route('/api/worklist')
+def api_worklist():
+    rows, total = worklist_top()
+    return jsonify({"total": total, "results": rows})
+
+@app.route('/worklist')
+def worklist_page():
+    rows, total = worklist_top()
+    return render_template_string("""
+    <!doctype html>
+    <html>
+    <head><meta charset="utf-8"><title>Triage Worklist</title>
+    <style>body{font-family:Arial;padding:18px;background:#f4fbf6} .card{max-width:1000px;margin:auto;background:#fff;padding:18px;border-radius:10px;box-shadow:0 6px 18px rgba(0,0,0,0.06)}
+    table{border-collapse:collapse;width:100%} td,th{padding:6px 8px;border-bottom:1px solid #eee;text-align:left}</style>
+    </head><body>
+    <div class="card">
+      <h2>🚑 Triage Worklist</h2>
+      <p>{{ total }} animal(s) flagged for special care or at risk; top {{ rows|length }} shown.</p>
+      <table><tr><th>#</th><th>Animal ID</th><th>Name</th><th>Species</th><th>Status</th><th>Special Care</th>
+                 <th>Chance of Living</th><th>Days since update</th><th>Priority</th></tr>
+      {% for row in rows %}
+        <tr><td>{{ loop.index }}</td><td><a href="/display?animal_id={{ row['Animal ID'] }}">{{ row['Animal ID'] }}</a></td>
+            <td>{{ row.Name }}</td><td>{{ row.Species }}</td><td>{{ row['Health Status'] }}</td>
+            <td>{{ '⭐' if row.special_care else '' }}</td><td>{{ (row.chance_of_living * 100)|round(1) }}%</td>
+            <td>{{ row.days_since_update }}</td><td>{{ row.priority }}</td></tr>
+      {% endfor %}
+      </table>
+      <p style="text-align:center"><a href="/dashboard">⬅ Back</a></p>
+    </div>
+    </body></html>
+    """, rows=rows, total=total)
+
+
+# ---------------------------
+# Herd analytics
+# ---------------------------
+# running aggregates updated on every save (herd_analytics.py)
+def build_herd_analytics(store):
+    from herd_analytics import HerdAnalytics
+    return HerdAnalytics.from_store(store)
+
+analytics = StoreView(records, build_herd_analytics)
+
+@app.route('/api/analytics')
+def api_analytics():
+    with span("analytics"):
+        return jsonify(analytics.get().summary())
+
+@app.route('/analytics')
+def analytics_page():
+    with span("analytics"):
+        summary = analytics.get().summary()
+    return render_template_string("""
+    <!doctype html>
+    <html>
+    <head><meta charset="utf-8"><title>Herd Analytics</title>
+    <style>body{font-family:Arial;padding:18px;background:#f4fbf6} .card{max-width:1000px;margin:0 auto 18px;background:#fff;padding:18px;border-radius:10px;box-shadow:0 6px 18px rgba(0,0,0,0.06)}
+    table{border-collapse:collapse;width:100%} td,th{padding:6px 8px;border-bottom:1px solid #eee;text-align:left}
+    .bar{background:#0077b6;height:10px;display:inline-block}</style>
+    </head><body>
+    <div class="card">
+      <h2>📊 Herd Analytics</h2>
+      <p><b>Animals:</b> {{ s.total }} &nbsp; <b>Special care:</b> {{ s.special_care }}
+         &nbsp; <b>Vaccination coverage:</b> {{ (s.vaccination_coverage * 100)|round(1) }}%</p>
+      <p>{% for status, n in s.health_status.items() %}{{ status }}: {{ n }}{% if not loop.last %} · {% endif %}{% endfor %}</p>
+    </div>
+    <div class="card">
+      <h3>By species</h3>
+      <table><tr><th>Species</th><th>Animals</th><th>Special care</th><th>Vaccinated</th><th>Top diseases (prevalence)</th></tr>
+      {% for sp, row in s.species.items() %}
+        <tr><td>{{ sp }}</td><td>{{ row.count }}</td><td>{{ row.special_care }}</td>
+            <td>{{ (row.vaccination_coverage * 100)|round(1) }}%</td>
+            <td>{% for d, v in row.diseases.items() %}{% if loop.index <= 3 %}{{ d }} ({{ (v.prevalence * 100)|round(1) }}%){% if loop.index < 3 and not loop.last %}, {% endif %}{% endif %}{% endfor %}</td></tr>
+      {% endfor %}
+      </table>
+    </div>
+    <div class="card">
+      <h3>Vital signs</h3>
+      <table><tr><th>Vital</th><th>Mean</th><th>Std</th><th>n</th><th>Distribution</th></tr>
+      {% for name, v in s.vitals.items() %}
+        {% set peak = [v.histogram.counts|max, 1]|max %}
+        <tr><td>{{ name.replace('_', ' ') }}</td><td>{{ v.mean }}</td><td>{{ v.std }}</td><td>{{ v.n }}</td>
+            <td>{% for c in v.histogram.counts %}<span class="bar" title="{{ v.histogram.low + loop.index0 * v.histogram.width }}+: {{ c }}"
+                 style="width:4px;height:{{ 2 + (30 * c / peak)|int }}px"></span>{% endfor %}</td></tr>
+      {% endfor %}
+      </table>
+      <p style="color:#666">JSON: <a href="/api/analytics">/api/analytics</a></p>
+    </div>
+    <p style="text-align:center"><a href="/dashboard">⬅ Back</a></p>
+    </body></html>
+    """, s=summary)
+
+
 # ---------------------------
 # PDF generation
 # ---------------------------
 @app.route('/generate_pdf', methods=['GET'])
 def generate_pdf():
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+
     animal_id = request.args.get('animal_id')
     if not animal_id:
         return "Missing animal_id", 400
 
-    df = pd.read_csv(CSV_FILE)
-    record_index = df.index[df["Animal ID"].astype(str) == str(animal_id)]
+    with span("csv_load"):
+        df = records.shard_for(animal_id).read()
+    with span("record_lookup"):
+        record_index = df.index[df["Animal ID"].astype(str) == str(animal_id)]
     if record_index.empty:
         return f"No record found for Animal ID {animal_id}", 404
 
@@ -404,7 +932,7 @@ def generate_pdf():
         ("Oxygen Saturation (%)", data.get('Oxygen Saturation (%)','') or data.get('Oxygen Saturation','')),
         ("Symptoms", f"{data.get('Symptom 1','')}{', ' + data.get('Symptom 2','') if data.get('Symptom 2','') else ''}"),
         ("Detected Disease", data.get('Detected Disease','') or ''),
-        ("Model Accuracy", f"{round(accuracy*100,2)}%"),
+        ("Model Accuracy", f"{round(current_accuracy(loaded_models())*100,2)}%"),
         ("Vaccination 1", data.get('Vaccination 1','')),
         ("Vaccination 2", data.get('Vaccination 2','')),
         ("Doctor Suggestion", data.get('Doctor Suggestion','')),
@@ -415,55 +943,292 @@ def generate_pdf():
         story.append(Paragraph(f"<b>{label}:</b> {text}", styles['Normal']))
         story.append(Spacer(1, 6))
 
-    doc.build(story)
+    with span("pdf_build"):
+        doc.build(story)
     return send_file(pdf_path, as_attachment=True)
 
 
 # ---------------------------
 # Chatbot training & models
 # ---------------------------
-# Load chat dataframe
-df_chat = pd.read_csv(CSV_FILE)
+def train_chat_model(df_chat):
+    from multihead_model import MultiHeadModel, build_preprocessor
+    from forest_training import make_forest, grow_forest, N_TREES
 
-# ensure columns
-if 'Disease' not in df_chat.columns:
-    df_chat['Disease'] = 'Unknown'
-if 'Symptom 1' not in df_chat.columns:
-    df_chat['Symptom 1'] = 'None'
-if 'Symptom 2' not in df_chat.columns:
-    df_chat['Symptom 2'] = 'None'
+    # Preprocessor (OneHot + Scale), kept in CSR format end to end
+    preprocessor_chat = build_preprocessor(numerical_features, categorical_features)
 
-fatal_diseases_list = ['Rabies', 'Anthrax', 'PPR (Peste des petits ruminants)']
-df_chat['Outcome'] = df_chat['Disease'].apply(lambda x: 'Will Not Live' if x in fatal_diseases_list else 'Will Live')
+    # Both models share one fitted preprocessor, so each row is encoded once
+    # Forests fit in parallel (VET_N_JOBS) within VET_TRAIN_BUDGET, see forest_training.py
+    chat_model = MultiHeadModel(preprocessor_chat, {
+        'survival': make_forest(),
+        'disease': make_forest(),
+    })
+    chat_model.fit(df_chat[all_features], chat_targets(df_chat),
+                   fit_head=lambda clf, X, y: grow_forest(clf, X, y, N_TREES))
+    return chat_model
 
-bp_split = df_chat['BP'].astype(str).str.split('/', expand=True)
-df_chat['BP_Systolic'] = pd.to_numeric(bp_split[0], errors='coerce').fillna(0)
-df_chat['BP_Diastolic'] = pd.to_numeric(bp_split[1], errors='coerce').fillna(0)
-df_chat['Heart Rate (bpm)'] = pd.to_numeric(df_chat['Heart Rate (bpm)'], errors='coerce').fillna(0)
 
-numerical_features = ['Heart Rate (bpm)', 'BP_Systolic', 'BP_Diastolic']
-categorical_features = ['Species', 'Breed', 'Sex', 'Health Status', 'Symptom 1', 'Symptom 2']
-all_features = numerical_features + categorical_features
+# ---------------------------
+# Model bundle + background retraining
+# ---------------------------
+# Everything a request needs from the models lives in one immutable bundle.
+# Routes read models.current() once; the retrainer swaps the whole bundle.
+ModelBundle = namedtuple("ModelBundle", "model accuracy chat_model chat_defaults version")
+
+# every Nth retrain also refits the chat preprocessor to pick up new categories
+FULL_REFIT_EVERY = 10
+
+# With VET_MODEL_DIR set, the forests are exported to flat files there and
+# served through np.memmap (forest_mmap.py): every process that loads them
+# shares one copy in the page cache, and later starts skip training. Not
+# used with the online health model, which keeps learning in memory.
+MODEL_DIR = os.environ.get("VET_MODEL_DIR") if HEALTH_MODEL_MODE != "online" else None
+BUNDLE_FILE = "bundle.pkl"
+
+def build_models(store):
+    if MODEL_DIR and os.path.exists(os.path.join(MODEL_DIR, BUNDLE_FILE)):
+        return load_saved_models()
+    df = training_frame(store)
+    if HEALTH_MODEL_MODE == "online" and TRAIN_MODE == "stream":
+        model, accuracy = stream_online_health_model(TRAIN_SOURCE)
+    elif HEALTH_MODEL_MODE == "online":
+        model, accuracy = train_online_health_model(df)
+    else:
+        model, accuracy = train_health_model(df)
+    df_chat = chat_frame(df)
+    chat_train, _ = holdout_split(df_chat)
+    bundle = ModelBundle(model, accuracy, train_chat_model(chat_train), chat_defaults(df_chat), 1)
+    if MODEL_DIR:
+        bundle = save_models(bundle)
+    return bundle
+
+# forests are written as <head>-v<version>-p<pid>-<random>.forest
+FOREST_FILE = re.compile(r".+-v\d+-p(\d+)-[0-9a-f]{8}\.forest")
+
+def pid_alive(pid):
+    if os.name == "nt":
+        return True  # os.kill would terminate it; leave its files alone
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # someone else's process
+    return True
+
+def save_models(bundle):
+    """Export the bundle's forests to MODEL_DIR; returns the memory-mapped bundle."""
+    import pickle
+    from forest_mmap import map_forest
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    def mapped(name, forest):
+        if not hasattr(forest, "estimators_"):
+            return forest  # already mapped
+        # every process counts its own versions, so the name carries the pid too
+        filename = f"{name}-v{bundle.version}-p{os.getpid()}-{uuid.uuid4().hex[:8]}.forest"
+        return map_forest(forest, os.path.join(MODEL_DIR, filename))
+
+    chat = copy.copy(bundle.chat_model)
+    chat.heads = {name: mapped(name, clf) for name, clf in chat.heads.items()}
+    bundle = bundle._replace(model=mapped("health", bundle.model), chat_model=chat)
+
+    # the pickle only holds the small parts plus the paths of the forests
+    tmp = os.path.join(MODEL_DIR, f"{BUNDLE_FILE}.tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        pickle.dump(bundle._asdict(), f)
+    os.replace(tmp, os.path.join(MODEL_DIR, BUNDLE_FILE))
+
+    # drop the forests bundle.pkl no longer points at that this process or a
+    # dead one wrote; a live process's files are its own to delete. Requests
+    # still on an old bundle keep their mapping (and on Windows the delete
+    # just fails until they exit)
+    keep = {os.path.basename(f.path) for f in [bundle.model, *chat.heads.values()]}
+    for name in os.listdir(MODEL_DIR):
+        writer = FOREST_FILE.fullmatch(name)
+        if writer is None or name in keep:
+            continue
+        pid = int(writer.group(1))
+        if pid == os.getpid() or not pid_alive(pid):
+            try:
+                os.remove(os.path.join(MODEL_DIR, name))
+            except OSError:
+                pass
+    return bundle
+
+def load_saved_models():
+    import pickle
+
+    with open(os.path.join(MODEL_DIR, BUNDLE_FILE), "rb") as f:
+        return ModelBundle(**pickle.load(f))
+
+def retrain_models(current):
+    """Train a candidate bundle from the current CSV without touching the live one.
+
+    Forests get warm-start trees on copies of the live models (memory-mapped
+    ones are refit from scratch, so their "copy" is the mapped forest
+    itself). Candidate and current bundle are scored on the fixed holdout
+    (features.holdout_split), which neither of them was trained on. An
+    online health model isn't retrained here: it learns every save, import
+    and sync in place, so it carries over as is and isn't compared.
+    """
+    from forest_training import refresh_forest
 
-for c in categorical_features:
-    if c not in df_chat.columns:
-        df_chat[c] = 'Unknown'
+    df_all = training_frame(records)
 
-X_chat = df_chat[all_features]
-y_survival = df_chat['Outcome']
-y_disease = df_chat['Disease']
+    if is_online(current.model):
+        health, health_acc = current.model, current.model.prequential_accuracy
+        candidate_health = current_health = {}
+    else:
+        train, holdout = holdout_split(df_all)
+        X_test, y_test = health_features(holdout)
+        health = refresh_forest(copy.deepcopy(current.model), *health_features(train))
+        health_acc = health.score(X_test, y_test)
+        candidate_health = {'health': health_acc}
+        current_health = {'health': current.model.score(X_test, y_test)}
+
+    df_chat = chat_frame(df_all)
+    chat_train, chat_test = holdout_split(df_chat)
+    if current.version % FULL_REFIT_EVERY == 0:
+        chat = train_chat_model(chat_train)
+    else:
+        chat = current.chat_model.refreshed(chat_train[all_features], chat_targets(chat_train), refresh_forest)
+
+    candidate_scores = {**candidate_health, **chat.score(chat_test[all_features], chat_targets(chat_test))}
+    current_scores = {**current_health, **current.chat_model.score(chat_test[all_features], chat_targets(chat_test))}
+
+    candidate = ModelBundle(health, health_acc, chat, chat_defaults(df_chat), current.version + 1)
+    return candidate, candidate_scores, current_scores
 
-# Preprocessor (OneHot + Scale)
-preprocessor_chat = ColumnTransformer([
-    ('num', StandardScaler(), numerical_features),
-    ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features)
-])
+def retrained_models_live(bundle):
+    # swap in the memory-mapped copy so this process stops holding the
+    # in-memory forests, unless a newer bundle went live meanwhile
+    if MODEL_DIR:
+        saved = save_models(bundle)
+        if models.current() is bundle:
+            models.swap(saved)
 
-model_survival = Pipeline([('pre', preprocessor_chat), ('clf', RandomForestClassifier(n_estimators=100, random_state=42))])
-model_survival.fit(X_chat, y_survival)
+def is_online(model):
+    # duck-typed so checking doesn't import sklearn
+    return hasattr(model, "learn_one")
 
-model_disease = Pipeline([('pre', preprocessor_chat), ('clf', RandomForestClassifier(n_estimators=100, random_state=42))])
-model_disease.fit(X_chat, y_disease)
+def current_accuracy(bundle):
+    if is_online(bundle.model):
+        return bundle.model.prequential_accuracy
+    return bundle.accuracy
+
+def record_saved(record):
+    """Called after every record save from display() / add_vaccine()."""
+    retrainer.record_changed()
+
+def health_example(record):
+    """(health features, label) of a record, or None if they don't parse."""
+    try:
+        return health_row(record), str(record.get("Health Status", ""))
+    except (TypeError, ValueError):
+        return None
+
+def learn_record(model, old, new):
+    # an online model learns a changed record, but only when its health
+    # features or label changed (not for notes or vaccinations)
+    example = health_example(new)
+    if example is None:
+        print("Online model update skipped: unreadable health features for", new.get("Animal ID"))
+        return
+    if old is not None and health_example(old) == example:
+        return
+    try:
+        model.learn_one(*example)
+    except (TypeError, ValueError) as e:
+        print("Online model update skipped:", e)
+
+def online_model():
+    bundle = models.current()
+    if bundle is None or not is_online(bundle.model):
+        return None
+    return bundle.model
+
+def learn_saved_record(old, new, before, after):
+    # store listener for single-record saves; batch commits report new=None
+    model = online_model()
+    if new is not None and model is not None:
+        learn_record(model, old, new)
+
+def learn_upserted_records(changes):
+    # store batch listener: bulk import and clinic sync (upsert_many)
+    model = online_model()
+    if model is not None:
+        for old, new in changes:
+            learn_record(model, old, new)
+
+models = ModelRegistry()
+retrainer = BackgroundRetrainer(models, retrain_models, on_swap=retrained_models_live)
+records.listeners.append(learn_saved_record)
+records.batch_listeners.append(learn_upserted_records)
+
+
+# ---------------------------
+# Lazy startup + readiness
+# ---------------------------
+# "lazy" (default): warm up in the background once the server is running
+# (first request, or app.run below); "eager": load everything at import;
+# "prefork": like eager, but leave the retrainer to the forked workers
+# (gunicorn.conf.py sets this)
+WARMUP_MODE = os.environ.get("VET_WARMUP", "lazy")
+# how long a request that needs the models waits for the warm-up
+WARMUP_WAIT = float(os.environ.get("VET_WARMUP_WAIT", "120"))
+PREFORK_RETRAIN = os.environ.get("VET_PREFORK_RETRAIN", "0") == "1"
+
+# CSV path -> (Animal ID -> row), rebuilt whenever that CSV changes on disk
+record_indexes = {}
+
+def record_position(df, animal_id, fingerprint, csv_path=CSV_FILE):
+    """Row of animal_id in df, which was read from csv_path at fingerprint."""
+    index = record_indexes.get(csv_path)
+    if index is None or index.fingerprint != fingerprint:
+        index = record_indexes[csv_path] = RecordIndex.from_frame(df, fingerprint)
+    return index.lookup(animal_id)
+
+def load_models():
+    import reportlab.platypus  # noqa: F401  (first PDF shouldn't pay for this)
+    models.swap(build_models(records))
+    for part in records.parts():
+        record_indexes[part.csv_path] = RecordIndex.from_csv(part.csv_path)
+    if WARMUP_MODE != "prefork":
+        retrainer.start()
+        if sync_loop is not None:
+            sync_loop.start()
+
+warm_up = WarmUp(load_models)
+
+def loaded_models():
+    """Model bundle for a request; the first requests wait for the warm-up."""
+    warm_up.start()
+    if not warm_up.wait(WARMUP_WAIT):
+        abort(503, "Models are still loading, please retry shortly.")
+    return models.current()
+
+@app.before_request
+def _start_warm_up():
+    warm_up.start()
+
+@app.route("/healthz")
+def healthz():
+    status = warm_up.status()
+    bundle = models.current()
+    status["model_version"] = bundle.version if bundle is not None else None
+    return jsonify(status), 200 if status["ready"] else 503
+
+def after_fork():
+    """Per-worker setup; threads started in the master don't survive fork."""
+    if PREFORK_RETRAIN:
+        retrainer.start()
+        if sync_loop is not None:
+            sync_loop.start()  # every worker starts it, one of them syncs
+
+if WARMUP_MODE in ("eager", "prefork"):
+    warm_up.run()
 
 
 # ---------------------------
@@ -537,39 +1302,48 @@ def predict():
         if scores[best] == 0:
             best = "More tests recommended"
 
+        bundle = loaded_models()
+        defaults = bundle.chat_defaults
+
         # parse heart rate & bp
         try:
             heart_rate = int(heart_rate)
         except:
-            heart_rate = int(df_chat['Heart Rate (bpm)'].median())
+            heart_rate = defaults['Heart Rate (bpm)']
 
         try:
             bp_systolic, bp_diastolic = map(int, bp_str.split('/'))
         except:
-            bp_systolic = int(df_chat['BP_Systolic'].median())
-            bp_diastolic = int(df_chat['BP_Diastolic'].median())
-
-        input_data = pd.DataFrame([[heart_rate, bp_systolic, bp_diastolic,
-                                    species, breed, sex, health_status,
-                                    symptom1, symptom2]], columns=all_features)
-
-        prediction_survive = model_survival.predict(input_data)[0]
-        probabilities_survive = model_survival.predict_proba(input_data)[0]
-        if "Will Live" in model_survival.classes_:
-            live_index = list(model_survival.classes_).index("Will Live")
+            bp_systolic = defaults['BP_Systolic']
+            bp_diastolic = defaults['BP_Diastolic']
+
+        with span("feature_encoding"):
+            input_data = pd.DataFrame([[heart_rate, bp_systolic, bp_diastolic,
+                                        species, breed, sex, health_status,
+                                        symptom1, symptom2]], columns=all_features)
+
+        # one-hot transform + both forests
+        with span("inference"):
+            heads = bundle.chat_model.predict(input_data)
+        prediction_survive = heads['survival'][0][0]
+        probabilities_survive = heads['survival'][1][0]
+        survival_classes = bundle.chat_model.classes('survival')
+        if "Will Live" in survival_classes:
+            live_index = list(survival_classes).index("Will Live")
         else:
             live_index = 0
         chance_of_living = round(probabilities_survive[live_index] * 100, 2)
 
-        prediction_disease_ml = model_disease.predict(input_data)[0]
+        prediction_disease_ml = heads['disease'][0][0]
 
         final_disease = best
 
-        return render_template_string(index_template,
-                                      prediction_disease=f'Predicted Disease: {final_disease}',
-                                      prediction_survival=f'Predicted Outcome: {prediction_survive}',
-                                      living_chance=f'Chance of Living: {chance_of_living}%',
-                                      show_result=True)
+        with span("template_render"):
+            return render_template_string(index_template,
+                                          prediction_disease=f'Predicted Disease: {final_disease}',
+                                          prediction_survival=f'Predicted Outcome: {prediction_survive}',
+                                          living_chance=f'Chance of Living: {chance_of_living}%',
+                                          show_result=True)
 
     except Exception as e:
         return render_template_string(index_template, prediction_disease=f'Error: {e}', show_result=True)
@@ -579,5 +1353,9 @@ def predict():
 # Run app
 # ---------------------------
 if __name__ == "__main__":
+    # start loading now, while the server binds; skip the reloader's parent
+    # process, which never serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_up.start()
     # run on localhost with debug enabled
-    app.run(debug=True)
+    app.run(debug=True, port=int(os.environ.get("VET_PORT", "5000")))
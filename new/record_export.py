@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Streaming export of animal records as CSV, JSONL or Parquet (/api/export).
+
+Records are read chunk_size rows at a time from the record store's Parquet
+snapshot (or the CSV when pyarrow isn't installed) and every chunk is
+encoded and handed on as soon as it is ready, so memory stays around one
+chunk whatever the herd size. Parquet output writes one row group per
+chunk into a spool that is drained after each one.
+
+Deltas: since=<timestamp> keeps only records whose "Updated At" is at or
+after it. Every export reports a watermark - the latest "Updated At" in the
+store when the export started - to pass as since= next time (response
+header X-Export-Watermark, or stderr for the CLI). The bound is inclusive,
+so a record saved in the same second as the watermark is sent again rather
+than missed. Records that were never saved through the app have no
+"Updated At" and only appear in full exports. A sharded store
+(sharded_store.py) is exported one shard after another.
+
+  python record_export.py --format parquet --out herd.parquet
+  python record_export.py --format jsonl --since 2026-10-01T00:00:00+00:00 --out delta.jsonl
+"""
+
+import argparse
+import datetime
+import io
+import os
+import sys
+
+from lazy_loading import LazyModule
+from record_store import UPDATED_COLUMN, _arrow
+
+pd = LazyModule("pandas")
+
+CHUNK_SIZE = int(os.environ.get("VET_EXPORT_CHUNK", "50000"))
+# format -> (mimetype, file extension)
+FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def parse_since(value):
+    """An ISO timestamp in the form "Updated At" is stored in (UTC, seconds); None if blank."""
+    if not value:
+        return None
+    value = value.strip().replace("Z", "+00:00")
+    try:
+        moment = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        # an unescaped "+" in a query string arrives as a space
+        moment = datetime.datetime.fromisoformat("+".join(value.rsplit(" ", 1)))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.astimezone(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def watermark(store):
+    """Latest "Updated At" in the store, the since= for the next delta."""
+    frame = store.read([UPDATED_COLUMN])
+    if UPDATED_COLUMN not in frame:
+        return None
+    stamps = frame[UPDATED_COLUMN].dropna().astype(str)
+    stamps = stamps[stamps != ""]
+    return stamps.max() if len(stamps) else None
+
+
+def _arrow_batches(store, columns, since, chunk_size, schema=None):
+    """(schema, batches) for one single-file store; batches are conformed to schema if given."""
+    pa = _arrow()
+    import pyarrow.compute as pc
+
+    store.refresh()
+    parquet = pa.parquet.ParquetFile(store.snapshot_path)
+    names = parquet.schema_arrow.names
+    columns = [c for c in columns if c in names] if columns else names
+    if since is not None and UPDATED_COLUMN not in names:
+        columns = []  # nothing was ever saved, so nothing changed
+    read = columns + [UPDATED_COLUMN] if since is not None and UPDATED_COLUMN not in columns else columns
+    own = pa.schema([parquet.schema_arrow.field(c) for c in columns])
+    if schema is None:
+        schema = own
+    if not columns:
+        return schema, iter(())
+
+    def column(batch, field):
+        # another shard's file may lack the column or type it differently
+        if field.name not in columns:
+            return pa.nulls(batch.num_rows, field.type)
+        values = batch.column(field.name)
+        if values.type == field.type:
+            return values
+        if pa.types.is_dictionary(values.type):
+            values = values.dictionary_decode()
+        if pa.types.is_dictionary(field.type):
+            return pc.cast(pc.cast(values, pa.string()).dictionary_encode(), field.type)
+        return pc.cast(values, field.type)
+
+    def batches():
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=read):
+            if since is not None:
+                updated = batch.column(UPDATED_COLUMN)
+                if not pa.types.is_string(updated.type):
+                    updated = pc.cast(updated, pa.string())
+                batch = batch.filter(pc.greater_equal(updated, since))  # nulls dropped
+            if batch.num_rows:
+                # requested column order (batches come in file order)
+                yield pa.RecordBatch.from_arrays([column(batch, f) for f in schema], schema=schema)
+
+    return schema, batches()
+
+
+def _common_type(a, b):
+    pa = _arrow()
+    if a == b:
+        return a
+    if pa.types.is_null(a) or pa.types.is_null(b):
+        return b if pa.types.is_null(a) else a
+    numeric = (pa.types.is_integer, pa.types.is_floating)
+    if any(f(a) for f in numeric) and any(f(b) for f in numeric):
+        return pa.float64()
+    if pa.types.is_dictionary(a) and pa.types.is_dictionary(b):
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()  # e.g. numeric Animal IDs in one shard, "NTH-12" in another
+
+
+def _unified_schema(schemas):
+    """Every column of the shards, in first-seen order, with a type all of them fit."""
+    pa = _arrow()
+    types = {}
+    for schema in schemas:
+        for field in schema:
+            types[field.name] = _common_type(types[field.name], field.type) if field.name in types else field.type
+    return pa.schema([pa.field(name, t) for name, t in types.items()])
+
+
+def changed_frames(store, since=None, columns=None, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of the records changed at or after since (all records if None)."""
+    for part in store.parts():
+        yield from _part_frames(part, since, columns, chunk_size)
+
+
+def _part_frames(store, since, columns, chunk_size):
+    if _arrow() is not None:
+        _schema, batches = _arrow_batches(store, columns, since, chunk_size)
+        for batch in batches:
+            yield batch.to_pandas()
+        return
+
+    from stream_training import iter_chunks
+
+    read = columns + [UPDATED_COLUMN] if columns and since is not None and UPDATED_COLUMN not in columns else columns
+    for chunk in iter_chunks(store.csv_path, read, chunk_size):
+        if since is not None:
+            if UPDATED_COLUMN not in chunk:
+                return
+            chunk = chunk[chunk[UPDATED_COLUMN].fillna("").astype(str) >= since]
+            if columns:
+                chunk = chunk[[c for c in columns if c in chunk]]
+        if len(chunk):
+            yield chunk
+
+
+class _Spool(io.RawIOBase):
+    """Write-only file that hands out what was written so far."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_stream(store, since, columns, chunk_size):
+    pa = _arrow()
+    if pa is None:
+        raise ValueError("Parquet export needs pyarrow")
+    parts = store.parts()
+    if len(parts) == 1:
+        schema, streams = _arrow_batches(parts[0], columns, since, chunk_size)
+        streams = [streams]
+    else:
+        schema = _unified_schema(_arrow_batches(part, columns, since, chunk_size)[0] for part in parts)
+        streams = (_arrow_batches(part, columns, since, chunk_size, schema)[1] for part in parts)
+    spool = _Spool()
+    writer = pa.parquet.ParquetWriter(spool, schema)
+    for batches in streams:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield spool.drain()
+    writer.close()
+    yield spool.drain()
+
+
+def export(store, fmt="csv", since=None, columns=None, chunk_size=CHUNK_SIZE):
+    """Generator of bytes: the records changed since `since` in the given format."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; use one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        yield from _parquet_stream(store, since, columns, chunk_size)
+        return
+
+    header = True
+    for frame in changed_frames(store, since, columns, chunk_size):
+        if fmt == "csv":
+            yield frame.to_csv(index=False, header=header).encode()
+            header = False
+        else:
+            text = frame.to_json(orient="records", lines=True, date_format="iso")
+            yield (text if text.endswith("\n") else text + "\n").encode()
+    if fmt == "csv" and header:
+        # no changed records: still send the header line
+        names = columns or list(pd.read_csv(store.csv_path, nrows=0).columns)
+        yield pd.DataFrame(columns=names).to_csv(index=False).encode()
+
+
+def main():
+    from record_store import RecordStore
+
+    parser = argparse.ArgumentParser(description="Export animal records (all, or changed since a timestamp)")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--since", help="only records with Updated At at or after this ISO timestamp")
+    parser.add_argument("--columns", help="comma-separated columns (default: all)")
+    parser.add_argument("--out", help="output file (default: stdout)")
+    parser.add_argument("--csv", default=os.environ.get("VET_CSV_FILE", "Animal_Health_Record_500.csv"))
+    parser.add_argument("--snapshot", default=os.environ.get("VET_SNAPSHOT_FILE"))
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    store = RecordStore(args.csv, args.snapshot)
+    try:
+        since = parse_since(args.since)
+    except ValueError:
+        raise SystemExit(f"--since must be an ISO timestamp, got {args.since!r}")
+    columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+    mark = watermark(store)
+
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        for data in export(store, args.format, since, columns, args.chunk_size):
+            out.write(data)
+    finally:
+        if args.out:
+            out.close()
+    print(f"watermark: {mark or ''}  (pass as --since next time)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Bulk import of animal records from CSV or Excel (/import, /api/import).
+
+The file is parsed chunk_size rows at a time (pandas chunks for CSV,
+openpyxl's read-only row iterator for .xlsx) with every cell kept as text,
+and each chunk is validated with vectorised checks:
+
+  - Animal ID present and not repeated within the file
+  - Species one of the known species (case-insensitive)
+  - new animals have every column the models train on (NEW_RECORD_COLUMNS)
+  - BP like 120/80, numeric heart rate, oxygen saturation 0-100,
+    non-negative age and weight (blank cells are allowed)
+
+Valid rows are then written with RecordStore.upsert_many in one commit:
+known Animal IDs are updated with the non-blank cells of the file, new
+ones are added. Invalid rows are skipped and listed in the report with
+their spreadsheet row number. Columns the records don't have are ignored.
+
+  python record_import.py new_farm.xlsx [--dry-run] [--csv records.csv]
+"""
+
+import argparse
+import json
+import os
+
+from lazy_loading import LazyModule
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+CHUNK_SIZE = int(os.environ.get("VET_IMPORT_CHUNK", "50000"))
+MAX_REPORTED_ERRORS = 1000
+REQUIRED_COLUMNS = ["Animal ID", "Species"]
+KNOWN_SPECIES = ["Cow", "Buffalo", "Goat", "Sheep", "Horse", "Dog", "Cat", "Hen"]
+# filled for every existing record and needed for training; updates may leave them blank
+NEW_RECORD_COLUMNS = ["Breed", "Sex", "BP", "Heart Rate (bpm)", "Health Status", "Disease"]
+
+
+class ImportFileError(ValueError):
+    """The file as a whole can't be imported (format, missing columns)."""
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _excel_chunks(file, chunk_size):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportFileError("Reading .xlsx files needs openpyxl (pip install openpyxl)")
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_cell(h).strip() for h in next(rows, ())]
+        batch, start = [], 0
+        for row in rows:
+            batch.append([_cell(v) for v in row[:len(header)]])
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=header, index=range(start, start + len(batch)))
+                start += len(batch)
+                batch = []
+        if batch or not start:
+            yield pd.DataFrame(batch, columns=header, index=range(start, start + len(batch)))
+    finally:
+        workbook.close()
+
+
+def read_chunks(file, filename, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of text cells, indexed by data row (0 = first row under the header)."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        yield from _excel_chunks(file, chunk_size)
+    elif ext in (".csv", ".txt", ""):
+        yield from pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_size)
+    else:
+        raise ImportFileError(f"Unsupported file type {ext!r}; upload a .csv or .xlsx file")
+
+
+def _number(chunk, column):
+    """(text, value) for a column; value is NaN where the text isn't a number."""
+    text = chunk[column].str.strip()
+    return text, pd.to_numeric(text, errors="coerce")
+
+
+def validate(chunk, species_names, seen_ids, existing_ids=()):
+    """Split a chunk into (valid rows, [error rows]). seen_ids collects the IDs taken so far."""
+    chunk = chunk.copy()
+    ids = chunk["Animal ID"].str.strip()
+    chunk["Animal ID"] = ids
+    species = chunk["Species"].str.strip()
+    # canonical spelling of known species ("cow" -> "Cow")
+    chunk["Species"] = species.str.lower().map(species_names).fillna(species)
+
+    checks = {
+        "missing Animal ID": ids == "",
+        "Animal ID repeated in the file": (ids != "") & (ids.duplicated() | ids.isin(seen_ids)),
+        "unknown Species": ~species.str.lower().isin(species_names),
+    }
+    new = ~ids.isin(existing_ids)
+    for column in NEW_RECORD_COLUMNS:
+        blank = chunk[column].str.strip() == "" if column in chunk else pd.Series(True, index=chunk.index)
+        checks[f"new animals need {column}"] = new & blank
+    if "BP" in chunk:
+        bp = chunk["BP"].str.strip()
+        checks["BP must look like 120/80"] = (bp != "") & ~bp.str.fullmatch(r"\d+/\d+")
+    if "Heart Rate (bpm)" in chunk:
+        text, value = _number(chunk, "Heart Rate (bpm)")
+        checks["Heart Rate must be a positive number"] = (text != "") & ~(value > 0)
+    if "Oxygen Saturation (%)" in chunk:
+        text, value = _number(chunk, "Oxygen Saturation (%)")
+        checks["Oxygen Saturation must be between 0 and 100"] = (text != "") & ~value.between(0, 100)
+    for column, label in (("Age (years)", "Age"), ("Weight (kg)", "Weight")):
+        if column in chunk:
+            text, value = _number(chunk, column)
+            checks[f"{label} must be a non-negative number"] = (text != "") & ~(value >= 0)
+
+    failed = pd.DataFrame(checks)
+    bad = failed.any(axis=1).to_numpy()
+    errors = []
+    if bad.any():
+        messages = np.array(list(checks))
+        flags = failed.to_numpy()
+        for i in np.flatnonzero(bad)[:MAX_REPORTED_ERRORS]:
+            errors.append({"row": int(chunk.index[i]) + 2,  # spreadsheet row, header is row 1
+                           "Animal ID": ids.iat[i], "errors": messages[flags[i]].tolist()})
+    valid = chunk[~bad]
+    seen_ids.update(valid["Animal ID"])
+    return valid, errors, int(bad.sum())
+
+
+def import_records(store, file, filename, chunk_size=CHUNK_SIZE, dry_run=False):
+    """Validate file and upsert its valid rows into store; returns a report dict."""
+    columns = list(pd.read_csv(store.csv_path, nrows=0).columns)
+    current = store.read(["Animal ID", "Species"])
+    existing_ids = set(current["Animal ID"].astype(str))
+    known = current["Species"].dropna().astype(str).unique().tolist()
+    species_names = {s.lower(): s for s in KNOWN_SPECIES + known}
+
+    report = {"rows": 0, "valid": 0, "inserted": 0, "updated": 0, "error_count": 0,
+              "errors": [], "ignored_columns": [], "dry_run": dry_run}
+    seen_ids = set()
+    parts = []
+    for chunk in read_chunks(file, filename, chunk_size):
+        chunk.columns = [str(c).strip() for c in chunk.columns]
+        if not report["rows"]:
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+            report["ignored_columns"] = [c for c in chunk.columns if c not in columns]
+        chunk = chunk[[c for c in chunk.columns if c in columns]]
+        valid, errors, n_bad = validate(chunk, species_names, seen_ids, existing_ids)
+        report["rows"] += len(chunk)
+        report["error_count"] += n_bad
+        report["errors"].extend(errors[:MAX_REPORTED_ERRORS - len(report["errors"])])
+        parts.append(valid)
+
+    rows = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=REQUIRED_COLUMNS)
+    report["valid"] = len(rows)
+    if len(rows) and not dry_run:
+        report["inserted"], report["updated"] = store.upsert_many(rows)
+    return report
+
+
+def main():
+    from record_store import RecordStore
+
+    parser = argparse.ArgumentParser(description="Import animal records from a CSV or Excel file")
+    parser.add_argument("file")
+    parser.add_argument("--csv", default=os.environ.get("VET_CSV_FILE", "Animal_Health_Record_500.csv"))
+    parser.add_argument("--snapshot", default=os.environ.get("VET_SNAPSHOT_FILE"))
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate only, don't change the records")
+    args = parser.parse_args()
+
+    store = RecordStore(args.csv, args.snapshot)
+    try:
+        with open(args.file, "rb") as f:
+            report = import_records(store, f, args.file, args.chunk_size, args.dry_run)
+    except ImportFileError as e:
+        raise SystemExit(str(e))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""
+Animal record store: the CSV stays the source of truth, reads go through a
+typed columnar snapshot.
+
+The snapshot is a Parquet file next to the CSV (or VET_SNAPSHOT_FILE) with
+real dtypes: numbers are numeric, and Species, Breed, Sex, Disease and
+Health Status are categoricals (stored as Parquet dictionaries). Readers can
+project columns, so model training only decodes the feature columns and
+never touches free text like "Doctor Suggestion".
+
+The snapshot records the mtime/size of the CSV it was built from. Saves
+only write the CSV: a background thread rebuilds the snapshot from the
+frame in memory VET_SNAPSHOT_DELAY seconds later, once for a burst of
+saves. Until then (or if the CSV was changed some other way) reads are
+served from the records in memory and schedule the rebuild. Without
+pyarrow installed everything falls back to pd.read_csv(usecols=...).
+
+Concurrent saves: update() changes one record without losing anyone
+else's. Every record carries a Version number and an Updated At time.
+  - saves of the same animal take turns on a per-Animal-ID lock (1024
+    striped slots), and a save made from a stale form (expected_version
+    no longer current) raises VersionConflict instead of overwriting;
+  - saves of different animals run in parallel up to the commit, a
+    store-wide lock around "re-read if changed, apply, write temp file,
+    os.replace", so every commit sees all earlier ones.
+Commits themselves are not independent: each one rewrites the whole CSV
+while holding the store-wide lock, so saves go one at a time at the speed
+of a full rewrite (about 2 s at 200k records) - shard the herd
+(sharded_store.py) when that is too slow.
+upsert_many() writes a whole batch (bulk import) in one such commit.
+Locks are held both by threads (threading.Lock) and by processes (a byte
+range of <csv>.lock via fcntl / msvcrt), so several gunicorn workers can
+share one CSV.
+
+  python record_store.py build              (re)build the snapshot now
+  python record_store.py bench              compare load times vs. the CSV
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+import zlib
+
+from lazy_loading import LazyModule
+from prefork import file_fingerprint
+
+pd = LazyModule("pandas")
+
+CATEGORICAL_COLUMNS = ["Species", "Breed", "Sex", "Disease", "Health Status"]
+NUMERIC_COLUMNS = ["Age (years)", "Heart Rate (bpm)", "Oxygen Saturation (%)", "Weight (kg)", "Version"]
+SOURCE_KEY = b"vet_source"
+# rows per Parquet row group: chunked readers (export) decode one at a time
+SNAPSHOT_ROW_GROUP = 65536
+# seconds between a save and the snapshot rebuild; saves in between share it
+SNAPSHOT_DELAY = float(os.environ.get("VET_SNAPSHOT_DELAY", "2"))
+
+VERSION_COLUMN = "Version"
+UPDATED_COLUMN = "Updated At"
+RECORD_LOCK_SLOTS = 1024
+STORE_SLOT = 0
+
+
+class RecordNotFound(KeyError):
+    pass
+
+
+class VersionConflict(Exception):
+    def __init__(self, animal_id, expected, current):
+        super().__init__(f"Animal {animal_id} is at version {current}, the edit was based on {expected}")
+        self.animal_id = animal_id
+        self.expected = expected
+        self.current = current
+
+
+# ---------------------------
+# Cross-process locks
+# ---------------------------
+if os.name == "nt":
+    import msvcrt
+
+    def _acquire_byte(path, shared_fd, offset):
+        # msvcrt locks belong to a handle, so each holder opens its own
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        os.lseek(fd, offset, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # itself retries for ~10 s
+                return fd
+            except OSError:
+                continue
+
+    def _release_byte(fd, offset):
+        os.lseek(fd, offset, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+else:
+    import fcntl
+
+    def _acquire_byte(path, shared_fd, offset):
+        # one descriptor per process: closing any descriptor of the file
+        # would release all of this process's fcntl locks on it
+        fcntl.lockf(shared_fd, fcntl.LOCK_EX, 1, offset)
+        return shared_fd
+
+    def _release_byte(fd, offset):
+        fcntl.lockf(fd, fcntl.LOCK_UN, 1, offset)
+
+
+class FileLocks:
+    """Exclusive locks on single bytes (slots) of a lock file.
+
+    Threads of one process are kept apart by a threading.Lock per slot,
+    other processes by an OS byte-range lock on the same byte.
+    """
+
+    def __init__(self, path, slots):
+        self.path = path
+        self._thread_locks = [threading.Lock() for _ in range(slots)]
+        self._fd = None
+        self._fd_lock = threading.Lock()
+
+    def _shared_fd(self):
+        if self._fd is None:
+            with self._fd_lock:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        return self._fd
+
+    @contextlib.contextmanager
+    def hold(self, slot):
+        with self._thread_locks[slot]:
+            fd = _acquire_byte(self.path, self._shared_fd(), slot)
+            try:
+                yield
+            finally:
+                _release_byte(fd, slot)
+
+
+def record_slot(animal_id):
+    # crc32, not hash(): every process must pick the same slot
+    return 1 + zlib.crc32(str(animal_id).encode()) % RECORD_LOCK_SLOTS
+
+
+def _replace(src, dst, attempts=50):
+    # on Windows os.replace fails while a reader has dst open; retry briefly
+    for i in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if i == attempts - 1:
+                raise
+            time.sleep(0.01)
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def typed_frame(df):
+    """Categoricals and numbers instead of object columns."""
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype("category")
+    for col in NUMERIC_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+class RecordStore:
+    def __init__(self, csv_path, snapshot_path=None):
+        self.csv_path = csv_path
+        self.snapshot_path = snapshot_path or os.path.splitext(csv_path)[0] + ".parquet"
+        self._lock = threading.Lock()
+        # (snapshot fingerprint, CSV fingerprint it was built from)
+        self._known = (None, None)
+        self._rebuild = None  # pending snapshot rebuild (threading.Timer)
+        self.locks = FileLocks(csv_path + ".lock", RECORD_LOCK_SLOTS + 1)
+        # (CSV fingerprint, frame) as last read or written by this process;
+        # frames are never modified once cached, commits swap in a copy
+        self._cached = (None, None)
+        # fn(old record, new record, source before, source after) after every
+        # commit made by this process; both records are None when all
+        # records were replaced
+        self.listeners = []
+        # fn(old record, new record) while the commit still holds the store
+        # lock, so hooks run in commit order across processes; keep them short
+        self.commit_hooks = []
+        # fn(changes) after every upsert_many commit made by this process,
+        # changes a list of (old record, or None when inserted, new record);
+        # the listeners above only hear that all records were replaced
+        self.batch_listeners = []
+
+    # ---- snapshot ----
+    def _snapshot_source(self):
+        """Fingerprint of the CSV the current snapshot was built from, or None."""
+        try:
+            own = file_fingerprint(self.snapshot_path)
+        except OSError:
+            return None
+        if self._known[0] != own:
+            pa = _arrow()
+            metadata = pa.parquet.read_schema(self.snapshot_path).metadata or {}
+            source = metadata.get(SOURCE_KEY)
+            self._known = (own, tuple(json.loads(source)) if source else None)
+        return self._known[1]
+
+    def _write_snapshot(self, df, source):
+        pa = _arrow()
+        table = pa.Table.from_pandas(typed_frame(df), preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[SOURCE_KEY] = json.dumps(list(source)).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        tmp = f"{self.snapshot_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        pa.parquet.write_table(table, tmp, row_group_size=SNAPSHOT_ROW_GROUP)
+        os.replace(tmp, self.snapshot_path)
+
+    def refresh(self, force=False):
+        """Rebuild the snapshot now if the CSV changed since it was written."""
+        if _arrow() is None:
+            return False
+        with self._lock:
+            source, frame = self._frame_with_source()
+            if not force and self._snapshot_source() == source:
+                return False
+            self._write_snapshot(frame, source)
+            return True
+
+    def _schedule_refresh(self):
+        if _arrow() is None:
+            return
+        with self._lock:
+            if self._rebuild is None:
+                self._rebuild = threading.Timer(SNAPSHOT_DELAY, self._background_refresh)
+                self._rebuild.daemon = True
+                self._rebuild.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            self._rebuild = None
+        try:
+            self.refresh()
+        except Exception as e:  # the next read serves the CSV and tries again
+            print("Snapshot rebuild failed:", e)
+
+    def fingerprint(self):
+        """Identifies the current contents (what read(with_source=True) returns as source)."""
+        return file_fingerprint(self.csv_path)
+
+    def parts(self):
+        """The single-file stores holding the records (see sharded_store.py)."""
+        return [self]
+
+    def shard_for(self, animal_id):
+        """The single-file store that holds animal_id."""
+        return self
+
+    # ---- reads ----
+    def read(self, columns=None, with_source=False):
+        """Records as a typed DataFrame, optionally only some columns.
+
+        with_source=True also returns the fingerprint of the CSV they came from.
+        """
+        if _arrow() is None:
+            source = file_fingerprint(self.csv_path)
+            if columns is not None:
+                header = pd.read_csv(self.csv_path, nrows=0).columns
+                columns = [c for c in columns if c in header]
+            frame = typed_frame(pd.read_csv(self.csv_path, usecols=columns))
+        elif self._snapshot_source() != file_fingerprint(self.csv_path):
+            # saved since the last rebuild: from memory, rebuilt in the background
+            self._schedule_refresh()
+            source, frame = self._frame_with_source()
+            if columns is not None:
+                frame = frame[[c for c in columns if c in frame.columns]]
+            frame = typed_frame(frame)
+        else:
+            source = self._snapshot_source()
+            if columns is not None:
+                available = set(_arrow().parquet.read_schema(self.snapshot_path).names)
+                columns = [c for c in columns if c in available]
+            frame = pd.read_parquet(self.snapshot_path, columns=columns)
+        return (frame, source) if with_source else frame
+
+    def read_csv(self):
+        """The raw CSV, for routes that edit and save records."""
+        return pd.read_csv(self.csv_path)
+
+    def cached_csv(self):
+        """(raw CSV frame, its fingerprint), parsed only when the CSV changed.
+
+        The frame is shared with every other caller: don't modify it.
+        """
+        source, frame = self._frame_with_source()
+        return frame, source
+
+    def _frame(self):
+        """The whole CSV, re-read only when it changed on disk. Don't modify it."""
+        return self._frame_with_source()[1]
+
+    def _frame_with_source(self):
+        source = file_fingerprint(self.csv_path)
+        cached = self._cached
+        if cached[0] != source:
+            cached = self._cached = (source, pd.read_csv(self.csv_path))
+        return cached
+
+    def get(self, animal_id):
+        """One record as a dict (RecordNotFound if missing)."""
+        frame = self._frame()
+        return frame.iloc[self._position(frame, animal_id)].to_dict()
+
+    @staticmethod
+    def _position(frame, animal_id):
+        hits = (frame["Animal ID"].astype(str) == str(animal_id)).to_numpy().nonzero()[0]
+        if not len(hits):
+            raise RecordNotFound(animal_id)
+        return int(hits[0])
+
+    @staticmethod
+    def _version(frame, pos):
+        if VERSION_COLUMN not in frame:
+            return 0
+        value = frame[VERSION_COLUMN].iat[pos]
+        return int(value) if pd.notna(value) and value != "" else 0
+
+    # ---- writes ----
+    def _commit(self, frame):
+        """Write frame as the new CSV atomically. Call with the store lock held."""
+        tmp = f"{self.csv_path}.tmp{os.getpid()}.{threading.get_ident()}"
+        frame.to_csv(tmp, index=False)
+        _replace(tmp, self.csv_path)
+        source = file_fingerprint(self.csv_path)
+        self._cached = (source, frame)
+        return source
+
+    def _after_commit(self, source, old=None, new=None, before=None):
+        # outside the store lock; the snapshot is now stale until rebuilt
+        self._schedule_refresh()
+        for listener in self.listeners:
+            listener(old, new, before, source)
+
+    def _run_commit_hooks(self, old, new):
+        for hook in self.commit_hooks:
+            hook(old, new)
+
+    def save(self, df):
+        """Replace all records with df."""
+        with self.locks.hold(STORE_SLOT):
+            source = self._commit(df)
+            self._run_commit_hooks(None, None)
+        self._after_commit(source)
+
+    def update(self, animal_id, apply, expected_version=None):
+        """Change one record; returns it as saved (a dict).
+
+        apply(record dict) -> {column: new value}. With expected_version (the
+        Version the edit was based on, e.g. from a hidden form field) the
+        save fails with VersionConflict if someone else saved in between, or
+        if expected_version isn't a version number at all.
+        """
+        with self.locks.hold(record_slot(animal_id)):
+            frame = self._frame()
+            pos = self._position(frame, animal_id)
+            current = self._version(frame, pos)
+            if expected_version is not None and str(expected_version).strip() != "":
+                try:
+                    expected_version = int(str(expected_version).strip())
+                except ValueError:
+                    raise VersionConflict(animal_id, expected_version, current) from None
+            else:
+                expected_version = None
+            if expected_version is not None and expected_version != current:
+                raise VersionConflict(animal_id, expected_version, current)
+            changes = apply(frame.iloc[pos].to_dict())
+
+            with self.locks.hold(STORE_SLOT):
+                frame = self._frame()
+                before = self._cached[0]
+                pos = self._position(frame, animal_id)
+                if self._version(frame, pos) != current:
+                    # a batch commit (upsert_many: bulk import, clinic sync)
+                    # doesn't take record locks and changed it meanwhile
+                    if expected_version is not None:
+                        raise VersionConflict(animal_id, expected_version, self._version(frame, pos))
+                    current = self._version(frame, pos)
+                    changes = apply(frame.iloc[pos].to_dict())
+
+                old = frame.iloc[pos].to_dict()
+                frame = frame.copy()
+                if VERSION_COLUMN not in frame:
+                    frame[VERSION_COLUMN] = 0
+                if UPDATED_COLUMN not in frame:
+                    frame[UPDATED_COLUMN] = ""
+                changes = {**changes, VERSION_COLUMN: current + 1, UPDATED_COLUMN: _now()}
+                for col, value in changes.items():
+                    if col not in frame:
+                        frame[col] = ""
+                    if isinstance(value, str) and frame[col].dtype != object:
+                        frame[col] = frame[col].astype(object)
+                    frame.iat[pos, frame.columns.get_loc(col)] = value
+                frame[VERSION_COLUMN] = pd.to_numeric(frame[VERSION_COLUMN], errors="coerce").fillna(0).astype(int)
+                source = self._commit(frame)
+                record = frame.iloc[pos].to_dict()
+                self._run_commit_hooks(old, record)
+
+        self._after_commit(source, old, record, before)
+        return record
+
+    def upsert_many(self, rows, blanks=False):
+        """Insert or update many records in one commit; returns (inserted, updated).
+
+        rows is a DataFrame with unique Animal IDs. Existing records take the
+        non-blank values of rows (with blanks=True every non-NaN value, so ""
+        clears a cell) and Version + 1, the others are appended with Version
+        1. Listeners are told that all records were replaced, batch_listeners
+        get each changed record before and after.
+
+        rows may also be a function of the current records returning that
+        DataFrame, called under the store lock (read-decide-write in one
+        commit). Nothing is committed when there are no rows.
+        """
+        with self.locks.hold(STORE_SLOT):
+            if callable(rows):
+                rows = rows(self._frame())
+            if rows.empty:
+                return 0, 0
+            ids = rows["Animal ID"].astype(str).str.strip()
+            original = self._frame()
+            frame = original.copy()
+            for col, default in ((VERSION_COLUMN, 0), (UPDATED_COLUMN, "")):
+                if col not in frame:
+                    frame[col] = default
+            frame[VERSION_COLUMN] = pd.to_numeric(frame[VERSION_COLUMN], errors="coerce").fillna(0).astype(int)
+
+            # first row wins for a repeated Animal ID, like _position()
+            existing = pd.Series(range(len(frame)), index=frame["Animal ID"].astype(str))
+            existing = existing[~existing.index.duplicated()]
+            pos = existing.reindex(ids).to_numpy()
+            found = ~pd.isna(pos)
+            at = pos[found].astype(int)
+            now = _now()
+
+            changed = rows[found]
+            for col in rows.columns:
+                if col in ("Animal ID", VERSION_COLUMN, UPDATED_COLUMN):
+                    continue
+                values = changed[col]
+                filled = values.notna()
+                if not blanks:
+                    filled &= values.astype(str).str.strip() != ""
+                filled = filled.to_numpy()
+                if not filled.any():
+                    continue
+                if col not in frame:
+                    frame[col] = ""
+                if frame[col].dtype != object:
+                    frame[col] = frame[col].astype(object)
+                frame.iloc[at[filled], frame.columns.get_loc(col)] = values.to_numpy()[filled]
+            frame.iloc[at, frame.columns.get_loc(VERSION_COLUMN)] += 1
+            frame.iloc[at, frame.columns.get_loc(UPDATED_COLUMN)] = now
+
+            added = rows[~found].assign(**{VERSION_COLUMN: 1, UPDATED_COLUMN: now})
+            if len(added):
+                frame = pd.concat([frame, added], ignore_index=True)
+            self._commit(frame)
+            # re-read so the cached frame and the snapshot get the same dtypes
+            # as any other reader of the CSV (imported cells arrive as text)
+            frame = pd.read_csv(self.csv_path)
+            source = file_fingerprint(self.csv_path)
+            self._cached = (source, frame)
+            self._run_commit_hooks(None, None)
+            changes = []
+            if self.batch_listeners:
+                # appended rows follow the original ones, so positions hold
+                changes = list(zip(original.iloc[at].to_dict("records"),
+                                   frame.iloc[at].to_dict("records")))
+                changes += [(None, r) for r in frame.iloc[len(original):].to_dict("records")]
+
+        self._after_commit(source)
+        for listener in self.batch_listeners:
+            listener(changes)
+        return int((~found).sum()), int(found.sum())
+
+
+class StoreView:
+    """An in-memory structure derived from the records, kept in step with saves.
+
+    build(store) must return an object with .source (the CSV fingerprint it
+    reflects, see RecordStore.read(with_source=True)) and apply(old, new)
+    for one saved record. Saves made by this process are applied in place;
+    any other change to the CSV (another worker saved, all records were
+    replaced) makes the next get() rebuild it.
+    """
+
+    def __init__(self, store, build):
+        self.store = store
+        self.build = build
+        self._view = None
+        self._lock = threading.Lock()
+        store.listeners.append(self._committed)
+
+    def get(self):
+        view = self._view
+        if view is None or view.source != self.store.fingerprint():
+            with self._lock:
+                view = self._view
+                if view is None or view.source != self.store.fingerprint():
+                    view = self._view = self.build(self.store)
+        return view
+
+    def invalidate(self):
+        """Rebuild on the next get(), e.g. after what it was derived from changed."""
+        with self._lock:
+            self._view = None
+
+    def _committed(self, old, new, before, after):
+        with self._lock:
+            view = self._view
+            if view is None:
+                return
+            if new is None or view.source != before:
+                self._view = None
+                return
+            view.apply(old, new)
+            view.source = after
+
+
+def _timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    from features import training_columns
+
+    parser = argparse.ArgumentParser(description="Build or benchmark the record snapshot")
+    parser.add_argument("command", choices=["build", "bench"])
+    parser.add_argument("--csv", default=os.environ.get("VET_CSV_FILE", "Animal_Health_Record_500.csv"))
+    parser.add_argument("--snapshot", default=os.environ.get("VET_SNAPSHOT_FILE"))
+    args = parser.parse_args()
+
+    if _arrow() is None:
+        raise SystemExit("pyarrow is not installed; the store is reading the CSV directly")
+    store = RecordStore(args.csv, args.snapshot)
+    store.refresh(force=args.command == "build")
+    if args.command == "build":
+        print("Wrote", store.snapshot_path)
+        return
+
+    timings = {
+        "csv, all columns": lambda: pd.read_csv(store.csv_path),
+        "csv, training columns": lambda: pd.read_csv(store.csv_path, usecols=training_columns),
+        "snapshot, all columns": lambda: store.read(),
+        "snapshot, training columns": lambda: store.read(training_columns),
+    }
+    baseline = None
+    for label, fn in timings.items():
+        seconds = _timed(fn)
+        baseline = baseline or seconds
+        print(f"{label:<28}{seconds * 1000:>10.1f} ms{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Background model retraining with an atomic hot-swap.
+
+The app keeps all of its models in one immutable bundle held by a
+ModelRegistry. Request handlers call registry.current() once and use that
+bundle for the whole request, so they never block and never see a mix of
+old and new models. The BackgroundRetrainer trains a candidate bundle off
+to the side, validates it against the live one and swaps the reference.
+
+Settings (environment variables, all optional):
+  VET_RETRAIN_INTERVAL    seconds between scheduled retrains (default 3600, 0 = off)
+  VET_RETRAIN_AFTER       record changes that trigger a retrain (default 25)
+  VET_RETRAIN_TOLERANCE   accuracy drop still accepted per model (default 0.02)
+"""
+
+import os
+import threading
+import time
+import traceback
+
+RETRAIN_INTERVAL = float(os.environ.get("VET_RETRAIN_INTERVAL", "3600"))
+RETRAIN_AFTER = int(os.environ.get("VET_RETRAIN_AFTER", "25"))
+RETRAIN_TOLERANCE = float(os.environ.get("VET_RETRAIN_TOLERANCE", "0.02"))
+
+
+class ModelRegistry:
+    """Holds the live model bundle.
+
+    Reading is a plain attribute load (atomic in CPython), so readers take no
+    lock. Writers are serialised so version numbers stay in order.
+    """
+
+    def __init__(self, bundle=None):
+        self._bundle = bundle
+        self._swap_lock = threading.Lock()
+        self.swaps = 0
+
+    def current(self):
+        return self._bundle
+
+    def swap(self, bundle):
+        with self._swap_lock:
+            previous = self._bundle
+            self._bundle = bundle
+            self.swaps += 1
+        return previous
+
+
+class BackgroundRetrainer:
+    """Retrain on a schedule or after N record changes, then hot-swap.
+
+    retrain_fn(current_bundle) must return (candidate, candidate_scores,
+    current_scores), where both score dicts were measured on the same
+    held-out rows. The candidate is swapped in only if no model's score
+    drops by more than tolerance. on_swap(bundle), if given, runs after an
+    accepted candidate went live (e.g. to persist it).
+    """
+
+    def __init__(self, registry, retrain_fn, interval=RETRAIN_INTERVAL,
+                 after_changes=RETRAIN_AFTER, tolerance=RETRAIN_TOLERANCE, on_swap=None):
+        self.registry = registry
+        self.retrain_fn = retrain_fn
+        self.on_swap = on_swap
+        self.interval = interval
+        self.after_changes = after_changes
+        self.tolerance = tolerance
+
+        self.pending_changes = 0
+        self.last_result = None
+        self._counter_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- called from request handlers ----
+    def record_changed(self, n=1):
+        with self._counter_lock:
+            self.pending_changes += n
+            due = self.after_changes and self.pending_changes >= self.after_changes
+        if due:
+            self._wake.set()
+
+    # ---- thread control ----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-retrainer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.interval or None)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.retrain_now()
+
+    # ---- one retrain cycle ----
+    def accept(self, candidate_scores, current_scores):
+        for name, score in candidate_scores.items():
+            if score < current_scores.get(name, 0.0) - self.tolerance:
+                return False
+        return True
+
+    def retrain_now(self):
+        with self._counter_lock:
+            changes = self.pending_changes
+            self.pending_changes = 0
+
+        started = time.time()
+        current = self.registry.current()
+        try:
+            candidate, candidate_scores, current_scores = self.retrain_fn(current)
+        except Exception:
+            traceback.print_exc()
+            with self._counter_lock:
+                self.pending_changes += changes
+            self.last_result = {"status": "error", "at": started}
+            return False
+
+        accepted = self.accept(candidate_scores, current_scores)
+        if accepted:
+            self.registry.swap(candidate)
+            if self.on_swap is not None:
+                try:
+                    self.on_swap(candidate)
+                except Exception:
+                    traceback.print_exc()
+        self.last_result = {
+            "status": "swapped" if accepted else "rejected",
+            "at": started,
+            "seconds": round(time.time() - started, 2),
+            "changes": changes,
+            "candidate": candidate_scores,
+            "current": current_scores,
+        }
+        print("Retrain:", self.last_result)
+        return accepted
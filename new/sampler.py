@@ -0,0 +1,172 @@
+"""
+Opt-in sampling profiler for live traffic.
+
+A background thread wakes every few milliseconds, grabs the stacks of all
+other threads with sys._current_frames() and counts them. Nothing is hooked
+into the interpreter, so overhead is limited to the sampling thread and is
+zero while the profiler is off.
+
+Output is the "collapsed stack" format (one "frame;frame;frame count" line
+per unique stack) that flamegraph.pl, speedscope and inferno read directly.
+
+Admin routes (only enabled when VET_ADMIN_TOKEN is set; send the token in
+an X-Admin-Token header - not in the URL, where it would end up in logs):
+  POST /admin/profile/start?seconds=30        sample for a time window
+  POST /admin/profile/start?requests=200      ... or for the next N requests
+  POST /admin/profile/stop
+  GET  /admin/profile                         status as JSON
+  GET  /admin/profile/download                collapsed stacks (text)
+"""
+
+import collections
+import hmac
+import os
+import sys
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.005
+MAX_SECONDS = 600
+
+# (module, function) of the innermost Python frame of threads that are
+# just waiting for work; the blocking call itself is C and has no frame
+IDLE_FUNCTIONS = {
+    ("threading", "wait"), ("threading", "_wait_for_tstate_lock"),
+    ("queue", "get"), ("selectors", "select"),
+    ("socket", "accept"), ("socket", "readinto"), ("ssl", "recv_into"),
+    ("multiprocessing.connection", "_recv"),
+    ("gunicorn.workers.sync", "wait"), ("gunicorn.arbiter", "sleep"),
+}
+
+
+def _idle(frame):
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FUNCTIONS
+
+
+def _frame_label(code):
+    parts = code.co_filename.replace("\\", "/").split("/")
+    return f"{'/'.join(parts[-2:])}:{code.co_name}"
+
+
+class StackSampler:
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.samples = 0
+        self.started_at = None
+        self.stopped_at = None
+        self.interval = DEFAULT_INTERVAL
+        self._deadline = None
+        self._requests_left = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds=None, requests=None, interval=DEFAULT_INTERVAL):
+        with self._lock:
+            if self.running:
+                return False
+            self.counts = collections.Counter()
+            self.samples = 0
+            self.interval = interval
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._deadline = time.monotonic() + min(seconds or MAX_SECONDS, MAX_SECONDS)
+            self._requests_left = requests
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def request_done(self):
+        # called from after_request; cheap when not profiling
+        if self._requests_left is not None and self.running:
+            self._requests_left -= 1
+            if self._requests_left <= 0:
+                self._stop.set()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.is_set() and time.monotonic() < self._deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me or _idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+        self.stopped_at = time.time()
+
+    def collapsed(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+    def status(self):
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "unique_stacks": len(self.counts),
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "requests_left": self._requests_left,
+        }
+
+
+sampler = StackSampler()
+
+
+def register_profiler_routes(app, token=None):
+    """Add the /admin/profile routes; they answer 403 unless token matches."""
+    from flask import Response, abort, jsonify, request
+
+    token = token if token is not None else os.environ.get("VET_ADMIN_TOKEN", "")
+
+    def _require_admin():
+        given = request.headers.get("X-Admin-Token", "")
+        if not token or not hmac.compare_digest(given, token):
+            abort(403)
+
+    @app.after_request
+    def _count_profiled_request(response):
+        sampler.request_done()
+        return response
+
+    @app.route("/admin/profile/start", methods=["POST"])
+    def profile_start():
+        _require_admin()
+        seconds = request.args.get("seconds", type=float)
+        requests_n = request.args.get("requests", type=int)
+        interval = request.args.get("interval_ms", default=DEFAULT_INTERVAL * 1000, type=float) / 1000
+        if not sampler.start(seconds=seconds, requests=requests_n, interval=max(interval, 0.001)):
+            return jsonify(error="profiler already running", **sampler.status()), 409
+        return jsonify(sampler.status())
+
+    @app.route("/admin/profile/stop", methods=["POST"])
+    def profile_stop():
+        _require_admin()
+        sampler.stop()
+        return jsonify(sampler.status())
+
+    @app.route("/admin/profile")
+    def profile_status():
+        _require_admin()
+        return jsonify(sampler.status())
+
+    @app.route("/admin/profile/download")
+    def profile_download():
+        _require_admin()
+        return Response(sampler.collapsed(), mimetype="text/plain",
+                        headers={"Content-Disposition": "attachment; filename=profile.collapsed"})
+
+    return app
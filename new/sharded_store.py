@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Record store split into per-clinic (or per-district) shards.
+
+A shard map (JSON, VET_SHARD_MAP) names one CSV per shard; paths are
+relative to the map file:
+
+  {"default": "main",
+   "shards": {"main": "Animal_Health_Record_500.csv",
+              "NTH": "shards/north.csv", "STH": "shards/south.csv"}}
+
+Records are routed by the Animal ID prefix before the first "-" (map key
+"separator"), case-insensitively: NTH-0042 lives in shards/north.csv,
+IDs without a known prefix (the plain numeric ones) in the default shard.
+
+Every shard is a RecordStore of its own, with its own CSV, snapshot and
+locks, so a save only rewrites its shard's file and only waits for saves
+in the same shard - a busy district doesn't hold up lookups or saves in
+another. ShardedStore has the RecordStore interface: single-record calls
+go to the animal's shard, whole-herd reads (search index, analytics,
+worklist, exports) fan out to every shard on a thread pool
+(VET_SHARD_WORKERS) and are concatenated. Bulk writes are split by shard
+and committed one shard after another: the rows are checked up front, but
+a shard that fails to commit (disk full, lock timeout) doesn't undo the
+shards before it - PartialCommitError says which ones committed.
+
+move_shard() copies a shard to a new path (another disk, or storage served
+by another node) while holding the shard's store lock, repoints the map
+and renames the old CSV to <csv>.moved, so a process still using the old
+path fails its save instead of writing to a dead copy. Other processes
+pick up map changes on their next call.
+
+  python sharded_store.py split Animal_Health_Record_500.csv --map shards.json
+  python sharded_store.py add WST shards/west.csv --map shards.json
+  python sharded_store.py move NTH /mnt/node2/north.csv --map shards.json
+  python sharded_store.py status --map shards.json
+  python sharded_store.py bench --map shards.json    parallel vs one-by-one read
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy_loading import LazyModule
+from prefork import file_fingerprint
+from record_store import CATEGORICAL_COLUMNS, STORE_SLOT, RecordStore, _timed
+
+pd = LazyModule("pandas")
+
+SHARD_WORKERS = int(os.environ.get("VET_SHARD_WORKERS", "8"))
+
+
+class ShardMapError(ValueError):
+    """The shard map is missing, malformed or doesn't name its default shard."""
+
+
+class PartialCommitError(Exception):
+    """A bulk write failed in one shard after others had committed (they stay committed)."""
+
+    def __init__(self, committed, failed, error):
+        self.committed = committed  # {shard name: (inserted, updated)}
+        self.failed = failed
+        super().__init__(f"Bulk write failed in shard {failed} after committing "
+                         f"{', '.join(committed) or 'no shard'}: {error}")
+
+
+class ShardMap:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ShardMapError(f"Can't read shard map {path}: {e}")
+        self.shards = {name: self._resolve(p) for name, p in (raw.get("shards") or {}).items()}
+        self.default = raw.get("default")
+        self.separator = raw.get("separator", "-")
+        if self.default not in self.shards:
+            raise ShardMapError(f"Shard map {path} must name its default shard under \"shards\"")
+        self.fingerprint = file_fingerprint(self.path)
+
+    def _resolve(self, path):
+        return path if os.path.isabs(path) else os.path.join(os.path.dirname(self.path), path)
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        shards = {}
+        for name, path in self.shards.items():
+            relative = os.path.relpath(path, folder)
+            shards[name] = path if relative.startswith("..") else relative
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump({"default": self.default, "separator": self.separator, "shards": shards}, f, indent=2)
+        os.replace(tmp, self.path)
+        self.fingerprint = file_fingerprint(self.path)
+
+
+def typed_concat(frames):
+    """Concatenate shard frames; categoricals with different categories stay categorical."""
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    for col in CATEGORICAL_COLUMNS:
+        if col in frame and frame[col].dtype != "category":
+            frame[col] = frame[col].astype("category")
+    return frame
+
+
+class ShardedStore:
+    def __init__(self, map_path):
+        self.map = ShardMap(map_path)
+        self._stores = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        # same contract as RecordStore.listeners; before/after are the
+        # fingerprints of the whole sharded store
+        self.listeners = []
+        # same as RecordStore.commit_hooks (ordered within each shard)
+        self.commit_hooks = []
+        # same as RecordStore.batch_listeners, called once per shard committed
+        self.batch_listeners = []
+        self._open()
+
+    def _open(self):
+        for name, path in self.map.shards.items():
+            store = self._stores.get(name)
+            if store is None or store.csv_path != path:
+                store = RecordStore(path)
+                store.listeners.append(self._forward(name))
+                store.commit_hooks.append(self._run_commit_hooks)
+                store.batch_listeners.append(self._run_batch_listeners)
+                self._stores[name] = store
+        for name in set(self._stores) - set(self.map.shards):
+            del self._stores[name]
+        self._routes = {name.upper(): name for name in self._stores}
+
+    def _sync(self):
+        """Reload the map if another process changed it (add, move)."""
+        if file_fingerprint(self.map.path) != self.map.fingerprint:
+            with self._lock:
+                if file_fingerprint(self.map.path) != self.map.fingerprint:
+                    self.map = ShardMap(self.map.path)
+                    self._open()
+        return self._stores
+
+    def _forward(self, name):
+        def committed(old, new, before, after):
+            sources = dict(self.fingerprint())
+            composite_before = tuple((n, before if n == name else s) for n, s in sources.items())
+            composite_after = tuple((n, after if n == name else s) for n, s in sources.items())
+            for listener in self.listeners:
+                listener(old, new, composite_before, composite_after)
+        return committed
+
+    def _run_commit_hooks(self, old, new):
+        for hook in self.commit_hooks:
+            hook(old, new)
+
+    def _run_batch_listeners(self, changes):
+        for listener in self.batch_listeners:
+            listener(changes)
+
+    # ---- routing ----
+    @property
+    def csv_path(self):
+        """The default shard's CSV (for the header and sidecar files)."""
+        return self._sync()[self.map.default].csv_path
+
+    def shard_name(self, animal_id):
+        self._sync()
+        return self._route(animal_id)
+
+    def _route(self, animal_id):
+        prefix, sep, _rest = str(animal_id).strip().partition(self.map.separator)
+        if sep:
+            name = self._routes.get(prefix.upper())
+            if name is not None:
+                return name
+        return self.map.default
+
+    def shard_for(self, animal_id):
+        stores = self._sync()
+        return stores[self._route(animal_id)]
+
+    def parts(self):
+        return list(self._sync().values())
+
+    def fingerprint(self):
+        return tuple((name, store.fingerprint()) for name, store in self._sync().items())
+
+    def fan_out(self, fn):
+        """fn(shard store) on every shard in parallel; returns {shard name: result}."""
+        stores = self._sync()
+        if len(stores) == 1:
+            return {name: fn(store) for name, store in stores.items()}
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="shard")
+        futures = {name: self._pool.submit(fn, store) for name, store in stores.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _split(self, frame):
+        stores = self._sync()
+        if not len(frame):
+            return {name: frame for name in stores}
+        # shard_name() for a whole column at once
+        prefix, sep, _rest = (frame["Animal ID"].astype(str).str.strip()
+                              .str.partition(self.map.separator).T.to_numpy())
+        names = pd.Series(prefix).str.upper().map(self._routes)
+        names = names.where(sep != "", None).fillna(self.map.default).to_numpy()
+        return {name: frame[names == name] for name in stores}
+
+    # ---- reads ----
+    def refresh(self, force=False):
+        return any(self.fan_out(lambda store: store.refresh(force)).values())
+
+    def read(self, columns=None, with_source=False):
+        results = self.fan_out(lambda store: store.read(columns, with_source=True))
+        frame = typed_concat([f for f, _source in results.values()])
+        if not with_source:
+            return frame
+        return frame, tuple((name, source) for name, (_f, source) in results.items())
+
+    def read_csv(self):
+        # each shard as last parsed; concat makes the copy callers may edit
+        return pd.concat(list(self.fan_out(lambda store: store.cached_csv()[0]).values()), ignore_index=True)
+
+    def get(self, animal_id):
+        return self.shard_for(animal_id).get(animal_id)
+
+    # ---- writes ----
+    def update(self, animal_id, apply, expected_version=None):
+        return self.shard_for(animal_id).update(animal_id, apply, expected_version)
+
+    def upsert_many(self, rows, blanks=False):
+        # one shard after another, in this thread: commit hooks (e.g. clinic
+        # sync's journal of received entries) see the caller's thread. A
+        # function of the records only works per shard: use shard_for()
+        if callable(rows):
+            raise TypeError("ShardedStore.upsert_many needs a DataFrame; pass functions to shard_for(id).upsert_many")
+        if rows.empty:
+            return 0, 0
+        if "Animal ID" not in rows:
+            raise ValueError("rows need an Animal ID column")
+        ids = rows["Animal ID"].astype(str).str.strip()
+        if rows["Animal ID"].isna().any() or (ids == "").any():
+            raise ValueError("rows need an Animal ID in every row")
+        if ids.duplicated().any():
+            raise ValueError(f"Animal IDs repeat: {', '.join(ids[ids.duplicated()].unique()[:5])}")
+        committed = {}
+        for name, part in self._split(rows).items():
+            if len(part):
+                try:
+                    committed[name] = self._stores[name].upsert_many(part, blanks)
+                except Exception as e:
+                    raise PartialCommitError(committed, name, e) from e
+        return (sum(i for i, _u in committed.values()), sum(u for _i, u in committed.values()))
+
+    def save(self, df):
+        for name, part in self._split(df).items():
+            self._stores[name].save(part)
+
+    # ---- shard management ----
+    @property
+    def shards(self):
+        """{shard name: RecordStore}"""
+        return dict(self._sync())
+
+    def split_from(self, source, chunk_size=100000):
+        """Replace the shards' records with those of one CSV; returns rows per shard."""
+        stores = self._sync()
+        counts = {name: 0 for name in stores}
+        tmp = {name: f"{store.csv_path}.split{os.getpid()}" for name, store in stores.items()}
+        for chunk in pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size):
+            for name, part in self._split(chunk).items():
+                part.to_csv(tmp[name], mode="a" if counts[name] else "w", header=not counts[name], index=False)
+                counts[name] += len(part)
+        header = pd.read_csv(source, nrows=0)
+        for name, store in stores.items():
+            if not counts[name]:
+                header.to_csv(tmp[name], index=False)
+            os.replace(tmp[name], store.csv_path)
+            store.refresh(force=True)
+        return counts
+
+    def add_shard(self, name, path):
+        """Add an empty shard (same columns as the default one) for a new clinic."""
+        stores = self._sync()
+        if name.upper() in self._routes:
+            raise ShardMapError(f"Shard {name} already exists")
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            header = pd.read_csv(stores[self.map.default].csv_path, nrows=0)
+            header.to_csv(path, index=False)
+        with self._lock:
+            self.map.shards[name] = path
+            self.map.save()
+            self._open()
+        return self._stores[name]
+
+    def move_shard(self, name, dest):
+        """Move a shard's CSV to dest; its saves wait until the copy is in place."""
+        store = self._sync().get(name)
+        if store is None:
+            raise ShardMapError(f"No shard named {name}")
+        dest = os.path.abspath(dest)
+        if dest == os.path.abspath(store.csv_path):
+            return store
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with store.locks.hold(STORE_SLOT):
+            tmp = f"{dest}.tmp{os.getpid()}"
+            shutil.copyfile(store.csv_path, tmp)
+            os.replace(tmp, dest)
+            with self._lock:
+                self.map.shards[name] = dest
+                self.map.save()
+                self._open()
+            os.replace(store.csv_path, store.csv_path + ".moved")
+        if os.path.exists(store.snapshot_path):
+            os.remove(store.snapshot_path)
+        return self._stores[name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the shards of a sharded record store")
+    parser.add_argument("command", choices=["split", "add", "move", "status", "bench"])
+    parser.add_argument("args", nargs="*", help="split: SOURCE_CSV; add: NAME PATH; move: NAME DEST")
+    parser.add_argument("--map", default=os.environ.get("VET_SHARD_MAP", "shards.json"))
+    args = parser.parse_args()
+    needed = {"split": 1, "add": 2, "move": 2}.get(args.command, 0)
+    if len(args.args) != needed:
+        parser.error(f"{args.command} takes {needed} argument(s)")
+
+    try:
+        if args.command == "split":
+            # the shard files may not exist yet; give every shard an empty one first
+            shard_map = ShardMap(args.map)
+            for path in shard_map.shards.values():
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    pd.read_csv(args.args[0], nrows=0).to_csv(path, index=False)
+            counts = ShardedStore(args.map).split_from(args.args[0])
+            print(json.dumps(counts, indent=2))
+            return
+        store = ShardedStore(args.map)
+        if args.command == "add":
+            print("Added", store.add_shard(args.args[0], args.args[1]).csv_path)
+        elif args.command == "move":
+            print("Moved to", store.move_shard(args.args[0], args.args[1]).csv_path)
+        elif args.command == "status":
+            for name, s in store.shards.items():
+                rows = len(s.read(["Animal ID"]))
+                default = "  (default)" if name == store.map.default else ""
+                print(f"{name:<10}{rows:>10} rows  {os.path.getsize(s.csv_path) / 1e6:>8.1f} MB  {s.csv_path}{default}")
+        else:
+            store.refresh()
+            parts = store.parts()
+            one_by_one = _timed(lambda: [part.read() for part in parts])
+            fan_out = _timed(store.read)
+            print(f"one by one {one_by_one * 1000:.1f} ms, fan-out {fan_out * 1000:.1f} ms ({len(parts)} shards)")
+    except ShardMapError as e:
+        raise SystemExit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Chunked, bounded-memory training input for record archives larger than RAM.
+
+The record source (a CSV or Parquet file, e.g. the merged district archive)
+is read chunk_size rows at a time and only the requested columns are
+decoded. Features are computed per chunk with the same vectorised code as
+the in-memory path (features.py), so peak memory is about one chunk plus
+whatever the model keeps:
+
+  - out-of-core learners (OnlineHealthModel) see every row, one chunk
+    at a time, through partial_fit;
+  - forests, which need all their rows at once, are fitted on a uniform
+    random sample of at most sample_size rows (reservoir sampling, so the
+    total row count doesn't need to be known up front).
+
+rap.py uses this with VET_TRAIN_MODE=stream.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = int(os.environ.get("VET_STREAM_CHUNK", "100000"))
+SAMPLE_SIZE = int(os.environ.get("VET_STREAM_SAMPLE", "200000"))
+
+
+def iter_chunks(path, columns=None, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size rows from a CSV or Parquet file."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        if columns is not None:
+            columns = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        if columns is not None:
+            header = pd.read_csv(path, nrows=0).columns
+            columns = [c for c in columns if c in header]
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+
+
+def column_values(path, column, chunk_size=CHUNK_SIZE):
+    """Distinct values of one column, e.g. the label set for partial_fit."""
+    values = set()
+    for chunk in iter_chunks(path, [column], chunk_size):
+        values.update(chunk[column].dropna().astype(str).unique())
+    return sorted(values)
+
+
+class Reservoir:
+    """Uniform sample of at most capacity rows from a stream of DataFrames.
+
+    Algorithm R, vectorised per chunk: row t of the stream (0-based) takes
+    slot t while the reservoir fills, afterwards a random slot in [0, t]
+    and is kept only if that slot is < capacity. Within a chunk later rows
+    win a contested slot, exactly as if the rows were added one by one.
+    """
+
+    def __init__(self, capacity=SAMPLE_SIZE, seed=42):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self.columns = None
+        self._data = None
+        self._dtypes = None
+
+    def add(self, chunk):
+        n = len(chunk)
+        if not n:
+            return self
+        if self._data is None:
+            self.columns = list(chunk.columns)
+            self._dtypes = dict(chunk.dtypes)
+            self._data = {c: np.empty(self.capacity, dtype=object) for c in self.columns}
+        else:
+            for c in self.columns:
+                self._dtypes[c] = _common_dtype(self._dtypes[c], chunk[c].dtype)
+
+        t = np.arange(self.seen, self.seen + n)
+        slots = np.where(t < self.capacity, t, self.rng.integers(0, t + 1))
+        keep = np.flatnonzero(slots < self.capacity)
+        # last writer wins for repeated slots, like sequential replacement
+        slots_rev = slots[keep][::-1]
+        _, first = np.unique(slots_rev, return_index=True)
+        rows = keep[::-1][first]
+        for c in self.columns:
+            self._data[c][slots[rows]] = chunk[c].to_numpy(dtype=object)[rows]
+        self.seen += n
+        return self
+
+    def frame(self):
+        if self._data is None:
+            return pd.DataFrame()
+        size = min(self.seen, self.capacity)
+        df = pd.DataFrame({c: v[:size] for c, v in self._data.items()})
+        # back to a dtype every chunk fits (object arrays otherwise)
+        for c, dtype in self._dtypes.items():
+            try:
+                if dtype is None:
+                    raise TypeError(c)
+                df[c] = df[c].astype(dtype)
+            except (TypeError, ValueError):
+                df[c] = df[c].infer_objects()
+        return df
+
+
+def _common_dtype(a, b):
+    """dtype holding the values of chunks typed a and b, or None if there's none.
+
+    Categoricals take the union of their categories (the first chunk's
+    alone would turn later categories into NaN); ints and floats widen,
+    like pd.concat would.
+    """
+    if a is None or a == b:
+        return a
+    if isinstance(a, pd.CategoricalDtype) and isinstance(b, pd.CategoricalDtype):
+        return pd.CategoricalDtype(a.categories.append(b.categories.difference(a.categories)), a.ordered)
+    numeric = pd.api.types.is_numeric_dtype
+    bool_ = pd.api.types.is_bool_dtype
+    if isinstance(a, np.dtype) and isinstance(b, np.dtype) and numeric(a) and numeric(b) \
+            and not bool_(a) and not bool_(b):
+        return np.result_type(a, b)
+    return None
+
+
+def reservoir_sample(chunks, capacity=SAMPLE_SIZE, seed=42):
+    reservoir = Reservoir(capacity, seed)
+    for chunk in chunks:
+        reservoir.add(chunk)
+    return reservoir.frame()
+
+
+def learn_chunks(model, chunks, features_fn):
+    """Feed every chunk to an out-of-core model: model.learn_many(*features_fn(chunk))."""
+    for chunk in chunks:
+        X, y = features_fn(chunk)
+        model.learn_many(X, y)
+    return model
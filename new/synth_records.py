@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Synthetic animal health record generator for scale and load testing.
+
+Learns per-species distributions from the real CSV and streams realistic
+records in chunks, so memory stays bounded by --chunk-size no matter how
+many rows are written (10k ... 100M).
+
+What is learned per species:
+  - share of the herd
+  - Age, BP (systolic/diastolic), heart rate, oxygen saturation and weight
+    as a multivariate normal (keeps their correlations), clipped to the
+    observed range
+  - Breed, Sex, urine colour and Health Status frequencies
+  - the joint (Symptom 1, Symptom 2, Disease) distribution, so symptoms and
+    diseases co-occur like in the real data
+  - Vaccination 1 / 2 fill rates and vaccine names, Special Care rate
+
+Usage:
+  python synth_records.py --rows 1000000 --out herd_1m.csv
+  python synth_records.py --rows 100000000 --chunk-size 500000 --out herd_100m.parquet
+"""
+
+import argparse
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Animal_Health_Record_500.csv")
+
+NUMERIC = ["Age (years)", "BP_Systolic", "BP_Diastolic", "Heart Rate (bpm)",
+           "Oxygen Saturation (%)", "Weight (kg)"]
+CATEGORICAL = ["Breed", "Sex", "Urine Changes in Color", "Health Status"]
+CLINICAL = ["Symptom 1", "Symptom 2", "Disease"]
+
+# used when the source CSV has too few vaccinations to learn names from
+# (same lists as the "Recommended Vaccines" panel)
+LARGE_ANIMAL_VACCINES = ["FMD", "HS", "BQ", "Anthrax"]
+SMALL_ANIMAL_VACCINES = ["Rabies", "Parvo", "Distemper", "Leptospirosis"]
+SMALL_ANIMALS = {"Dog", "Cat"}
+MIN_LEARNED_VACCINES = 20
+
+
+def _freq(series):
+    counts = series.fillna("").astype(str).value_counts()
+    return counts.index.to_numpy(), (counts / counts.sum()).to_numpy()
+
+
+def _vaccine_name(value):
+    return str(value).split(" (")[0].strip()
+
+
+# ---------------------------
+# Learning
+# ---------------------------
+def learn_profiles(df):
+    """Return (profiles by species, name distribution, output columns)."""
+    df = df.copy()
+    bp = df["BP"].astype(str).str.split("/", expand=True)
+    df["BP_Systolic"] = pd.to_numeric(bp[0], errors="coerce")
+    df["BP_Diastolic"] = pd.to_numeric(bp[1], errors="coerce")
+    for col in NUMERIC:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    profiles = {}
+    for species, group in df.groupby("Species"):
+        values = group[NUMERIC].dropna().to_numpy(dtype=float)
+        mean = values.mean(axis=0)
+        if len(values) > len(NUMERIC):
+            cov = np.cov(values, rowvar=False)
+        else:
+            cov = np.diag(values.var(axis=0) + 1e-6)
+        lo, hi = values.min(axis=0), values.max(axis=0)
+
+        clinical = group[CLINICAL].fillna("").astype(str).agg("\x1f".join, axis=1)
+        vacc1 = group.get("Vaccination 1", pd.Series(dtype=object)).dropna()
+        vacc2 = group.get("Vaccination 2", pd.Series(dtype=object)).dropna()
+        special = group.get("Special Care", pd.Series(dtype=object)).fillna("")
+
+        profiles[species] = {
+            "share": len(group) / len(df),
+            "mean": mean,
+            "cov": cov,
+            "lo": lo,
+            "hi": hi,
+            "categorical": {col: _freq(group[col]) for col in CATEGORICAL if col in group},
+            "clinical": _freq(clinical),
+            "vacc1_rate": len(vacc1) / len(group),
+            "vacc2_rate": len(vacc2) / len(group),
+            "vaccines": [_vaccine_name(v) for v in pd.concat([vacc1, vacc2])],
+            "special_rate": float((special.str.lower() == "yes").mean()),
+        }
+
+    all_vaccines = sum((p["vaccines"] for p in profiles.values()), [])
+    for species, p in profiles.items():
+        if len(all_vaccines) >= MIN_LEARNED_VACCINES:
+            p["vaccines"] = _freq(pd.Series(all_vaccines))
+        else:
+            names = SMALL_ANIMAL_VACCINES if species in SMALL_ANIMALS else LARGE_ANIMAL_VACCINES
+            p["vaccines"] = (np.array(names), np.full(len(names), 1 / len(names)))
+
+    return profiles, _freq(df["Name"]), list(df.columns.drop(["BP_Systolic", "BP_Diastolic"]))
+
+
+# ---------------------------
+# Generation
+# ---------------------------
+def _vaccination(rng, n, rate, vaccines, today):
+    names, probs = vaccines
+    given = rng.random(n) < rate
+    out = np.full(n, "", dtype=object)
+    k = int(given.sum())
+    if k:
+        days = rng.integers(0, 730, k)
+        dates = [(today - datetime.timedelta(days=int(d))).isoformat() for d in days]
+        picked = rng.choice(names, k, p=probs)
+        out[given] = [f"{v} ({d})" for v, d in zip(picked, dates)]
+    return out
+
+
+def generate_chunk(profiles, names, columns, n, rng, start_id, vaccination_rate=None):
+    species_list = list(profiles)
+    shares = np.array([profiles[s]["share"] for s in species_list])
+    counts = rng.multinomial(n, shares / shares.sum())
+    today = datetime.date.today()
+
+    parts = []
+    for species, k in zip(species_list, counts):
+        if not k:
+            continue
+        p = profiles[species]
+        num = rng.multivariate_normal(p["mean"], p["cov"], size=k, method="eigh")
+        num = np.clip(num, p["lo"], p["hi"])
+
+        part = pd.DataFrame({"Species": species}, index=range(k))
+        part["Age (years)"] = num[:, 0].round(1)
+        part["BP"] = (num[:, 1].round().astype(int).astype(str) + "/"
+                      + num[:, 2].round().astype(int).astype(str))
+        part["Heart Rate (bpm)"] = num[:, 3].round().astype(int)
+        part["Oxygen Saturation (%)"] = np.minimum(num[:, 4].round(), 100).astype(int)
+        part["Weight (kg)"] = num[:, 5].round(1)
+
+        for col, (values, probs) in p["categorical"].items():
+            part[col] = rng.choice(values, k, p=probs)
+
+        values, probs = p["clinical"]
+        clinical = pd.Series(rng.choice(values, k, p=probs)).str.split("\x1f", expand=True)
+        for i, col in enumerate(CLINICAL):
+            part[col] = clinical[i].to_numpy()
+
+        rate1 = p["vacc1_rate"] if vaccination_rate is None else vaccination_rate
+        rate2 = p["vacc2_rate"] if vaccination_rate is None else vaccination_rate / 2
+        part["Vaccination 1"] = _vaccination(rng, k, rate1, p["vaccines"], today)
+        part["Vaccination 2"] = np.where(part["Vaccination 1"] != "",
+                                         _vaccination(rng, k, rate2 / max(rate1, 1e-9), p["vaccines"], today), "")
+        part["Special Care"] = np.where(rng.random(k) < p["special_rate"], "Yes", "")
+        parts.append(part)
+
+    chunk = pd.concat(parts, ignore_index=True)
+    chunk = chunk.sample(frac=1, random_state=int(rng.integers(2**31))).reset_index(drop=True)
+    chunk["Name"] = rng.choice(names[0], n, p=names[1])
+    chunk["Animal ID"] = np.arange(start_id, start_id + n)
+    for col in columns:
+        if col not in chunk:
+            chunk[col] = ""
+    return chunk[columns]
+
+
+def stream_records(source_csv, rows, chunk_size=100_000, seed=42, start_id=1, vaccination_rate=None):
+    """Yield DataFrames of at most chunk_size synthetic records."""
+    profiles, names, columns = learn_profiles(pd.read_csv(source_csv))
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        n = min(chunk_size, rows - written)
+        yield generate_chunk(profiles, names, columns, n, rng, start_id + written, vaccination_rate)
+        written += n
+
+
+# ---------------------------
+# Writers
+# ---------------------------
+def write_csv(chunks, path):
+    first = True
+    for chunk in chunks:
+        chunk.to_csv(path, index=False, mode="w" if first else "a", header=first)
+        first = False
+        yield len(chunk)
+
+
+def write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            yield len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic animal health records")
+    parser.add_argument("--source", default=DEFAULT_CSV, help="real CSV to learn distributions from")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start-id", type=int, default=1)
+    parser.add_argument("--vaccination-rate", type=float, default=None,
+                        help="override the learned Vaccination 1 fill rate (0-1)")
+    parser.add_argument("--out", required=True, help=".csv or .parquet")
+    args = parser.parse_args()
+
+    chunks = stream_records(args.source, args.rows, args.chunk_size, args.seed,
+                            args.start_id, args.vaccination_rate)
+    writer = write_parquet if args.out.endswith(".parquet") else write_csv
+
+    started = time.time()
+    done = 0
+    for n in writer(chunks, args.out):
+        done += n
+        print(f"{done:,}/{args.rows:,} rows  ({done / max(time.time() - started, 1e-9):,.0f} rows/s)")
+    print("Wrote", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERD_CSV = os.path.join(APP_DIR, "Animal_Health_Record_500.csv")
+
+# the app's modules sit flat in new/
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture
+def herd_csv(tmp_path):
+    """A private copy of the first 50 sample records; returns its path."""
+    import pandas as pd
+
+    path = tmp_path / "herd.csv"
+    pd.read_csv(HERD_CSV).head(50).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def load_app(herd_csv, monkeypatch):
+    """Import a fresh rap on the private herd; load_app(VET_...="...") sets env first."""
+    loaded = []
+
+    def load(**env):
+        monkeypatch.setenv("VET_CSV_FILE", herd_csv)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        sys.modules.pop("rap", None)
+        import rap
+
+        rap.warm_up.run()
+        loaded.append(rap)
+        return rap
+
+    yield load
+    for rap in loaded:
+        rap.retrainer.stop()
+    sys.modules.pop("rap", None)
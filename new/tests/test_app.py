@@ -0,0 +1,100 @@
+import io
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+
+def test_online_model_learns_imported_records(load_app, herd_csv):
+    from record_import import import_records
+
+    rap = load_app(VET_HEALTH_MODEL="online")
+    model = rap.models.current().model
+    learned, seen, accuracy = model.learned, model.seen, model.prequential_accuracy
+
+    herd = pd.read_csv(herd_csv)
+    changed = herd.head(10).copy()
+    changed["Heart Rate (bpm)"] = changed["Heart Rate (bpm)"] + 7
+    added = herd.tail(5).copy()
+    added["Animal ID"] = [f"NEW{i}" for i in range(5)]
+    upload = io.BytesIO(pd.concat([changed, added]).to_csv(index=False).encode())
+
+    report = import_records(rap.records, upload, "herd.csv")
+    assert (report["inserted"], report["updated"]) == (5, 10)
+    assert model.learned == learned + 15
+    assert model.seen != seen
+    assert model.prequential_accuracy != accuracy
+
+
+def test_online_model_skips_imports_without_health_changes(load_app, herd_csv):
+    from record_import import import_records
+
+    rap = load_app(VET_HEALTH_MODEL="online")
+    model = rap.models.current().model
+    learned = model.learned
+
+    notes = pd.read_csv(herd_csv).head(10)
+    notes["Doctor Suggestion"] = "Recheck in a week"
+    import_records(rap.records, io.BytesIO(notes.to_csv(index=False).encode()), "notes.csv")
+    assert model.learned == learned
+
+
+def test_saving_models_drops_unreferenced_forests_of_dead_processes(load_app, tmp_path):
+    model_dir = tmp_path / "models"
+    rap = load_app(VET_MODEL_DIR=str(model_dir))
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    stale = model_dir / f"health-v1-p{dead.pid}-0123abcd.forest"
+    elsewhere = model_dir / f"health-v1-p{os.getppid()}-4567cdef.forest"  # a live process
+    mine = model_dir / f"health-v0-p{os.getpid()}-89abcdef.forest"
+    for path in (stale, elsewhere, mine):
+        path.write_bytes(b"")
+
+    bundle = rap.save_models(rap.models.current())
+    left = set(os.listdir(model_dir))
+    assert os.path.basename(bundle.model.path) in left and "bundle.pkl" in left
+    assert elsewhere.name in left
+    assert stale.name not in left and mine.name not in left
+
+
+def test_display_parses_the_csv_only_after_it_changed(load_app, herd_csv, monkeypatch):
+    rap = load_app()
+    client = rap.app.test_client()
+    animal_id = str(pd.read_csv(herd_csv)["Animal ID"].iloc[4])
+    assert client.get(f"/display?animal_id={animal_id}").status_code == 200
+
+    parses = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *a, **k: parses.append(a) or read_csv(*a, **k))
+    page = client.get(f"/display?animal_id={animal_id}")
+    assert page.status_code == 200 and parses == []
+
+    client.post("/display", data={"animal_id": animal_id, "suggestion": "Rest for two days"})
+    assert "Rest for two days" in client.get(f"/display?animal_id={animal_id}").get_data(as_text=True)
+    assert client.get("/display?animal_id=no-such-animal").get_data(as_text=True).startswith("<h3>No record")
+
+
+def test_herd_search_rejects_ranges_that_are_not_numbers(load_app):
+    client = load_app().app.test_client()
+    for query in ("age_min=two", "age_max=nan", "weight_min=1e999", "weight_max=heavy"):
+        response = client.get(f"/api/animals?{query}")
+        assert response.status_code == 400, query
+        assert query.split("=")[0] in response.get_json()["error"]
+    everyone = client.get("/api/animals?limit=500").get_json()["count"]
+    assert client.get("/api/animals?age_min=&weight_max=").get_json()["count"] == everyone
+    assert client.get("/api/animals?age_min=0&age_max=100").get_json()["count"] <= everyone
+
+
+def test_sync_routes_refuse_bad_pushes_and_page_at_least_one_entry(load_app, herd_csv):
+    rap = load_app(VET_SYNC_TOKEN="secret")
+    client = rap.app.test_client()
+    headers = {"X-Sync-Token": "secret"}
+    for body in ([], {"entries": [{"animal_id": "1"}]}, {"entries": "all"}):
+        assert client.post("/api/sync/push", json=body, headers=headers).status_code == 400
+    assert client.post("/api/sync/push", data="{", headers=headers).status_code == 400
+
+    for animal_id in pd.read_csv(herd_csv)["Animal ID"].astype(str)[:2]:
+        rap.records.update(animal_id, lambda r: {"Symptom 2": "Limp"})
+    page = client.get("/api/sync/pull?node=b&since=0&limit=0", headers=headers).get_json()
+    assert len(page["entries"]) == 1 and page["more"]
@@ -0,0 +1,83 @@
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+import bench_models
+from bench_models import bench_one, build_parser, load_plugins, pick_model, register_model, run_isolated
+from features import health_features, health_row
+
+
+def _result(model, f1, std, p95, rss=100.0):
+    return {"model": model, "f1_macro": {"mean": f1, "std": std},
+            "single_row_ms": {"p95": p95}, "peak_rss_mb": rss}
+
+
+def test_health_row_matches_health_features(herd_csv):
+    df = pd.read_csv(herd_csv)
+    X, y = health_features(df)
+    record = df.iloc[3].to_dict()
+    assert health_row(record) == list(X.iloc[3].astype(float))
+    assert y.iloc[3] == str(record["Health Status"])
+
+
+def test_bench_one_reports_cost_and_quality(herd_csv):
+    result = bench_one("logistic", herd_csv, "health", folds=3,
+                       single_rows=5, batch_repeats=2, seed=0)
+    assert result["rows"] == 50
+    assert result["folds"] == 3
+    assert 0.0 <= result["accuracy"]["mean"] <= 1.0
+    assert set(result["single_row_ms"]) == {"p50", "p95", "p99"}
+    assert result["fit_s"]["max"] >= result["fit_s"]["mean"] > 0
+
+
+def test_pick_model_prefers_the_cheaper_of_close_scores():
+    results = [_result("rf", 0.90, 0.02, 8.0), _result("logistic", 0.89, 0.02, 0.5),
+               _result("svc", 0.70, 0.01, 0.1), {"model": "hgb", "error": "boom"}]
+    assert pick_model(results) == "logistic"
+    assert pick_model(results, max_p95_ms=0.2) == "svc"
+    assert pick_model(results, max_p95_ms=0.05) is None
+    assert pick_model(results, max_rss_mb=50) is None
+
+
+PLUGIN = """
+from functools import partial
+from sklearn.tree import DecisionTreeClassifier
+from bench_models import register_model
+
+register_model("stump", partial(DecisionTreeClassifier, max_depth=1))
+"""
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    monkeypatch.setattr(bench_models, "MODELS", dict(bench_models.MODELS))
+    (tmp_path / "stump_models.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "stump_models", raising=False)
+    return "stump_models"
+
+
+def test_plugin_models_are_choices_and_reach_a_spawned_child(plugin, herd_csv):
+    load_plugins(["--plugin", plugin, "--models", "stump"])
+    assert build_parser().parse_args(["--models", "stump", "rf"]).models == ["stump", "rf"]
+
+    spec = bench_models.MODELS["stump"]
+    result = run_isolated(("stump", herd_csv, "health", 2, 2, 1, 0, spec), context="spawn")
+    assert "error" not in result and result["model"] == "stump"
+
+
+def test_main_benchmarks_a_plugin_model(plugin, herd_csv, tmp_path):
+    out = str(tmp_path / "bench")
+    bench_models.main(["--plugin", plugin, "--csv", herd_csv, "--models", "stump", "--folds", "2",
+                       "--single-rows", "2", "--batch-repeats", "1", "--out", out])
+    with open(out + ".json") as f:
+        assert json.load(f)["recommended"] == "stump"
+
+
+def test_unpicklable_factories_are_refused(monkeypatch):
+    monkeypatch.setattr(bench_models, "MODELS", dict(bench_models.MODELS))
+    with pytest.raises(ValueError):
+        register_model("inline", lambda: None)
+    assert "inline" not in bench_models.MODELS
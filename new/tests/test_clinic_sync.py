@@ -0,0 +1,168 @@
+import json
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from clinic_sync import InvalidEntry, SyncNode, dominates, merge_vectors
+from record_store import RecordStore
+
+
+def _pair(tmp_path, herd_csv, policy="lww"):
+    import shutil
+
+    other = str(tmp_path / "other.csv")
+    shutil.copy(herd_csv, other)
+    return (SyncNode(RecordStore(herd_csv), "a", policy=policy, token="t"),
+            SyncNode(RecordStore(other), "b", policy=policy, token="t"))
+
+
+def _first_id(node):
+    return str(node.store.read(["Animal ID"])["Animal ID"].iloc[0])
+
+
+def test_vector_merge_and_dominance():
+    assert dominates({"a": 2, "b": 1}, {"a": 1})
+    assert not dominates({"a": 2}, {"a": 1, "b": 1})
+    assert merge_vectors({"a": 2}, {"a": 1, "b": 3}) == {"a": 2, "b": 3}
+
+
+def test_edit_replicates_and_replay_is_skipped(tmp_path, herd_csv):
+    a, b = _pair(tmp_path, herd_csv)
+    animal_id = _first_id(a)
+    a.store.update(animal_id, lambda r: {"Symptom 1": "Cough"})
+    entries = a.entries_after(0, origin="a")
+    assert b.receive(entries) == {"applied": 1, "merged": 0, "skipped": 0}
+    assert b.store.get(animal_id)["Symptom 1"] == "Cough"
+    assert b.receive(entries) == {"applied": 0, "merged": 0, "skipped": 1}
+    # received entries aren't journaled again as b's own edits
+    assert b.entries_after(0, origin="b") == []
+
+
+def test_concurrent_edits_last_writer_wins_on_both_nodes(tmp_path, herd_csv):
+    a, b = _pair(tmp_path, herd_csv)
+    animal_id = _first_id(a)
+    a.store.update(animal_id, lambda r: {"Symptom 1": "A"})
+    time.sleep(0.01)
+    b.store.update(animal_id, lambda r: {"Symptom 1": "B"})
+    outcomes = (b.receive(a.entries_after(0, origin="a")), a.receive(b.entries_after(0, origin="b")))
+    assert [o["merged"] for o in outcomes] == [1, 1]
+    assert a.store.get(animal_id)["Symptom 1"] == b.store.get(animal_id)["Symptom 1"] == "B"
+
+
+def test_flag_policy_keeps_local_value_and_records_conflict(tmp_path, herd_csv):
+    a, b = _pair(tmp_path, herd_csv, policy="flag")
+    animal_id = _first_id(a)
+    a.store.update(animal_id, lambda r: {"Symptom 1": "A"})
+    b.store.update(animal_id, lambda r: {"Symptom 1": "B"})
+    b.receive(a.entries_after(0, origin="a"))
+    assert b.store.get(animal_id)["Symptom 1"] == "B"
+    [conflict] = b.conflicts()
+    assert (conflict["field"], conflict["local"], conflict["remote"]) == ("Symptom 1", "B", "A")
+
+
+def test_batch_of_several_animals_is_one_commit(tmp_path, herd_csv):
+    a, b = _pair(tmp_path, herd_csv)
+    ids = a.store.read(["Animal ID"])["Animal ID"].astype(str).tolist()[:3]
+    for animal_id in ids:
+        a.store.update(animal_id, lambda r: {"Symptom 2": "Limp"})
+    commits = []
+    b.store.listeners.append(lambda *args: commits.append(args))
+    assert b.receive(a.entries_after(0, origin="a"))["applied"] == 3
+    assert len(commits) == 1
+    assert [b.store.get(i)["Symptom 2"] for i in ids] == ["Limp"] * 3
+    # the versions predicted for the journal are the ones the commit wrote
+    db = sqlite3.connect(b.db_path)
+    known = dict(db.execute("SELECT animal_id, version FROM records"))
+    db.close()
+    assert [known[i] for i in ids] == [b.store.get(i)["Version"] for i in ids]
+
+
+def _save_many(csv_path, k):
+    node = SyncNode(RecordStore(csv_path), "a", token="t")
+    ids = node.store.read(["Animal ID"])["Animal ID"].astype(str).tolist()
+    for i in range(8):
+        node.store.update(ids[(i + k) % 3], lambda r: {"Symptom 2": f"p{k}-{i}"})
+
+
+def test_counters_follow_commit_order_across_processes(herd_csv):
+    node = SyncNode(RecordStore(herd_csv), "a", token="t")
+    workers = [multiprocessing.Process(target=_save_many, args=(herd_csv, k)) for k in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    db = sqlite3.connect(node.db_path)
+    last = {}
+    for animal_id, fields, vv in db.execute("SELECT animal_id, fields, vv FROM journal ORDER BY seq"):
+        counter = json.loads(vv)["a"]
+        assert counter == last.get(animal_id, (0,))[0] + 1
+        last[animal_id] = (counter, json.loads(fields)["Symptom 2"])
+    db.close()
+    assert sum(c for c, _ in last.values()) == 24
+    for animal_id, (_, value) in last.items():
+        assert node.store.get(animal_id)["Symptom 2"] == value
+
+
+def test_pull_pages_skip_the_pullers_own_entries(tmp_path, herd_csv):
+    hub, clinic = _pair(tmp_path, herd_csv)
+    ids = hub.store.read(["Animal ID"])["Animal ID"].astype(str).tolist()[:3]
+    for animal_id in ids:
+        clinic.store.update(animal_id, lambda r: {"Symptom 2": "Limp"})
+        hub.store.update(animal_id, lambda r: {"Doctor Suggestion": "Rest"})
+    hub.receive(clinic.entries_after(0, origin="b"))
+
+    page = hub.pull_page("b", 0, limit=2)
+    assert [e["origin"] for e in page["entries"]] == ["a", "a"] and page["more"]
+    page = hub.pull_page("b", page["next"], limit=2)
+    assert [e["animal_id"] for e in page["entries"]] == [ids[2]] and not page["more"]
+    assert hub.pull_page("b", page["next"])["entries"] == []
+
+
+def test_an_entry_journaled_during_an_empty_pull_comes_with_the_next_one(tmp_path, herd_csv, monkeypatch):
+    hub, clinic = _pair(tmp_path, herd_csv)
+    ids = hub.store.read(["Animal ID"])["Animal ID"].astype(str).tolist()[:2]
+    clinic.store.update(ids[0], lambda r: {"Symptom 2": "Limp"})
+    hub.receive(clinic.entries_after(0, origin="b"))  # nothing in the journal for b yet
+
+    read, writers = SyncNode._entries_after, []
+
+    def read_then_journal(db, *args, **kwargs):
+        entries = read(db, *args, **kwargs)
+        if not writers:  # a hub save lands while the page is being read
+            writers.append(threading.Thread(target=hub.record_local, args=(ids[1], {"Symptom 2": "Cough"}, 2)))
+            writers[0].start()
+            time.sleep(0.2)
+        return entries
+
+    monkeypatch.setattr(SyncNode, "_entries_after", staticmethod(read_then_journal))
+    page = hub.pull_page("b", 0)
+    writers[0].join()
+    assert page["entries"] == [] and not page["more"]
+    assert [e["animal_id"] for e in hub.pull_page("b", page["next"])["entries"]] == [ids[1]]
+
+
+def test_malformed_pushes_are_refused_whole(tmp_path, herd_csv):
+    hub, clinic = _pair(tmp_path, herd_csv)
+    animal_id = _first_id(clinic)
+    clinic.store.update(animal_id, lambda r: {"Symptom 2": "Limp"})
+    (good,) = clinic.entries_after(0, origin="b")
+    bad = [
+        "not an entry",
+        {k: v for k, v in good.items() if k != "animal_id"},
+        {**good, "origin": None},
+        {**good, "fields": ["Symptom 2"]},
+        {**good, "fields": {"Animal ID": "X9"}},
+        {**good, "fields": {"Symptom 2": {"nested": 1}}},
+        {**good, "stamps": {"Symptom 2": "yesterday"}},
+        {**good, "vv": {"b": "one"}},
+    ]
+    for entry in bad:
+        with pytest.raises(InvalidEntry):
+            hub.receive([good, entry])
+    with pytest.raises(InvalidEntry):
+        hub.receive({"entries": [good]})
+    assert hub.entries_after(0, origin="b") == []
+    assert hub.receive([good])["applied"] == 1
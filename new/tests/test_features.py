@@ -0,0 +1,28 @@
+import pandas as pd
+
+from features import holdout_split, in_holdout
+
+
+def test_holdout_membership_is_fixed_per_animal():
+    ids = [str(i) for i in range(5000)]
+    mask = in_holdout(ids)
+    assert 0.17 < mask.mean() < 0.23
+    # same answer for ints or padded strings, in any order and any herd size
+    assert (in_holdout(range(5000)) == mask).all()
+    assert (in_holdout([f" {i} " for i in ids[::-1]]) == mask[::-1]).all()
+    assert (in_holdout(ids[:100]) == mask[:100]).all()
+
+
+def test_grown_herd_keeps_the_old_holdout(herd_csv):
+    herd = pd.read_csv(herd_csv)
+    train, holdout = holdout_split(herd.head(30))
+    grown_train, grown_holdout = holdout_split(herd)
+    assert set(holdout["Animal ID"]) <= set(grown_holdout["Animal ID"])
+    assert set(train["Animal ID"]) <= set(grown_train["Animal ID"])
+    assert not set(grown_train["Animal ID"]) & set(grown_holdout["Animal ID"])
+
+
+def test_tiny_herd_is_used_whole():
+    herd = pd.DataFrame({"Animal ID": ["1"]})
+    train, holdout = holdout_split(herd)
+    assert len(train) == len(holdout) == 1
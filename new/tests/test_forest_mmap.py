@@ -0,0 +1,76 @@
+import copy
+import pickle
+
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_mmap import MappedForest, map_forest
+
+
+def _forest():
+    rng = np.random.default_rng(0)
+    X = (rng.random((300, 20)) < 0.2).astype(np.float32)
+    y = (X[:, 0] + X[:, 3] > 0).astype(int)
+    return RandomForestClassifier(n_estimators=8, random_state=0).fit(X, y), X
+
+
+def test_mapped_forest_matches_sklearn(tmp_path):
+    forest, X = _forest()
+    mapped = map_forest(forest, str(tmp_path / "f.forest"))
+    assert np.allclose(mapped.predict_proba(X), forest.predict_proba(X))
+
+
+def test_string_labels_and_continuous_features(tmp_path):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, 3)) * [20, 30, 5] + [130, 90, 6]
+    y = np.array(["Healthy", "Sick", "Critical"])[rng.integers(0, 3, 200)]
+    forest = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    mapped = map_forest(forest, str(tmp_path / "health.forest"))
+    assert list(mapped.classes_) == list(forest.classes_)
+    assert list(mapped.predict(X)) == list(forest.predict(X))
+    assert mapped.score(X, y) == forest.score(X, y)
+
+
+def test_pickle_carries_only_the_path(tmp_path):
+    forest, X = _forest()
+    mapped = map_forest(forest, str(tmp_path / "f.forest"))
+    blob = pickle.dumps(mapped)
+    assert len(blob) < 500
+    assert np.allclose(pickle.loads(blob).predict_proba(X), mapped.predict_proba(X))
+
+
+def test_bad_files_and_inputs_are_rejected(tmp_path):
+    forest, X = _forest()
+    mapped = map_forest(forest, str(tmp_path / "f.forest"))
+    with pytest.raises(ValueError):
+        mapped.predict_proba(X[:, :5])
+
+    bogus = tmp_path / "bogus.forest"
+    bogus.write_bytes(b"not a forest at all")
+    with pytest.raises(ValueError):
+        MappedForest(str(bogus))
+
+
+def test_sparse_input_is_densified_block_by_block(tmp_path, monkeypatch):
+    import forest_mmap
+
+    forest, X = _forest()
+    mapped = map_forest(forest, str(tmp_path / "f.forest"))
+    monkeypatch.setattr(forest_mmap, "PREDICT_BLOCK", 8 * 16)  # 16 rows per block
+    seen = []
+    leaf_proba = mapped._leaf_proba
+    monkeypatch.setattr(mapped, "_leaf_proba", lambda rows: seen.append(len(rows)) or leaf_proba(rows))
+    out = mapped.predict_proba(sparse.csr_matrix(X))
+    assert np.allclose(out, forest.predict_proba(X))
+    assert max(seen) == 16
+
+
+def test_deepcopy_shares_the_mapping_even_after_the_file_is_gone(tmp_path):
+    forest, X = _forest()
+    path = tmp_path / "f.forest"
+    mapped = map_forest(forest, str(path))
+    path.unlink()
+    assert copy.deepcopy(mapped) is mapped
+    assert isinstance(mapped, MappedForest)
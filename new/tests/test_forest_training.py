@@ -0,0 +1,52 @@
+import numpy as np
+
+from forest_training import (PREDICT_N_JOBS, fit_forest, grow_forest, make_forest, n_trees,
+                             refresh_forest)
+
+
+def _data(n=200, classes=("Healthy", "Sick"), seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = np.array(classes)[rng.integers(0, len(classes), n)]
+    return X, y
+
+
+def test_fit_forest_grows_requested_trees_then_predicts_single_threaded():
+    X, y = _data()
+    forest = fit_forest(X, y, n_estimators=12, n_jobs=2)
+    assert n_trees(forest) == 12
+    assert forest.n_jobs == PREDICT_N_JOBS
+
+
+def test_time_budget_stops_after_first_batch():
+    X, y = _data()
+    forest = fit_forest(X, y, n_estimators=40, n_jobs=1, time_budget=1e-9)
+    assert 0 < n_trees(forest) < 40
+
+
+def test_refresh_warm_starts_the_same_forest():
+    X, y = _data()
+    forest = fit_forest(X, y, n_estimators=10, n_jobs=1)
+    old_trees = list(forest.estimators_)
+    refreshed = refresh_forest(forest, *_data(seed=1), add_trees=5, max_trees=50, n_jobs=1)
+    assert refreshed is forest
+    assert n_trees(refreshed) == 15
+    assert refreshed.estimators_[:10] == old_trees
+
+
+def test_refresh_refits_when_labels_change_or_forest_too_big():
+    X, y = _data()
+    forest = fit_forest(X, y, n_estimators=10, n_jobs=1)
+    relabelled = refresh_forest(forest, *_data(classes=("Healthy", "Sick", "Critical")),
+                                add_trees=5, max_trees=50, n_jobs=1, time_budget=None)
+    assert relabelled is not forest
+    assert set(relabelled.classes_) == {"Healthy", "Sick", "Critical"}
+
+    capped = refresh_forest(forest, X, y, add_trees=5, max_trees=12, n_jobs=1, time_budget=None)
+    assert capped is not forest
+
+
+def test_grow_forest_adds_to_an_unfitted_forest():
+    X, y = _data()
+    forest = grow_forest(make_forest(n_jobs=1), X, y, 7, n_jobs=1, time_budget=None)
+    assert n_trees(forest) == 7
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from herd_analytics import ANALYTICS_COLUMNS, HerdAnalytics, RunningStats
+
+
+def test_welford_removal_matches_recomputing():
+    rng = np.random.default_rng(1)
+    values = rng.normal(70, 15, 200)
+    stats = RunningStats()
+    for x in values:
+        stats.add(x)
+    for x in values[:150]:
+        stats.remove(x)
+    rest = values[150:]
+    assert stats.n == 50
+    assert stats.mean == pytest.approx(rest.mean())
+    assert stats.std == pytest.approx(rest.std(ddof=1))
+
+
+def test_removing_the_last_value_resets():
+    stats = RunningStats()
+    stats.add(5.0)
+    stats.remove(5.0)
+    assert (stats.n, stats.mean, stats.std) == (0, 0.0, 0.0)
+
+
+def test_applied_saves_match_a_rebuild(herd_csv):
+    frame = pd.read_csv(herd_csv)[ANALYTICS_COLUMNS + ["Animal ID"]]
+    analytics = HerdAnalytics.from_frame(frame)
+
+    records = frame.to_dict("records")
+    edited = {**records[3], "Species": "Goat", "Heart Rate (bpm)": 140, "BP": "150/95", "Vaccination 1": "PPR"}
+    added = {**records[7], "Animal ID": "NEW-1", "Disease": "Anthrax", "Weight (kg)": 999}
+    analytics.apply(records[3], edited)
+    analytics.apply(None, added)
+
+    frame.iloc[3] = pd.Series(edited)
+    rebuilt = HerdAnalytics.from_frame(pd.concat([frame, pd.DataFrame([added])], ignore_index=True))
+    got, want = analytics.summary(), rebuilt.summary()
+    assert {k: got[k] for k in ("total", "special_care", "vaccination_coverage", "health_status", "species")} == \
+        {k: want[k] for k in ("total", "special_care", "vaccination_coverage", "health_status", "species")}
+    for name, vital in want["vitals"].items():
+        assert got["vitals"][name]["histogram"] == vital["histogram"]
+        assert got["vitals"][name]["n"] == vital["n"]
+        assert got["vitals"][name]["mean"] == pytest.approx(vital["mean"], abs=0.01)
+        assert got["vitals"][name]["std"] == pytest.approx(vital["std"], abs=0.01)
+        assert got["vitals"][name]["by_species"].keys() == vital["by_species"].keys()
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+import herd_index
+from herd_index import HerdIndex, PrefixIndex
+
+
+def _herd():
+    return pd.DataFrame({
+        "Animal ID": ["A1", "A2", "B1", "B2", "C1"],
+        "Name": ["Bella", "Brahma", "Daisy", "bella", "Moti"],
+        "Species": ["Cow", "Cow", "Goat", "Cow", "Buffalo"],
+        "Health Status": ["Sick", "Healthy", "Sick", "Sick", "Healthy"],
+        "Age (years)": [2, 5, 1, None, 8],
+        "Weight (kg)": [300, 420, 40, 310, 500],
+        "Vaccination 1": ["FMD", None, "PPR", "", "HS"],
+    })
+
+
+def _ids(result):
+    return [a["Animal ID"] for a in result[1]]
+
+
+def test_filters_and_ranges_combine():
+    index = HerdIndex(_herd())
+    assert _ids(index.search({"species": ["cow"], "health_status": ["Sick"]})) == ["A1", "B2"]
+    assert _ids(index.search({"species": ["Cow", "Goat"]}, {"age": (1, 2)})) == ["A1", "B1"]
+    assert _ids(index.search({"vaccinated": ["no"]})) == ["A2", "B2"]
+    assert index.search({"species": ["Horse"]})[0] == 0
+
+
+def test_vaccinated_counts_every_vaccination_column():
+    herd = _herd().assign(**{
+        "Vaccination 2": [None, "Brucella", None, None, None],
+        "Vaccination History": [None, None, None, '[{"vaccine": "FMD", "date": "2025-03-01"}]', None],
+    })
+    index = HerdIndex(herd)
+    assert _ids(index.search({"vaccinated": ["yes"]})) == ["A1", "A2", "B1", "B2", "C1"]
+    index.upsert({"Animal ID": "D1", "Vaccination History": "[]"})
+    assert _ids(index.search({"vaccinated": ["no"]})) == ["D1"]
+
+
+def test_pages_follow_the_cursor():
+    index = HerdIndex(_herd())
+    total, page, cursor = index.search(limit=2)
+    assert (total, [a["Animal ID"] for a in page]) == (5, ["A1", "A2"])
+    seen = [a["Animal ID"] for a in page]
+    while cursor is not None:
+        _, page, cursor = index.search(cursor=cursor, limit=2)
+        seen += [a["Animal ID"] for a in page]
+    assert seen == ["A1", "A2", "B1", "B2", "C1"]
+    assert index.search(cursor=99)[1] == []
+
+
+def test_cursor_below_minus_one_is_rejected():
+    with pytest.raises(ValueError):
+        HerdIndex(_herd()).search(cursor=-2)
+
+
+def test_saved_records_update_the_index():
+    index = HerdIndex(_herd())
+    index.apply(None, {"Animal ID": "A2", "Name": "Brahma", "Species": "Cow", "Health Status": "Sick",
+                       "Age (years)": 6, "Weight (kg)": 430})
+    index.apply(None, {"Animal ID": "D1", "Name": "Bruno", "Species": "Cow", "Health Status": "Sick",
+                       "Age (years)": 3, "Weight (kg)": 350, "Vaccination 1": "FMD"})
+    assert _ids(index.search({"health_status": ["sick"], "species": ["cow"]})) == ["A1", "A2", "B2", "D1"]
+    assert _ids(index.search(ranges={"age": (3, 6)})) == ["A2", "D1"]
+    assert [s["Animal ID"] for s in index.suggest("br")] == ["A2", "D1"]
+
+
+def test_suggest_ranks_exact_then_ids_then_names():
+    index = HerdIndex(_herd())
+    assert [(s["Animal ID"], s["match"]) for s in index.suggest("bella")] == [("A1", "name"), ("B2", "name")]
+    assert [s["Animal ID"] for s in index.suggest("b")][:2] == ["B1", "B2"]
+    assert index.suggest("  ") == []
+
+
+def test_prefix_index_merges_its_side_list(monkeypatch):
+    monkeypatch.setattr(herd_index, "DELTA_MERGE", 2)
+    index = PrefixIndex(["daisy", "moti"], [0, 1])
+    index.add("dolly", 2)
+    index.remove("moti", 1)
+    assert index.delta == [("dolly", 2)] and index.deleted == {("moti", 1)}
+    index.add("dora", 3)  # past DELTA_MERGE: folded into the arrays
+    assert index.delta == [] and not index.deleted
+    assert list(index.keys) == ["daisy", "dolly", "dora"]
+    assert index.prefix("do", 10) == [("dolly", 2), ("dora", 3)]
+    assert index.prefix("dolly-the-sheep", 10) == []
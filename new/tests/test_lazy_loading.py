@@ -0,0 +1,84 @@
+import sys
+import threading
+import time
+
+from lazy_loading import LazyModule, WarmUp
+
+
+def test_lazy_module_imports_on_first_attribute():
+    sys.modules.pop("colorsys", None)
+    colorsys = LazyModule("colorsys")
+    assert "colorsys" not in sys.modules
+    assert "not loaded" in repr(colorsys)
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "colorsys" in sys.modules
+    assert "(loaded)" in repr(colorsys)
+
+
+def test_warm_up_loads_once_in_the_background():
+    release, calls = threading.Event(), []
+
+    def load():
+        calls.append(threading.current_thread().name)
+        release.wait(5)
+
+    warm_up = WarmUp(load)
+    warm_up.start()
+    warm_up.start()
+    assert not warm_up.wait(0.05)
+    assert warm_up.status()["loading"]
+    release.set()
+    assert warm_up.wait(5)
+    assert calls == ["warm-up"]
+    status = warm_up.status()
+    assert status["ready"] and not status["loading"] and status["warmup_seconds"] >= 0
+
+
+def test_failed_warm_up_reports_the_error():
+    def load():
+        raise RuntimeError("no models")
+
+    warm_up = WarmUp(load)
+    warm_up.run()
+    assert not warm_up.ready
+    assert "no models" in warm_up.status()["error"]
+
+
+def _flaky(failures):
+    calls = []
+
+    def load():
+        calls.append(time.time())
+        if len(calls) <= failures:
+            raise RuntimeError(f"attempt {len(calls)}")
+    return load, calls
+
+
+def test_failed_warm_up_is_retried_and_clears_the_error():
+    load, calls = _flaky(1)
+    warm_up = WarmUp(load, retry_after=0.05)
+    warm_up.start()
+    assert not warm_up.wait(5)
+    assert "attempt 1" in warm_up.status()["error"]
+
+    warm_up.start()  # still backing off
+    assert len(calls) == 1
+    time.sleep(0.06)
+    warm_up.start()
+    assert warm_up.wait(5)
+    assert len(calls) == 2
+    assert warm_up.status()["error"] is None and warm_up.failures == 0
+
+    warm_up.start()  # loaded: never again
+    assert len(calls) == 2
+
+
+def test_backoff_doubles_up_to_the_cap():
+    load, calls = _flaky(10)
+    warm_up = WarmUp(load, retry_after=1, retry_max=3)
+    waits = []
+    for _ in range(4):
+        warm_up.run()
+        waits.append(round(warm_up._retry_at - warm_up.finished_at))
+    assert waits == [1, 2, 3, 3]
+    assert warm_up.failures == 4 and not warm_up.ready
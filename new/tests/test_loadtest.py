@@ -0,0 +1,93 @@
+import filecmp
+import random
+
+import flask
+import pandas as pd
+import pytest
+
+from loadtest import (InProcessClient, build_request, check_slo, parse_slo_rules, run_load, scratch_herd,
+                      summarise, wait_ready)
+
+
+def _app():
+    app = flask.Flask(__name__)
+
+    @app.route("/display", methods=["GET", "POST"])
+    def display():
+        if flask.request.args.get("animal_id") == "bad":
+            flask.abort(500)
+        return "ok"
+
+    return app
+
+
+def test_run_load_samples_every_request_per_route():
+    app = _app()
+    samples, elapsed = run_load(lambda: InProcessClient(app), ["1", "2", "bad"],
+                                {"/display": 3, "save": 1}, users=3, duration=30,
+                                max_requests=60, think_ms=0, seed=1)
+    assert sum(len(rows) for rows in samples.values()) == 60
+    assert set(samples) == {"/display", "/display [POST]"}
+
+    report = summarise(samples, elapsed)
+    assert report["total_requests"] == 60
+    display = report["routes"]["/display"]
+    assert 0 < display["error_rate"] < 1  # the "bad" animal fails
+    assert display["p50"] <= display["p95"] <= display["p99"] <= display["max"]
+
+
+class _Warming:
+    """/healthz answers from a script: status codes or exceptions."""
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.polls = 0
+
+    def send(self, method, path, form):
+        assert (method, path) == ("GET", "/healthz")
+        self.polls += 1
+        answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def test_wait_ready_polls_healthz_until_the_warm_up_is_done():
+    client = _Warming(ConnectionRefusedError(), 503, 503, 200)
+    assert wait_ready(client, timeout=5, interval=0)
+    assert client.polls == 4
+    assert wait_ready(_Warming(404), timeout=5, interval=0)  # no readiness check
+    assert not wait_ready(_Warming(503), timeout=0.05, interval=0.01)
+
+
+def test_slo_rules_and_route_overrides():
+    slo = parse_slo_rules(["/display:p95=150,p99=400", "*:error_rate=0.01"])
+    assert slo == {"/display": {"p95": 150.0, "p99": 400.0}, "*": {"error_rate": 0.01}}
+
+    report = {"routes": {
+        "/display": {"p95": 120.0, "p99": 450.0, "error_rate": 0.0},
+        "/display [POST]": {"p95": 200.0, "p99": 300.0, "error_rate": 0.05},
+    }}
+    failures = check_slo(report, slo)
+    # the POST route inherits the /display limits and the "*" error budget
+    assert failures == [
+        "/display: p99=450.0 > 400.0",
+        "/display [POST]: error_rate=0.05 > 0.01",
+        "/display [POST]: p95=200.0 > 150.0",
+    ]
+
+
+def test_build_request_rejects_unknown_kinds():
+    route, method, path, form = build_request("/predict", "7", random.Random(0))
+    assert (route, method, path) == ("/predict", "POST", "/predict")
+    assert set(form) >= {"species", "bp", "heart_rate"}
+    with pytest.raises(ValueError):
+        build_request("/nope", "7", random.Random(0))
+
+
+def test_scratch_herd_is_a_copy_or_a_synthetic_herd(herd_csv, tmp_path):
+    copy_dir, synth_dir = tmp_path / "copy", tmp_path / "synth"
+    copy_dir.mkdir()
+    synth_dir.mkdir()
+    path = scratch_herd(str(copy_dir), source=herd_csv)
+    assert path != herd_csv and filecmp.cmp(path, herd_csv, shallow=False)
+    assert len(pd.read_csv(scratch_herd(str(synth_dir), synth_rows=120))) == 120
@@ -0,0 +1,66 @@
+import threading
+
+import flask
+
+from metrics import REQUEST_SECONDS, STAGE_SECONDS, Histogram, instrument_app, span
+
+
+def test_per_thread_shards_merge_on_collect():
+    hist = Histogram("test_seconds", "Test.", "stage", buckets=(0.1, 1.0))
+
+    def observe():
+        for _ in range(100):
+            hist.observe("load", 0.05)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    hist.observe("load", 5.0)
+
+    counts, total = hist.collect()["load"]
+    assert counts == [400, 0, 1]
+    assert round(total, 6) == 25.0
+
+
+def test_render_is_cumulative_prometheus_text():
+    hist = Histogram("test_seconds", "Test.", "stage", buckets=(0.1, 1.0))
+    hist.observe('say "hi"', 0.5)
+    hist.observe('say "hi"', 0.05)
+    lines = hist.render().splitlines()
+    assert lines[:2] == ["# HELP test_seconds Test.", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="say \\"hi\\"",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{stage="say \\"hi\\""} 2' in lines
+
+
+def test_span_times_blocks_and_decorated_functions():
+    @span("test_decorated")
+    def work():
+        return 42
+
+    assert work() == 42 and work() == 42
+    with span("test_block"):
+        pass
+    stages = STAGE_SECONDS.collect()
+    assert sum(stages["test_decorated"][0]) == 2
+    assert sum(stages["test_block"][0]) == 1
+
+
+def test_instrumented_app_serves_metrics_per_route():
+    app = instrument_app(flask.Flask(__name__))
+
+    @app.route("/animals/<animal_id>")
+    def animal(animal_id):
+        return animal_id
+
+    client = app.test_client()
+    client.get("/animals/1")
+    client.get("/animals/2")
+    assert sum(REQUEST_SECONDS.collect()["GET /animals/<animal_id>"][0]) == 2
+
+    resp = client.get("/metrics")
+    assert resp.mimetype == "text/plain"
+    assert 'vet_request_seconds_count{route="GET /animals/<animal_id>"} 2' in resp.get_data(as_text=True)
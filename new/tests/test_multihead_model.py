@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from bench_sparse import make_dataset
+from multihead_model import MultiHeadModel, build_preprocessor
+
+NUMERIC = ["Age (years)", "Heart Rate (bpm)"]
+CATEGORICAL = ["Species", "Symptom 1"]
+
+
+def _preprocessor():
+    return ColumnTransformer([
+        ("num", StandardScaler(), NUMERIC),
+        ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL),
+    ])
+
+
+def _herd(herd_csv):
+    df = pd.read_csv(herd_csv)
+    return df[NUMERIC + CATEGORICAL], df["Health Status"].astype(str), df["Species"].astype(str)
+
+
+def test_heads_match_separate_pipelines(herd_csv):
+    X, status, species = _herd(herd_csv)
+    model = MultiHeadModel(_preprocessor(), {
+        "status": RandomForestClassifier(n_estimators=10, random_state=0),
+        "species": RandomForestClassifier(n_estimators=10, random_state=0),
+    }).fit(X, {"status": status, "species": species})
+
+    results = model.predict(X.head(5))
+    for name, y in (("status", status), ("species", species)):
+        pipeline = Pipeline([("pre", _preprocessor()),
+                             ("clf", RandomForestClassifier(n_estimators=10, random_state=0))])
+        pipeline.fit(X, y)
+        labels, proba = results[name]
+        assert list(labels) == list(pipeline.predict(X.head(5)))
+        assert np.allclose(proba, pipeline.predict_proba(X.head(5)))
+        assert list(model.classes(name)) == list(pipeline.classes_)
+
+
+def test_preprocessor_fitted_once(herd_csv):
+    X, status, species = _herd(herd_csv)
+    calls = []
+    pre = _preprocessor()
+    fit_transform = pre.fit_transform
+    pre.fit_transform = lambda *a, **k: calls.append(1) or fit_transform(*a, **k)
+    MultiHeadModel(pre, {
+        "status": RandomForestClassifier(n_estimators=5, random_state=0),
+        "species": RandomForestClassifier(n_estimators=5, random_state=0),
+    }).fit(X, {"status": status, "species": species})
+    assert calls == [1]
+
+
+def test_build_preprocessor_stays_csr_and_matches_dense():
+    X, y = make_dataset(500, n_breeds=50, n_symptoms=20)
+    numeric = ["Heart Rate (bpm)", "BP_Systolic", "BP_Diastolic"]
+    categorical = [c for c in X.columns if c not in numeric]
+
+    Xs = build_preprocessor(numeric, categorical).fit_transform(X)
+    Xd = build_preprocessor(numeric, categorical, sparse_output=False).fit_transform(X)
+    assert sparse.issparse(Xs) and Xs.format == "csr"
+    assert not sparse.issparse(Xd)
+    assert np.allclose(Xs.toarray(), Xd)
+
+
+def test_refreshed_copy_leaves_the_serving_model_alone(herd_csv):
+    X, status, species = _herd(herd_csv)
+    targets = {"status": status, "species": species}
+    model = MultiHeadModel(_preprocessor(), {
+        "status": RandomForestClassifier(n_estimators=5, random_state=0),
+        "species": RandomForestClassifier(n_estimators=5, random_state=0),
+    }).fit(X, targets)
+
+    def add_trees(clf, Xt, y):
+        clf.set_params(warm_start=True, n_estimators=clf.n_estimators + 3)
+        return clf.fit(Xt, y)
+
+    fresh = model.refreshed(X, targets, add_trees)
+    assert len(fresh.heads["status"].estimators_) == 8
+    assert len(model.heads["status"].estimators_) == 5
+    assert fresh.score(X, targets)["species"] == 1.0
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from online_model import OnlineHealthModel, RunningScaler
+
+
+def _records(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    sick = rng.random(n) < 0.5
+    X = rng.normal(size=(n, 3)) + np.where(sick, 3.0, 0.0)[:, None]
+    y = np.where(sick, "Sick", "Healthy")
+    return X, y
+
+
+def test_running_scaler_matches_batch_statistics():
+    X, _ = _records()
+    scaler = RunningScaler(3)
+    for start in range(0, len(X), 37):
+        scaler.update(X[start:start + 37])
+    assert np.allclose(scaler.mean, X.mean(axis=0))
+    assert np.allclose(scaler.transform(X), (X - X.mean(axis=0)) / X.std(axis=0, ddof=1))
+
+
+@pytest.mark.parametrize("estimator", ["nb", "sgd"])
+def test_prequential_accuracy_tests_before_training(estimator):
+    X, y = _records()
+    model = OnlineHealthModel(["Healthy", "Sick"], estimator=estimator)
+    model.learn_many(X[:2], y[:2], batch=2)
+    assert model.seen == 0  # nothing to test the first record against
+    model.learn_many(X[2:], y[2:], batch=1)
+    assert model.learned == len(y)
+    assert model.seen > 0
+    assert model.prequential_accuracy > 0.8
+    assert model.score(X, y) > 0.8
+
+    seen = model.seen
+    model.learn_one(X[0], y[0])
+    assert model.learned == len(y) + 1
+    assert model.seen > seen
+
+
+def test_unknown_labels_are_skipped_not_learned():
+    X, y = _records(10)
+    model = OnlineHealthModel(["Healthy", "Sick"])
+    model.learn_many(X, np.where(np.arange(10) < 3, "Critical", y))
+    assert model.skipped == 3
+    assert model.learned == 7
+
+
+def test_unknown_estimator_rejected():
+    with pytest.raises(ValueError):
+        OnlineHealthModel(["Healthy"], estimator="svm")
@@ -0,0 +1,52 @@
+import gc
+
+import pandas as pd
+import pytest
+
+from prefork import RecordIndex, file_fingerprint, freeze_heap
+
+
+def test_lookup_returns_the_first_row_for_an_id():
+    index = RecordIndex(["7", "3", "7", "12"])
+    assert len(index) == 4
+    assert index.lookup("7") == 0
+    assert index.lookup(3) == 1
+    assert index.lookup("12") == 3
+    assert index.lookup("4") is None
+    assert index.lookup("99") is None
+    assert index.lookup("12345") is None  # longer than any stored ID
+
+
+def test_index_arrays_are_read_only():
+    index = RecordIndex(["1", "2"])
+    with pytest.raises(ValueError):
+        index.ids[0] = "9"
+    with pytest.raises(ValueError):
+        index.rows[0] = 9
+
+
+def test_from_csv_matches_the_frame_and_fingerprints_the_file(herd_csv):
+    df = pd.read_csv(herd_csv)
+    from_csv = RecordIndex.from_csv(herd_csv)
+    from_frame = RecordIndex.from_frame(df)
+    assert from_csv.fingerprint == file_fingerprint(herd_csv)
+    for row, animal_id in enumerate(df["Animal ID"]):
+        assert from_csv.lookup(animal_id) == from_frame.lookup(animal_id) == row
+
+
+def test_from_csv_and_from_frame_agree_on_leading_zeros(tmp_path):
+    path = tmp_path / "herd.csv"
+    path.write_text("Animal ID,Name\n001,Bella\n002,Max\nA7,Daisy\n,Nameless\n")
+    from_csv = RecordIndex.from_csv(str(path))
+    from_frame = RecordIndex.from_frame(pd.read_csv(path))  # IDs parsed as 1.0, 2.0, NaN
+    for key, row in (("001", 0), ("1", 0), (2, 1), (" 002 ", 1), ("A7", 2), ("", 3)):
+        assert from_csv.lookup(key) == from_frame.lookup(key) == row
+    assert from_csv.lookup("0001x") is None
+
+
+def test_freeze_heap_moves_objects_out_of_the_collector():
+    try:
+        freeze_heap()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
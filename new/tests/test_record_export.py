@@ -0,0 +1,56 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from record_export import export, parse_since, watermark
+from record_store import RecordStore
+
+
+@pytest.fixture
+def store(herd_csv):
+    frame = pd.read_csv(herd_csv).head(6)
+    frame["Updated At"] = ["", "2026-10-01T08:00:00+00:00", "", "2026-10-02T09:30:00+00:00",
+                           "2026-10-02T09:30:00+00:00", "2026-09-30T23:59:59+00:00"]
+    store = RecordStore(herd_csv)
+    store.save(frame)
+    return store
+
+
+def _ids(data, fmt):
+    if fmt == "csv":
+        return pd.read_csv(io.BytesIO(data))["Animal ID"].astype(str).tolist()
+    if fmt == "jsonl":
+        return [str(json.loads(line)["Animal ID"]) for line in data.decode().splitlines()]
+    return pd.read_parquet(io.BytesIO(data))["Animal ID"].astype(str).tolist()
+
+
+def test_watermark_and_inclusive_since(store):
+    ids = store.read(["Animal ID"])["Animal ID"].astype(str).tolist()
+    mark = watermark(store)
+    assert mark == "2026-10-02T09:30:00+00:00"
+    for fmt in ("csv", "jsonl", "parquet"):
+        data = b"".join(export(store, fmt, since=mark, chunk_size=2))
+        assert _ids(data, fmt) == [ids[3], ids[4]]  # saved in the watermark's second: sent again
+        assert _ids(b"".join(export(store, fmt, chunk_size=2)), fmt) == ids  # full export keeps never-saved rows
+
+
+def test_next_delta_has_only_later_saves(store):
+    mark = watermark(store)
+    animal_id = str(store.read(["Animal ID"])["Animal ID"].iloc[0])
+    store.update(animal_id, lambda r: {"Symptom 1": "Cough"})
+    delta = pd.read_csv(io.BytesIO(b"".join(export(store, "csv", since=parse_since(watermark(store))))))
+    assert delta["Animal ID"].astype(str).tolist() == [animal_id]
+    assert watermark(store) > mark
+
+
+def test_empty_delta_still_has_a_header(store):
+    data = b"".join(export(store, "csv", since="2030-01-01T00:00:00+00:00", columns=["Animal ID", "Species"]))
+    assert data.decode().strip() == "Animal ID,Species"
+
+
+@pytest.mark.parametrize("given", ["2026-10-02T09:30:00Z", "2026-10-02T15:00:00+05:30",
+                                   "2026-10-02T15:00:00 05:30", "2026-10-02T09:30:00"])
+def test_since_is_normalised_to_utc_seconds(given):
+    assert parse_since(given) == "2026-10-02T09:30:00+00:00"
@@ -0,0 +1,72 @@
+import io
+
+import pandas as pd
+import pytest
+
+from record_import import ImportFileError, import_records, read_chunks, validate
+from record_store import RecordStore
+
+SPECIES = {"cow": "Cow", "goat": "Goat"}
+NEW_COLUMNS = "Breed,Sex,BP,Heart Rate (bpm),Health Status,Disease"
+
+
+def _chunk(text):
+    return next(read_chunks(io.StringIO(text), "upload.csv"))
+
+
+def _errors(errors):
+    return {e["row"]: e["errors"] for e in errors}
+
+
+def test_valid_rows_are_kept_with_canonical_species():
+    chunk = _chunk(f"Animal ID,Species,{NEW_COLUMNS}\n"
+                   " N1 ,cow,Gir,F,120/80,70,Healthy,None\n")
+    valid, errors, n_bad = validate(chunk, SPECIES, set())
+    assert (n_bad, errors) == (0, [])
+    assert valid[["Animal ID", "Species"]].values.tolist() == [["N1", "Cow"]]
+
+
+def test_each_row_lists_every_failed_check_with_its_spreadsheet_row():
+    chunk = _chunk(f"Animal ID,Species,{NEW_COLUMNS},Oxygen Saturation (%),Age (years)\n"
+                   "N1,Cow,Gir,F,120/80,70,Healthy,None,95,3\n"
+                   "N1,Cow,Gir,F,120/80,70,Healthy,None,95,3\n"
+                   ",Horse,Gir,F,high,-5,Sick,None,140,-1\n"
+                   "7,Goat,,,,,,,,\n")
+    valid, errors, n_bad = validate(chunk, SPECIES, set(), existing_ids={"7"})
+    assert n_bad == 2 and valid["Animal ID"].tolist() == ["N1", "7"]
+    errors = _errors(errors)
+    assert errors[3] == ["Animal ID repeated in the file"]
+    assert set(errors[4]) == {"missing Animal ID", "unknown Species", "BP must look like 120/80",
+                              "Heart Rate must be a positive number",
+                              "Oxygen Saturation must be between 0 and 100", "Age must be a non-negative number"}
+
+
+def test_ids_repeat_across_chunks_and_new_animals_need_training_columns():
+    seen = set()
+    validate(_chunk(f"Animal ID,Species,{NEW_COLUMNS}\nN1,Cow,Gir,F,120/80,70,Healthy,None\n"), SPECIES, seen)
+    _valid, errors, _n = validate(_chunk("Animal ID,Species,Breed\nN1,Cow,Gir\nN2,Cow,Gir\n"), SPECIES, seen)
+    errors = _errors(errors)
+    assert "Animal ID repeated in the file" in errors[2]
+    assert "new animals need Sex" in errors[3] and "new animals need Breed" not in errors[3]
+
+
+def test_import_upserts_valid_rows_in_one_commit(herd_csv):
+    store = RecordStore(herd_csv)
+    existing = str(pd.read_csv(herd_csv)["Animal ID"].iloc[0])
+    upload = io.BytesIO((f"Animal ID,Species,{NEW_COLUMNS},Color\n"
+                         f"{existing},Cow,,,,88,,,brown\n"
+                         "N9,Goat,Beetal,M,110/70,80,Healthy,None,\n"
+                         "N10,Goat,,,,,,,\n").encode())
+    commits = []
+    store.listeners.append(lambda *args: commits.append(args))
+    report = import_records(store, upload, "farm.csv")
+    assert (report["inserted"], report["updated"], report["error_count"]) == (1, 1, 1)
+    assert report["ignored_columns"] == ["Color"]
+    assert len(commits) == 1
+    assert store.get(existing)["Heart Rate (bpm)"] == 88
+    assert store.get("N9")["Version"] == 1
+
+
+def test_missing_required_column_rejects_the_file(herd_csv):
+    with pytest.raises(ImportFileError):
+        import_records(RecordStore(herd_csv), io.BytesIO(b"Animal ID,Breed\n1,Gir\n"), "farm.csv")
@@ -0,0 +1,190 @@
+import multiprocessing
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+import record_store
+from record_store import RecordNotFound, RecordStore, StoreView, VersionConflict, typed_frame
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def store(herd_csv, monkeypatch):
+    monkeypatch.setattr(record_store, "SNAPSHOT_DELAY", 3600)  # rebuilt only when a test asks
+    return RecordStore(herd_csv)
+
+
+def _first_id(store):
+    return str(store.read(["Animal ID"])["Animal ID"].iloc[0])
+
+
+
+def test_typed_frame_uses_categoricals_and_numbers():
+    df = typed_frame(pd.DataFrame({"Species": ["Cow", "Dog", "Cow"],
+                                   "Weight (kg)": ["410", "oops", "395.5"],
+                                   "Doctor Suggestion": ["rest", "", "fluids"]}))
+    assert isinstance(df["Species"].dtype, pd.CategoricalDtype)
+    assert df["Weight (kg)"].isna().tolist() == [False, True, False]
+    assert df["Doctor Suggestion"].dtype == object
+
+
+def test_read_projects_columns_from_a_typed_snapshot(store, herd_csv):
+    store.refresh()
+    frame = store.read(["Species", "Heart Rate (bpm)", "No Such Column"])
+    assert list(frame.columns) == ["Species", "Heart Rate (bpm)"]
+    assert isinstance(frame["Species"].dtype, pd.CategoricalDtype)
+    assert len(frame) == len(pd.read_csv(herd_csv))
+
+
+def test_snapshot_rebuilt_after_the_csv_changes_behind_its_back(store, herd_csv):
+    store.refresh()
+    assert not store.refresh()  # already current
+
+    df = pd.read_csv(herd_csv)
+    df.loc[0, "Species"] = "Camel"
+    df.to_csv(herd_csv, index=False)
+    assert store.read(["Species"])["Species"].iloc[0] == "Camel"
+    assert store.refresh()
+    assert store._snapshot_source() == store.fingerprint()
+
+
+def test_save_leaves_the_snapshot_stale_and_reads_see_the_change(store):
+    store.refresh()
+    animal_id = _first_id(store)
+    written = os.stat(store.snapshot_path).st_mtime_ns
+    store.update(animal_id, lambda r: {"Weight (kg)": 123.5})
+    assert os.stat(store.snapshot_path).st_mtime_ns == written
+    frame, source = store.read(["Animal ID", "Weight (kg)"], with_source=True)
+    assert source == store.fingerprint()
+    assert frame.loc[frame["Animal ID"].astype(str) == animal_id, "Weight (kg)"].item() == 123.5
+    assert list(frame.columns) == ["Animal ID", "Weight (kg)"]
+
+
+def test_burst_of_saves_shares_one_rebuild(store):
+    store.refresh()
+    ids = store.read(["Animal ID"])["Animal ID"].astype(str).tolist()[:3]
+    for animal_id in ids:
+        store.update(animal_id, lambda r: {"Symptom 1": "Cough"})
+    pending = store._rebuild
+    assert pending is not None
+    pending.cancel()
+    store._background_refresh()
+    assert store._rebuild is None
+    assert store._snapshot_source() == store.fingerprint()
+    assert (store.read(["Symptom 1"])["Symptom 1"].iloc[:3] == "Cough").all()
+
+
+def test_stale_or_garbled_expected_version_is_a_conflict(store):
+    animal_id = _first_id(store)
+    store.update(animal_id, lambda r: {"Symptom 1": "Cough"})
+    for expected in (0, "0", "abc", "1.5"):
+        with pytest.raises(VersionConflict):
+            store.update(animal_id, lambda r: {"Symptom 1": "Limp"}, expected)
+    assert store.update(animal_id, lambda r: {"Symptom 1": "Limp"}, " 1 ")["Version"] == 2
+
+
+def _bump_in_between(store, animal_id):
+    # a batch commit (import, sync) landing between a save's read and its commit
+    def apply(record):
+        if "Version" not in record:
+            store.upsert_many(pd.DataFrame([{"Animal ID": animal_id, "Weight (kg)": 99}]))
+        return {"Symptom 1": f"seen v{record.get('Version', 0)}"}
+    return apply
+
+
+def test_batch_commit_in_between_conflicts_a_versioned_save(store):
+    animal_id = _first_id(store)
+    with pytest.raises(VersionConflict):
+        store.update(animal_id, _bump_in_between(store, animal_id), 0)
+    assert store.get(animal_id)["Version"] == 1
+
+
+def test_batch_commit_in_between_reapplies_an_unversioned_save(store):
+    animal_id = _first_id(store)
+    record = store.update(animal_id, _bump_in_between(store, animal_id))
+    assert (record["Version"], record["Symptom 1"], record["Weight (kg)"]) == (2, "seen v1", 99)
+
+
+def test_batch_listeners_get_each_upserted_record(store):
+    animal_id = _first_id(store)
+    batches = []
+    store.batch_listeners.append(batches.append)
+    store.upsert_many(pd.DataFrame([{"Animal ID": animal_id, "Weight (kg)": 99},
+                                    {"Animal ID": "NEW1", "Name": "Fern"}]))
+    (changes,) = batches
+    (old, new), (none, added) = changes
+    assert str(old["Animal ID"]) == str(new["Animal ID"]) == animal_id
+    assert new["Weight (kg)"] == 99 and new["Version"] == old.get("Version", 0) + 1
+    assert none is None and (added["Animal ID"], added["Name"], added["Version"]) == ("NEW1", "Fern", 1)
+
+
+def _count_visits(store, animal_id, n):
+    if not isinstance(store, RecordStore):  # a CSV path, in a child process
+        store = RecordStore(store)
+    for _ in range(n):
+        store.update(animal_id, lambda r: {"Doctor Suggestion": f"visit {int(r.get('Version') or 0) + 1}"})
+
+
+def test_update_bumps_the_version_and_rejects_stale_edits(herd_csv):
+    store = RecordStore(herd_csv)
+    animal_id = str(pd.read_csv(herd_csv)["Animal ID"].iloc[0])
+    saved = store.update(animal_id, lambda r: {"Symptom 1": "Cough"}, expected_version="")
+    assert (saved["Version"], saved["Symptom 1"]) == (1, "Cough")
+    assert saved["Updated At"]
+
+    with pytest.raises(VersionConflict):
+        store.update(animal_id, lambda r: {"Symptom 1": "Limp"}, expected_version=0)
+    assert store.update(animal_id, lambda r: {"Symptom 1": "Limp"}, expected_version=1)["Version"] == 2
+    with pytest.raises(RecordNotFound):
+        store.update("no-such-animal", lambda r: {})
+
+
+def test_concurrent_saves_from_threads_and_processes_are_not_lost(herd_csv):
+    ids = pd.read_csv(herd_csv)["Animal ID"].astype(str).tolist()
+    store = RecordStore(herd_csv)  # one store per process, as in the app
+    threads = [threading.Thread(target=_count_visits, args=(store, animal_id, 5))
+               for animal_id in (ids[0], ids[0], ids[1])]
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_count_visits, args=(herd_csv, ids[1], 5)) for _ in range(2)]
+    for worker in threads + procs:
+        worker.start()
+    for worker in threads + procs:
+        worker.join()
+
+    assert store.get(ids[0])["Version"] == 10
+    assert store.get(ids[1])["Version"] == 15
+    assert store.get(ids[1])["Doctor Suggestion"] == "visit 15"
+
+
+class _Visits:
+    def __init__(self, source):
+        self.source = source
+        self.applied = []
+
+    def apply(self, old, new):
+        self.applied.append(str(new["Animal ID"]))
+
+
+def test_store_view_applies_own_saves_and_rebuilds_after_others(herd_csv):
+    store = RecordStore(herd_csv)
+    built = []
+
+    def build(store):
+        view = _Visits(store.read(["Animal ID"], with_source=True)[1])
+        built.append(view)
+        return view
+
+    view = StoreView(store, build)
+    animal_id = str(pd.read_csv(herd_csv)["Animal ID"].iloc[0])
+    first = view.get()
+    store.update(animal_id, lambda r: {"Symptom 1": "Cough"})
+    assert view.get() is first and first.applied == [animal_id]
+
+    # a save this process never saw, e.g. from another worker
+    other = RecordStore(herd_csv)
+    other.update(animal_id, lambda r: {"Symptom 1": "Limp"})
+    assert view.get() is not first
+    assert len(built) == 2
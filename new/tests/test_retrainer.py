@@ -0,0 +1,58 @@
+from retrainer import BackgroundRetrainer, ModelRegistry
+
+
+def _retrainer(retrain_fn, **kwargs):
+    registry = ModelRegistry("v1")
+    return registry, BackgroundRetrainer(registry, retrain_fn, interval=0, **kwargs)
+
+
+def test_candidate_within_tolerance_is_swapped_in():
+    registry, retrainer = _retrainer(
+        lambda current: ("v2", {"health": 0.79}, {"health": 0.80}), tolerance=0.02)
+    assert retrainer.retrain_now()
+    assert registry.current() == "v2"
+    assert registry.swaps == 1
+    assert retrainer.last_result["status"] == "swapped"
+
+
+def test_candidate_that_drops_any_model_is_rejected():
+    registry, retrainer = _retrainer(
+        lambda current: ("v2", {"health": 0.90, "survival": 0.70},
+                         {"health": 0.80, "survival": 0.80}), tolerance=0.02)
+    assert not retrainer.retrain_now()
+    assert registry.current() == "v1"
+    assert retrainer.last_result["status"] == "rejected"
+
+
+def test_failed_retrain_keeps_the_pending_changes():
+    def boom(current):
+        raise RuntimeError("training failed")
+
+    registry, retrainer = _retrainer(boom, after_changes=0)
+    retrainer.record_changed(3)
+    assert not retrainer.retrain_now()
+    assert retrainer.pending_changes == 3
+    assert registry.current() == "v1"
+
+
+def test_enough_changes_wake_the_background_thread():
+    seen = []
+
+    def retrain(current):
+        seen.append(current)
+        return "v2", {}, {}
+
+    registry, retrainer = _retrainer(retrain, after_changes=2)
+    retrainer.start()
+    try:
+        retrainer.record_changed()
+        assert not retrainer._wake.is_set()
+        retrainer.record_changed()
+        for _ in range(200):
+            if registry.current() == "v2":
+                break
+            retrainer._thread.join(0.01)
+        assert seen == ["v1"]
+        assert registry.current() == "v2"
+    finally:
+        retrainer.stop()
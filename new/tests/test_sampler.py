@@ -0,0 +1,94 @@
+import queue
+import sys
+import threading
+import time
+
+import flask
+
+from sampler import StackSampler, _idle, register_profiler_routes, sampler
+
+
+def _client(token="secret"):
+    app = flask.Flask(__name__)
+    register_profiler_routes(app, token=token)
+    return app.test_client()
+
+
+def test_routes_need_the_admin_token():
+    assert _client().get("/admin/profile", headers={"X-Admin-Token": "secret"}).status_code == 200
+    assert _client().get("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert _client().get("/admin/profile").status_code == 403
+    # no token configured: the routes stay off
+    assert _client(token="").get("/admin/profile", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_token_only_accepted_in_the_header():
+    client = _client()
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "secret"}).status_code == 200
+    assert client.get("/admin/profile?token=secret").status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+
+def test_idle_frames_matched_by_module_and_function():
+    waiting, stop = queue.Queue(), []
+
+    def get():  # same name as queue.get, but busy
+        while not stop:
+            pass
+
+    idle = threading.Thread(target=waiting.get, daemon=True)
+    busy = threading.Thread(target=get, daemon=True)
+    idle.start()
+    busy.start()
+    try:
+        for _ in range(200):  # until the idle thread is blocked in queue.get
+            frames = sys._current_frames()
+            if _idle(frames[idle.ident]):
+                break
+            time.sleep(0.01)
+        assert _idle(frames[idle.ident])
+        assert frames[busy.ident].f_code.co_name == "get"
+        assert not _idle(frames[busy.ident])
+    finally:
+        stop.append(True)
+        waiting.put(None)
+
+
+
+def test_profile_a_window_of_requests_then_download():
+    client = _client()
+    admin = {"X-Admin-Token": "secret"}
+    try:
+        resp = client.post("/admin/profile/start?requests=3&interval_ms=1", headers=admin)
+        assert resp.status_code == 200 and resp.get_json()["running"]
+        assert client.post("/admin/profile/start", headers=admin).status_code == 409
+        # start/409 above were requests 1 and 2; this status call is the 3rd
+        client.get("/admin/profile", headers=admin)
+        sampler._thread.join(2)
+        assert not client.get("/admin/profile", headers=admin).get_json()["running"]
+
+        resp = client.get("/admin/profile/download", headers=admin)
+        assert resp.mimetype == "text/plain"
+        assert "profile.collapsed" in resp.headers["Content-Disposition"]
+    finally:
+        sampler.stop()
+
+
+def test_sampler_counts_busy_threads():
+    sampler = StackSampler()
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            pass
+
+    worker = threading.Thread(target=spin, daemon=True)
+    worker.start()
+    sampler.start(seconds=0.2, interval=0.01)
+    sampler._thread.join()
+    stop.set()
+    assert sampler.samples > 0
+    assert "spin" in sampler.collapsed()
+    for line in sampler.collapsed().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and ";" in stack
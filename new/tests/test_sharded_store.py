@@ -0,0 +1,92 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from sharded_store import PartialCommitError, ShardedStore, ShardMapError
+
+
+@pytest.fixture
+def sharded(tmp_path, herd_csv):
+    frame = pd.read_csv(herd_csv).head(6)
+    frame["Animal ID"] = ["1", "2", "NTH-1", "nth-2", "STH-1", "XYZ-1"]
+    source = tmp_path / "source.csv"
+    frame.to_csv(source, index=False)
+    shard_map = tmp_path / "shards.json"
+    shard_map.write_text(json.dumps({"default": "main", "shards": {
+        "main": "main.csv", "NTH": "shards/north.csv", "STH": "shards/south.csv"}}))
+    os.makedirs(tmp_path / "shards")
+    for path in ("main.csv", "shards/north.csv", "shards/south.csv"):
+        frame.head(0).to_csv(tmp_path / path, index=False)
+    store = ShardedStore(str(shard_map))
+    store.split_from(str(source))
+    return store
+
+
+def _ids(store):
+    return sorted(store.read(["Animal ID"])["Animal ID"].astype(str))
+
+
+def test_ids_route_by_prefix_case_insensitively(sharded):
+    assert [sharded.shard_name(i) for i in ("NTH-7", "nth-7", "STH-1", "XYZ-1", "42", " NTH-3 ")] == \
+        ["NTH", "NTH", "STH", "main", "main", "NTH"]
+    assert {name: _ids(store) for name, store in sharded.shards.items()} == {
+        "main": ["1", "2", "XYZ-1"], "NTH": ["NTH-1", "nth-2"], "STH": ["STH-1"]}
+
+
+def test_reads_fan_out_and_writes_touch_one_shard(sharded):
+    assert _ids(sharded) == ["1", "2", "NTH-1", "STH-1", "XYZ-1", "nth-2"]
+    south = sharded.shards["STH"].fingerprint()
+    sharded.update("NTH-1", lambda r: {"Symptom 1": "Cough"})
+    assert sharded.get("NTH-1")["Symptom 1"] == "Cough"
+    assert sharded.shards["STH"].fingerprint() == south
+    inserted, updated = sharded.upsert_many(pd.DataFrame({"Animal ID": ["STH-9", "2"], "Species": ["Cow", "Goat"]}))
+    assert (inserted, updated) == (1, 1)
+    assert "STH-9" in _ids(sharded.shards["STH"]) and sharded.get("2")["Species"] == "Goat"
+
+
+def test_bad_bulk_rows_commit_no_shard(sharded):
+    before = sharded.fingerprint()
+    for rows in (pd.DataFrame({"Animal ID": ["NTH-5", "STH-5", " NTH-5"], "Species": ["Cow"] * 3}),
+                 pd.DataFrame({"Animal ID": ["NTH-6", None], "Species": ["Cow", "Goat"]}),
+                 pd.DataFrame({"Species": ["Cow"]})):
+        with pytest.raises(ValueError):
+            sharded.upsert_many(rows)
+    assert sharded.fingerprint() == before
+
+
+def test_a_failing_shard_reports_the_ones_already_committed(sharded, monkeypatch):
+    def full_disk(rows, blanks=False):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(sharded.shards["STH"], "upsert_many", full_disk)
+    rows = pd.DataFrame({"Animal ID": ["7", "NTH-7", "STH-7"], "Species": ["Cow", "Goat", "Dog"]})
+    with pytest.raises(PartialCommitError) as failed:
+        sharded.upsert_many(rows)
+    assert failed.value.failed == "STH"
+    assert failed.value.committed == {"main": (1, 0), "NTH": (1, 0)}
+    assert "7" in _ids(sharded) and "STH-7" not in _ids(sharded)
+
+
+def test_listeners_see_composite_sources(sharded):
+    seen = []
+    sharded.listeners.append(lambda old, new, before, after: seen.append((new["Animal ID"], before, after)))
+    before = sharded.fingerprint()
+    sharded.update("STH-1", lambda r: {"Symptom 1": "Limp"})
+    [(animal_id, composite_before, composite_after)] = seen
+    assert (animal_id, composite_before, composite_after) == ("STH-1", before, sharded.fingerprint())
+
+
+def test_added_and_moved_shards_are_seen_by_other_instances(sharded, tmp_path):
+    other = ShardedStore(sharded.map.path)
+    sharded.add_shard("WST", str(tmp_path / "shards" / "west.csv"))
+    sharded.upsert_many(pd.DataFrame({"Animal ID": ["WST-1"], "Species": ["Cow"]}))
+    assert other.shard_name("WST-1") == "WST" and other.get("WST-1")["Species"] == "Cow"
+
+    old_path = sharded.shards["NTH"].csv_path
+    sharded.move_shard("NTH", str(tmp_path / "node2" / "north.csv"))
+    assert os.path.exists(old_path + ".moved") and not os.path.exists(old_path)
+    assert other.get("nth-2")["Animal ID"] == "nth-2"
+    with pytest.raises(ShardMapError):
+        sharded.add_shard("nth", str(tmp_path / "dup.csv"))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import health_features
+from online_model import OnlineHealthModel
+from stream_training import Reservoir, column_values, iter_chunks, learn_chunks, reservoir_sample
+
+
+def test_csv_chunks_are_bounded_and_projected(herd_csv):
+    chunks = list(iter_chunks(herd_csv, ["Animal ID", "Species", "Missing"], chunk_size=20))
+    assert [len(c) for c in chunks] == [20, 20, 10]
+    assert list(chunks[0].columns) == ["Animal ID", "Species"]
+    assert column_values(herd_csv, "Species", chunk_size=7) == sorted(pd.read_csv(herd_csv)["Species"].unique())
+
+
+def test_parquet_chunks(herd_csv, tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "herd.parquet")
+    pd.read_csv(herd_csv).to_parquet(path)
+    chunks = list(iter_chunks(path, ["Species", "Missing"], chunk_size=20))
+    assert sum(len(c) for c in chunks) == 50
+    assert list(chunks[0].columns) == ["Species"]
+
+
+def test_small_stream_is_kept_whole_with_its_dtypes():
+    df = pd.DataFrame({"id": np.arange(30), "w": np.linspace(1, 2, 30), "s": ["a", "b", "c"] * 10})
+    sample = reservoir_sample([df[:10], df[10:25], df[25:]], capacity=100)
+    pd.testing.assert_frame_equal(sample, df)
+
+
+def test_later_chunks_keep_their_categories_and_fractions():
+    first = pd.DataFrame({"species": pd.Categorical(["Cow", "Dog"]), "weight": [400, 30]})
+    later = pd.DataFrame({"species": pd.Categorical(["Cat", "Goat"]), "weight": [4.5, None]})
+    sample = reservoir_sample([first, later], capacity=10)
+    assert list(sample["species"]) == ["Cow", "Dog", "Cat", "Goat"]
+    assert list(sample["species"].cat.categories) == ["Cow", "Dog", "Cat", "Goat"]
+    assert sample["weight"].dtype == np.float64 and sample["weight"].iloc[2] == 4.5
+
+
+def test_every_row_is_equally_likely_to_be_sampled():
+    df = pd.DataFrame({"id": np.arange(100)})
+    hits = np.zeros(100)
+    for seed in range(400):
+        reservoir = Reservoir(capacity=10, seed=seed)
+        for start in range(0, 100, 16):
+            reservoir.add(df[start:start + 16])
+        sample = reservoir.frame()
+        assert len(sample) == 10 and sample["id"].is_unique
+        hits[sample["id"].to_numpy()] += 1
+    # each row should be kept 400 * 10 / 100 = 40 times; early and late rows alike
+    assert hits.sum() == 4000
+    assert abs(hits[:50].sum() - hits[50:].sum()) < 400
+    assert hits.min() > 15 and hits.max() < 70
+
+
+def test_learn_chunks_feeds_every_row(herd_csv):
+    statuses = column_values(herd_csv, "Health Status")
+    model = learn_chunks(OnlineHealthModel(statuses), iter_chunks(herd_csv, chunk_size=16), health_features)
+    assert model.learned == 50
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from synth_records import stream_records, write_csv
+
+
+def test_same_seed_same_herd(herd_csv):
+    first = pd.concat(stream_records(herd_csv, 300, chunk_size=128, seed=7))
+    again = pd.concat(stream_records(herd_csv, 300, chunk_size=128, seed=7))
+    other = pd.concat(stream_records(herd_csv, 300, chunk_size=128, seed=8))
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.equals(other)
+
+
+def test_chunks_are_bounded_and_ids_continue(herd_csv):
+    chunks = list(stream_records(herd_csv, 300, chunk_size=128, start_id=1000))
+    assert [len(c) for c in chunks] == [128, 128, 44]
+    herd = pd.concat(chunks, ignore_index=True)
+    assert list(herd["Animal ID"]) == list(range(1000, 1300))
+
+
+def test_records_look_like_the_source(herd_csv):
+    source = pd.read_csv(herd_csv)
+    herd = pd.concat(stream_records(herd_csv, 500, chunk_size=250))
+    assert list(herd.columns) == list(source.columns)
+    assert set(herd["Species"]) <= set(source["Species"])
+    assert set(herd["Health Status"]) <= set(source["Health Status"].astype(str))
+    systolic = herd["BP"].str.split("/").str[0].astype(int)
+    source_systolic = source["BP"].str.split("/").str[0].astype(int)
+    assert systolic.between(source_systolic.min(), source_systolic.max()).all()
+    assert (herd["Oxygen Saturation (%)"] <= 100).all()
+    # each (Symptom 1, Symptom 2, Disease) triple was seen in the source
+    seen = set(source[["Symptom 1", "Symptom 2", "Disease"]].fillna("").astype(str).itertuples(index=False))
+    assert set(herd[["Symptom 1", "Symptom 2", "Disease"]].astype(str).itertuples(index=False)) <= seen
+
+
+def test_vaccination_rate_override(herd_csv):
+    herd = pd.concat(stream_records(herd_csv, 400, vaccination_rate=0.0))
+    assert (herd["Vaccination 1"] == "").all()
+    assert (herd["Vaccination 2"] == "").all()
+
+
+def test_write_csv_streams_one_header(herd_csv, tmp_path):
+    out = tmp_path / "synth.csv"
+    written = list(write_csv(stream_records(herd_csv, 250, chunk_size=100), out))
+    assert written == [100, 100, 50]
+    assert len(pd.read_csv(out)) == 250
@@ -0,0 +1,49 @@
+import datetime
+
+import pandas as pd
+
+from vaccination import DueIndex, history, next_due, with_dose
+
+
+def _herd():
+    return pd.DataFrame([
+        {"Animal ID": "1", "Name": "Gauri", "Species": "Cow", "Vaccination 1": "FMD (2025-01-10)",
+         "Vaccination 2": "HS (2024-06-01)"},
+        {"Animal ID": "2", "Name": "Moti", "Species": "Goat", "Vaccination 1": "PPR (2023-03-01)"},
+        {"Animal ID": "3", "Name": "Tiger", "Species": "Dog", "Vaccination 1": ""},
+    ])
+
+
+def _due(index, start=None, end=None):
+    return [(r["Animal ID"], r["vaccine"], r["due"]) for r in index.due(start, end)["results"]]
+
+
+def test_legacy_fields_and_new_doses_share_one_history():
+    record = {"Species": "Cow", "Vaccination 1": "FMD (2025-01-10)", "Vaccination 2": "HS (2024-06-01)"}
+    record.update(with_dose(record, "fmd", "2025-07-01"))
+    assert [d["date"] for d in history(record)] == ["2024-06-01", "2025-01-10", "2025-07-01"]
+    assert record["Vaccination 1"] == "fmd (2025-07-01)"
+    # case-insensitive match to the schedule: the later dose wins
+    assert next_due(record)["FMD"] == datetime.date(2025, 12, 28)
+
+
+def test_due_range_is_sorted_and_bounded():
+    index = DueIndex.from_frame(_herd())
+    assert _due(index, end=datetime.date(2025, 12, 31)) == [
+        ("1", "HS", "2025-06-01"), ("1", "FMD", "2025-07-09")]
+    assert _due(index, datetime.date(2025, 7, 1), datetime.date(2026, 12, 31)) == [
+        ("1", "FMD", "2025-07-09"), ("2", "PPR", "2026-02-28")]
+    assert index.due(end=datetime.date(2030, 1, 1), limit=1)["total"] == 3
+
+
+def test_saves_move_only_their_own_entries():
+    index = DueIndex.from_frame(_herd())
+    goat = _herd().iloc[1].to_dict()
+    index.apply(goat, {**goat, **with_dose(goat, "PPR", "2026-01-01")})
+    dog = _herd().iloc[2].to_dict()
+    index.apply(dog, {**dog, **with_dose(dog, "Rabies", "2025-05-05")})
+    assert _due(index, end=datetime.date(2030, 1, 1)) == [
+        ("1", "HS", "2025-06-01"), ("1", "FMD", "2025-07-09"),
+        ("3", "Rabies", "2026-05-05"), ("2", "PPR", "2028-12-31")]
+    index.apply(dog, None)
+    assert [r[0] for r in _due(index, end=datetime.date(2030, 1, 1))] == ["1", "1", "2"]
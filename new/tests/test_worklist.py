@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from worklist import Worklist
+
+
+def _chance(frame):
+    # stand-in for the survival model: the chance of living is a column
+    return frame["chance"].astype(float).to_numpy()
+
+
+def _record(animal_id, chance, special="No", updated="2026-01-01T00:00:00+00:00"):
+    return {"Animal ID": animal_id, "Name": f"n{animal_id}", "Species": "Cow", "Health Status": "Sick",
+            "Special Care": special, "Updated At": updated, "chance": chance}
+
+
+def _herd():
+    return pd.DataFrame([_record("1", 0.9), _record("2", 0.2), _record("3", 0.4, "Yes"), _record("4", 0.45)])
+
+
+def test_only_special_care_or_at_risk_animals_in_priority_order():
+    worklist = Worklist.from_frame(_herd(), _chance)
+    assert [r["Animal ID"] for r in worklist.top()] == ["3", "2", "4"]
+    assert [r["Animal ID"] for r in worklist.top(2)] == ["3", "2"]
+    # top() puts what it popped back
+    assert len(worklist.top()) == 3
+
+
+def test_older_updates_rank_higher_for_the_same_risk():
+    herd = pd.DataFrame([_record("1", 0.3, updated="2026-01-10T00:00:00+00:00"),
+                         _record("2", 0.3, updated="2025-12-01T00:00:00+00:00")])
+    rows = Worklist.from_frame(herd, _chance).top()
+    assert [r["Animal ID"] for r in rows] == ["2", "1"]
+    assert rows[0]["days_since_update"] - rows[1]["days_since_update"] == 40
+
+
+def test_saves_supersede_entries_lazily():
+    worklist = Worklist.from_frame(_herd(), _chance)
+    worklist.apply(None, _record("1", 0.05))          # joins at the top
+    worklist.apply(None, _record("3", 0.9))           # leaves: no longer special or at risk
+    worklist.apply(None, _record("2", 0.2, "Yes"))    # moves up
+    assert (len(worklist), len(worklist._heap)) == (3, 5)  # superseded entries stay until popped
+    assert [r["Animal ID"] for r in worklist.top()] == ["2", "1", "4"]
+    assert len(worklist._heap) == 3  # ... and are dropped when they reach the top
+
+
+def test_heap_is_compacted_once_stale_entries_pile_up():
+    worklist = Worklist.from_frame(_herd(), _chance)
+    for chance in np.linspace(0.01, 0.3, 200):
+        worklist.apply(None, _record("4", chance))
+    assert len(worklist._heap) <= 2 * len(worklist) + 64
+    assert [r["Animal ID"] for r in worklist.top()] == ["3", "2", "4"]
+    assert worklist.top()[-1]["chance_of_living"] == 0.3
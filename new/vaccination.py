@@ -0,0 +1,244 @@
+"""
+Structured vaccination history and due-date scheduling.
+
+Each record keeps its full history in the "Vaccination History" column as
+JSON, oldest dose first:
+
+    [{"vaccine": "FMD", "date": "2025-01-10"}, ...]
+
+Records written before that column existed are read from the free-text
+"Vaccination 1" / "Vaccination 2" fields ("FMD (2025-01-10)"), which are
+still filled in with the two latest doses for the dashboard and the PDF.
+
+SCHEDULE gives the booster interval (days) per species and vaccine; the
+next dose of a vaccine is due interval days after its latest dose.
+VET_VACCINE_SCHEDULE may point to a JSON file of the same shape whose
+entries override or extend it.
+
+DueIndex keeps every (due date, Animal ID, vaccine) in one sorted list, so
+"due between start and end" is two bisects plus the k entries returned,
+and a saved record moves only its own entries (kept current through
+record_store.StoreView, like the search index).
+"""
+
+import bisect
+import datetime
+import json
+import os
+import re
+import threading
+
+HISTORY_COLUMN = "Vaccination History"
+VACCINATION_COLUMNS = ["Animal ID", "Name", "Species", HISTORY_COLUMN, "Vaccination 1", "Vaccination 2"]
+
+# species -> {vaccine: booster interval in days}
+SCHEDULE = {
+    "Cow": {"FMD": 180, "HS": 365, "BQ": 365, "Anthrax": 365},
+    "Buffalo": {"FMD": 180, "HS": 365, "BQ": 365, "Anthrax": 365},
+    "Goat": {"FMD": 180, "PPR": 1095, "Enterotoxaemia": 365},
+    "Sheep": {"FMD": 180, "PPR": 1095, "Enterotoxaemia": 365},
+    "Horse": {"Tetanus": 365, "Anthrax": 365},
+    "Dog": {"Rabies": 365, "Parvo": 365, "Distemper": 365, "Leptospirosis": 365},
+    "Cat": {"Rabies": 365, "Feline Panleukopenia": 365},
+    "Hen": {"Newcastle (Ranikhet)": 90, "Fowl Pox": 365},
+}
+# booster interval for a vaccine the schedule doesn't list for the species
+DEFAULT_INTERVAL = 365
+
+_LEGACY = re.compile(r"^(.*?)\s*\((\d{4}-\d{2}-\d{2})\)\s*$")
+
+
+def load_schedule(path=None):
+    schedule = {species: dict(vaccines) for species, vaccines in SCHEDULE.items()}
+    path = path or os.environ.get("VET_VACCINE_SCHEDULE")
+    if path:
+        with open(path) as f:
+            for species, vaccines in json.load(f).items():
+                schedule.setdefault(species, {}).update({v: int(days) for v, days in vaccines.items()})
+    return schedule
+
+
+schedule = load_schedule()
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    text = str(value).strip()
+    return "" if text.lower() == "nan" else text
+
+
+def _date(text):
+    try:
+        return datetime.date.fromisoformat(str(text)[:10])
+    except ValueError:
+        return None
+
+
+def parse_legacy(text):
+    """'FMD (2025-01-10)' -> {'vaccine': 'FMD', 'date': '2025-01-10'}; undated doses get date None."""
+    text = _text(text)
+    if not text:
+        return None
+    match = _LEGACY.match(text)
+    if match and _date(match.group(2)):
+        return {"vaccine": match.group(1).strip(), "date": match.group(2)}
+    return {"vaccine": text, "date": None}
+
+
+def history(record):
+    """A record's doses, oldest first."""
+    raw = _text(record.get(HISTORY_COLUMN))
+    if raw:
+        try:
+            doses = json.loads(raw)
+        except ValueError:
+            doses = None
+        if isinstance(doses, list):
+            return [d for d in doses if isinstance(d, dict) and _text(d.get("vaccine"))]
+    # older records: at most two free-text entries, Vaccination 1 is the latest
+    doses = [parse_legacy(record.get("Vaccination 2")), parse_legacy(record.get("Vaccination 1"))]
+    return [d for d in doses if d]
+
+
+def _sort_key(dose):
+    return dose.get("date") or ""
+
+
+def with_dose(record, vaccine, date):
+    """Column changes that add one dose (for RecordStore.update)."""
+    doses = sorted(history(record) + [{"vaccine": vaccine.strip(), "date": str(date)}], key=_sort_key)
+    latest = [f"{d['vaccine']} ({d['date']})" if d.get("date") else d["vaccine"] for d in doses[::-1][:2]]
+    return {
+        HISTORY_COLUMN: json.dumps(doses),
+        "Vaccination 1": latest[0],
+        "Vaccination 2": latest[1] if len(latest) > 1 else "",
+    }
+
+
+def _canonical(species, vaccine):
+    """(schedule name, interval) for a vaccine, matching names case-insensitively."""
+    vaccines = schedule.get(species, {})
+    for name, days in vaccines.items():
+        if name.lower() == vaccine.lower():
+            return name, days
+    return vaccine, DEFAULT_INTERVAL
+
+
+def next_due(record):
+    """{vaccine: next due date or None if never given}, scheduled vaccines first."""
+    species = _text(record.get("Species"))
+    due = {name: None for name in schedule.get(species, {})}
+    latest = {}
+    for dose in history(record):
+        when = _date(dose.get("date") or "")
+        if when is None:
+            continue
+        name, days = _canonical(species, _text(dose["vaccine"]))
+        if name not in latest or when > latest[name][0]:
+            latest[name] = (when, days)
+    for name, (when, days) in latest.items():
+        due[name] = when + datetime.timedelta(days=days)
+    return due
+
+
+def recommendations(record, today=None):
+    """Rows for the record page: vaccine, last dose, next due and a status."""
+    today = today or datetime.date.today()
+    last = {}
+    species = _text(record.get("Species"))
+    for dose in history(record):
+        name, _days = _canonical(species, _text(dose["vaccine"]))
+        if dose.get("date") and (name not in last or dose["date"] > last[name]):
+            last[name] = dose["date"]
+    rows = []
+    for name, due in next_due(record).items():
+        if due is None:
+            status = "not given"
+        elif due < today:
+            status = "overdue"
+        elif due <= today + datetime.timedelta(days=7):
+            status = "due this week"
+        else:
+            status = "up to date"
+        rows.append({"vaccine": name, "last": last.get(name, ""),
+                     "due": due.isoformat() if due else "", "status": status})
+    return rows
+
+
+class DueIndex:
+    def __init__(self, source=None):
+        self.source = source
+        self._entries = []  # sorted (due date ordinal, Animal ID, vaccine)
+        self._by_animal = {}  # Animal ID -> its entries
+        self._names = {}  # Animal ID -> (Name, Species)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store):
+        frame, source = store.read(VACCINATION_COLUMNS, with_source=True)
+        return cls.from_frame(frame, source)
+
+    @classmethod
+    def from_frame(cls, frame, source=None):
+        self = cls(source)
+        # only records with some vaccination on file can have a booster due
+        has_any = None
+        for col in (HISTORY_COLUMN, "Vaccination 1", "Vaccination 2"):
+            if col in frame:
+                filled = frame[col].notna() & (frame[col] != "")
+                has_any = filled if has_any is None else has_any | filled
+        if has_any is None:
+            return self
+        for record in frame[has_any.to_numpy()].to_dict("records"):
+            entries = self._entries_for(record)
+            if entries:
+                self._by_animal[entries[0][1]] = entries
+                self._names[entries[0][1]] = (_text(record.get("Name")), _text(record.get("Species")))
+                self._entries.extend(entries)
+        self._entries.sort()
+        return self
+
+    @staticmethod
+    def _entries_for(record):
+        animal_id = _text(record.get("Animal ID"))
+        return sorted((due.toordinal(), animal_id, vaccine)
+                      for vaccine, due in next_due(record).items() if due is not None)
+
+    def apply(self, old, new):
+        record = new if new is not None else old
+        animal_id = _text(record.get("Animal ID"))
+        with self._lock:
+            for entry in self._by_animal.pop(animal_id, []):
+                i = bisect.bisect_left(self._entries, entry)
+                if i < len(self._entries) and self._entries[i] == entry:
+                    del self._entries[i]
+            self._names.pop(animal_id, None)
+            if new is None:
+                return
+            entries = self._entries_for(new)
+            for entry in entries:
+                bisect.insort(self._entries, entry)
+            if entries:
+                self._by_animal[animal_id] = entries
+                self._names[animal_id] = (_text(new.get("Name")), _text(new.get("Species")))
+
+    def _span(self, start, end):
+        lo = bisect.bisect_left(self._entries, (start.toordinal(),)) if start else 0
+        hi = bisect.bisect_left(self._entries, (end.toordinal() + 1,))
+        return lo, hi
+
+    def due(self, start=None, end=None, limit=None):
+        """Boosters due in [start, end] (start None = including overdue), earliest first."""
+        end = end or datetime.date.today()
+        with self._lock:
+            lo, hi = self._span(start, end)
+            total = hi - lo
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            rows = []
+            for ordinal, animal_id, vaccine in self._entries[lo:hi]:
+                name, species = self._names.get(animal_id, ("", ""))
+                rows.append({"Animal ID": animal_id, "Name": name, "Species": species, "vaccine": vaccine,
+                             "due": datetime.date.fromordinal(ordinal).isoformat()})
+        return {"total": total, "results": rows}
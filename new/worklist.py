@@ -0,0 +1,182 @@
+"""
+Triage worklist: special-care and high-risk animals in priority order (/worklist).
+
+    priority = SPECIAL_WEIGHT * special care flag
+             + RISK_WEIGHT    * (1 - chance of living)
+             + STALE_WEIGHT   * days since the record was last updated
+
+The last term grows at the same rate for every animal, so the order only
+depends on SPECIAL_WEIGHT * flag + RISK_WEIGHT * risk - STALE_WEIGHT *
+(day of last update), which doesn't change over time. That is the heap key:
+the worklist never has to be re-sorted as days go by.
+
+A saved record pushes a new heap entry; its previous entry is left in
+place and skipped when it reaches the top (lazy invalidation), and the
+heap is rebuilt once stale entries outnumber the live ones. top(n) pops
+until it has n live entries and pushes them back, O((n + stale) log n).
+
+Animals are listed while they are flagged for special care or their chance
+of living is below RISK_THRESHOLD. The chance of living comes from the
+caller (rap.py uses the survival model), so the worklist is rebuilt when
+the models are retrained.
+"""
+
+import datetime
+import heapq
+import itertools
+import math
+import os
+import threading
+
+SPECIAL_WEIGHT = float(os.environ.get("VET_WORKLIST_SPECIAL_WEIGHT", "1.0"))
+RISK_WEIGHT = float(os.environ.get("VET_WORKLIST_RISK_WEIGHT", "1.0"))
+STALE_WEIGHT = float(os.environ.get("VET_WORKLIST_STALE_WEIGHT", "0.02"))  # per day
+RISK_THRESHOLD = float(os.environ.get("VET_WORKLIST_RISK_THRESHOLD", "0.5"))
+# records saved before "Updated At" existed count as this many days old at build time
+UNKNOWN_AGE_DAYS = 30
+
+WORKLIST_COLUMNS = ["Animal ID", "Name", "Species", "Breed", "Sex", "BP", "Heart Rate (bpm)",
+                    "Health Status", "Symptom 1", "Symptom 2", "Disease", "Special Care", "Updated At"]
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value).strip()
+
+
+def _days(moment):
+    return (moment - _EPOCH).total_seconds() / 86400
+
+
+def _updated_day(value):
+    try:
+        moment = datetime.datetime.fromisoformat(_text(value))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return _days(moment)
+
+
+def _now_day():
+    return _days(datetime.datetime.now(datetime.timezone.utc))
+
+
+class Worklist:
+    def __init__(self, chance_fn, source=None, model_version=None):
+        # chance_fn(DataFrame of records) -> chance of living per row (0..1)
+        self.chance_fn = chance_fn
+        self.source = source
+        self.model_version = model_version
+        self._heap = []  # (-key, sequence, Animal ID)
+        self._live = {}  # Animal ID -> (key, sequence, details)
+        self._sequence = itertools.count()
+        self._unknown_day = _now_day() - UNKNOWN_AGE_DAYS
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store, chance_fn, model_version=None):
+        frame, source = store.read(WORKLIST_COLUMNS, with_source=True)
+        return cls.from_frame(frame, chance_fn, source, model_version)
+
+    @classmethod
+    def from_frame(cls, frame, chance_fn, source=None, model_version=None):
+        import numpy as np
+        import pandas as pd
+
+        self = cls(chance_fn, source, model_version)
+        if not len(frame):
+            return self
+        chances = np.asarray(chance_fn(frame), dtype=float)
+
+        def column(name, fn):
+            # fn runs once per distinct value, not once per row
+            if name not in frame:
+                return np.full(len(frame), fn(None), dtype=object)
+            codes, uniques = pd.factorize(frame[name], use_na_sentinel=False)
+            return np.asarray([fn(v) for v in uniques], dtype=object)[codes]
+
+        special = column("Special Care", lambda v: _text(v).lower() == "yes").astype(bool)
+        keep = np.flatnonzero(special | (chances < RISK_THRESHOLD))
+        updated = column("Updated At", _updated_day)[keep]
+        updated = np.where(pd.isna(updated), self._unknown_day, updated).astype(float)
+        keys = self._key(special[keep], chances[keep], updated)
+        texts = {name: column(name, _text)[keep] for name in ("Animal ID", "Name", "Species", "Health Status")}
+
+        for i, key in enumerate(keys.tolist()):
+            animal_id = texts["Animal ID"][i]
+            details = {"Animal ID": animal_id, "Name": texts["Name"][i], "Species": texts["Species"][i],
+                       "Health Status": texts["Health Status"][i], "special_care": bool(special[keep[i]]),
+                       "chance_of_living": round(float(chances[keep[i]]), 4), "updated": float(updated[i])}
+            self._live[animal_id] = (key, i, details)
+            self._heap.append((-key, i, animal_id))
+        self._sequence = itertools.count(len(keys))
+        heapq.heapify(self._heap)
+        return self
+
+    def _key(self, special, chance, updated):
+        return SPECIAL_WEIGHT * special + RISK_WEIGHT * (1 - chance) - STALE_WEIGHT * updated
+
+    def _set(self, record, chance):
+        animal_id = _text(record.get("Animal ID"))
+        self._live.pop(animal_id, None)
+        special = _text(record.get("Special Care")).lower() == "yes"
+        if not special and chance >= RISK_THRESHOLD:
+            return
+        updated = _updated_day(record.get("Updated At"))
+        if updated is None:
+            updated = self._unknown_day
+        key = float(self._key(special, chance, updated))
+        sequence = next(self._sequence)
+        details = {"Animal ID": animal_id, "Name": _text(record.get("Name")),
+                   "Species": _text(record.get("Species")), "Health Status": _text(record.get("Health Status")),
+                   "special_care": special, "chance_of_living": round(chance, 4), "updated": updated}
+        self._live[animal_id] = (key, sequence, details)
+        heapq.heappush(self._heap, (-key, sequence, animal_id))
+
+    def _compact(self):
+        self._heap = [(-key, sequence, animal_id) for animal_id, (key, sequence, _d) in self._live.items()]
+        heapq.heapify(self._heap)
+
+    def apply(self, old, new):
+        import pandas as pd
+
+        chance = None
+        if new is not None:
+            chance = float(self.chance_fn(pd.DataFrame([new]))[0])
+        with self._lock:
+            if new is None:
+                self._live.pop(_text(old.get("Animal ID")), None)
+            else:
+                self._set(new, chance)
+            if len(self._heap) > 2 * len(self._live) + 64:
+                self._compact()
+
+    def __len__(self):
+        return len(self._live)
+
+    def top(self, n=20):
+        """The n highest-priority animals, highest first."""
+        now = _now_day()
+        out = []
+        with self._lock:
+            popped = []
+            while self._heap and len(out) < n:
+                entry = heapq.heappop(self._heap)
+                _neg_key, sequence, animal_id = entry
+                live = self._live.get(animal_id)
+                if live is None or live[1] != sequence:
+                    continue  # superseded by a later save
+                popped.append(entry)
+                key, _sequence, details = live
+                row = dict(details)
+                del row["updated"]
+                row["days_since_update"] = round(now - details["updated"], 1)
+                row["priority"] = round(key + STALE_WEIGHT * now, 4)
+                out.append(row)
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+        return out